@@ -0,0 +1,70 @@
+"""
+compares the decode throughput of the generic python-osc path with the
+TuioDecoder fast path. Run it with
+    python3 -m benchmark.decode_bench
+"""
+import contextlib
+import io
+import time
+
+from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.osc_bundle_builder import OscBundleBuilder
+
+from pythontuio import Blob
+from pythontuio.const import TUIO_BLOB
+from pythontuio.dispatcher import TuioDispatcher
+from pythontuio.decoder import TuioDecoder
+
+
+def build_blob_bundle(count :int) -> bytes:
+    """
+    returns a TUIO bundle with alive, set and fseq of `count` blobs
+    """
+    bundle_builder = OscBundleBuilder(0)
+    builder = OscMessageBuilder(address=TUIO_BLOB)
+    builder.add_arg("alive")
+    for session_id in range(count):
+        builder.add_arg(session_id)
+    bundle_builder.add_content(builder.build())
+    for session_id in range(count):
+        blob = Blob(session_id)
+        blob.position = (session_id / count, 0.5)
+        bundle_builder.add_content(blob.get_message())
+    builder = OscMessageBuilder(address=TUIO_BLOB)
+    builder.add_arg("fseq")
+    builder.add_arg(-1)
+    bundle_builder.add_content(builder.build())
+    return bundle_builder.build().dgram
+
+
+def measure(dispatcher, dgram, messages_per_bundle, duration=1.0) -> float:
+    """
+    returns the decoded messages per second
+    """
+    bundles = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            dispatcher.call_handlers_for_packet(dgram, ("127.0.0.1", 0))
+            bundles += 1
+        elapsed = time.perf_counter() - start
+    return bundles * messages_per_bundle / elapsed
+
+
+def main():
+    print(f"{'blobs':>6} {'generic msg/s':>14} {'fast msg/s':>14} {'speedup':>8}")
+    for count in (1, 10, 100, 300):
+        dgram = build_blob_bundle(count)
+        messages = count + 2
+
+        generic = TuioDispatcher()
+        fast = TuioDispatcher()
+        fast._decoder = TuioDecoder(fast) # pylint: disable=protected-access
+
+        generic_rate = measure(generic, dgram, messages)
+        fast_rate = measure(fast, dgram, messages)
+        print(f"{count:>6} {generic_rate:>14.0f} {fast_rate:>14.0f} {fast_rate / generic_rate:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
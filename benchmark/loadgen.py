@@ -0,0 +1,146 @@
+"""
+synthetic load generator. A TuioServer sends frames over the loopback
+interface at a fixed rate to a TuioClient in the same process, the moving
+cursors are replaced with the given churn. Reports the received frames per
+second and the p50/p99 latency from send_bundle to the refresh of the listeners.
+Run it with
+    python3 -m benchmark.loadgen --hz 120 --sessions 100 --churn 0.01 --seconds 5
+    python3 -m benchmark.loadgen --hz 120 --sessions 100 --stream size    # over TCP
+"""
+import argparse
+import contextlib
+import io
+import socket
+import statistics
+import threading
+import time
+
+from pythontuio import Cursor
+from pythontuio import TuioClient, TuioServer
+from pythontuio.stream import TuioStreamClient, SIZE_PREFIX, SLIP
+
+
+class TimingClient(TuioClient): # pylint: disable=too-many-ancestors
+    """
+    TuioClient which stores the time every frame reaches the listeners
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.received = {}
+
+    def _notify_listeners(self, frame):
+        self.received[frame.frame_id] = time.perf_counter()
+        super()._notify_listeners(frame)
+
+
+class TimingStreamClient(TuioStreamClient):
+    """
+    TuioStreamClient which stores the time every frame reaches the listeners
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.received = {}
+
+    def _notify_listeners(self, frame):
+        self.received[frame.frame_id] = time.perf_counter()
+        super()._notify_listeners(frame)
+
+
+def _free_port() -> int:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def percentile(values, fraction :float) -> float:
+    """
+    returns the value below which fraction of the sorted values lie
+    """
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run(hz :float, sessions :int, churn :float, seconds :float, fast_decoder :bool,
+        stream :str = None) -> dict:
+    """
+    drives a client for seconds and returns throughput and latencies. With
+    stream the frames are sent over TCP with that framing instead of UDP
+    """
+    port = _free_port()
+    if stream is None:
+        client = TimingClient(("127.0.0.1", port), fast_decoder=fast_decoder)
+    else:
+        client = TimingStreamClient(("127.0.0.1", port), stream, fast_decoder=fast_decoder)
+    cursors = [Cursor(session_id) for session_id in range(sessions)]
+    next_id = sessions
+    replace = sessions * churn        # sessions to replace per frame, may be fractional
+    pending = 0.0
+    sent = {}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if stream is None:
+            thread = threading.Thread(target=client.start, daemon=True)
+            thread.start()
+            time.sleep(0.2) # client binds the port
+        else:
+            client.start()
+        server = TuioServer(port=port, stream=stream)
+        server.cursors.extend(cursors)
+
+        period = 1 / hz
+        deadline = start = time.perf_counter()
+        while deadline - start < seconds:
+            pending += replace
+            while pending >= 1 and server.cursors:
+                server.cursors.pop(0)
+                server.cursors.append(Cursor(next_id))
+                next_id += 1
+                pending -= 1
+            phase = (deadline - start) % 1
+            for cursor in server.cursors:
+                cursor.position = (phase, cursor.session_id % 100 / 100)
+            sent[server.frame_id + 1] = time.perf_counter()
+            server.send_bundle()
+            deadline += period
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        elapsed = time.perf_counter() - start
+        time.sleep(0.2) # late frames
+        if stream is None:
+            client.shutdown()
+            client.server_close()
+        else:
+            client.stop()
+
+    latencies = [client.received[frame_id] - sent_time
+                 for frame_id, sent_time in sent.items() if frame_id in client.received]
+    return {
+        "sent"     : len(sent),
+        "received" : len(latencies),
+        "fps"      : len(latencies) / elapsed,
+        "p50"      : statistics.median(latencies) if latencies else float("nan"),
+        "p99"      : percentile(latencies, 0.99) if latencies else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="drive a TuioClient over the loopback interface")
+    parser.add_argument("--hz", type=float, default=60)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--churn", type=float, default=0.0, help="fraction of sessions replaced per frame")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--generic", action="store_true", help="use the python-osc decode path")
+    parser.add_argument("--stream", choices=(SIZE_PREFIX, SLIP), help="send over TCP with this framing")
+    args = parser.parse_args()
+
+    result = run(args.hz, args.sessions, args.churn, args.seconds, not args.generic, args.stream)
+    print(f"sent {result['sent']} frames, received {result['received']} "
+          f"({result['fps']:.1f} frames/s)")
+    print(f"latency p50 {result['p50'] * 1000:.3f} ms, p99 {result['p99'] * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
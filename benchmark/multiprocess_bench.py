@@ -0,0 +1,86 @@
+"""
+measures the frames per second the MultiProcessTuioClient delivers to its
+listeners with several trackers sending at full speed. Run it with
+    python3 -m benchmark.multiprocess_bench
+"""
+import contextlib
+import io
+import multiprocessing
+import socket
+import threading
+import time
+
+from pythontuio import Blob
+from pythontuio import TuioListener
+from pythontuio.encoder import TuioEncoder
+from pythontuio.multiprocess import MultiProcessTuioClient
+
+PORT = 3343
+
+
+def _run_tracker(port :int, blobs :int, stop_event):
+    """
+    sends bundles with changing blobs as fast as possible from its own socket
+    """
+    profiles = [Blob(session_id) for session_id in range(blobs)]
+    encoder = TuioEncoder()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    frame_id = 0
+    while not stop_event.is_set():
+        frame_id += 1
+        for blob in profiles:
+            blob.position = (frame_id % 100 / 100, 0.5)
+        sock.sendto(encoder.encode([], [], profiles, frame_id), ("127.0.0.1", port))
+        time.sleep(0) # give the receivers a chance on small machines
+    sock.close()
+
+
+class CountingListener(TuioListener):
+    """
+    counts the completed frames
+    """
+    def __init__(self):
+        self.frames = 0
+        self.lock = threading.Lock()
+
+    def refresh(self, time):
+        with self.lock:
+            self.frames += 1
+
+
+def measure(workers :int, trackers :int, blobs :int, duration :float = 2.0) -> float:
+    """
+    returns the frames per second delivered by a client with workers processes
+    """
+    listener = CountingListener()
+    client = MultiProcessTuioClient(("127.0.0.1", PORT), workers=workers)
+    client.add_listener(listener)
+    with contextlib.redirect_stdout(io.StringIO()):
+        client.start()
+        stop_event = multiprocessing.Event()
+        senders = [multiprocessing.Process(target=_run_tracker, args=(PORT, blobs, stop_event))
+                   for _ in range(trackers)]
+        for sender in senders:
+            sender.start()
+        time.sleep(0.5) # warm up
+        start_frames, start = listener.frames, time.perf_counter()
+        time.sleep(duration)
+        frames, elapsed = listener.frames - start_frames, time.perf_counter() - start
+        stop_event.set()
+        for sender in senders:
+            sender.join()
+        client.stop(5)
+    return frames / elapsed
+
+
+def main():
+    trackers, blobs = 8, 100
+    print(f"{trackers} trackers with {blobs} blobs each, {multiprocessing.cpu_count()} cores")
+    for workers in (1, 2, 4):
+        if workers > multiprocessing.cpu_count():
+            break
+        print(f"{workers} workers: {measure(workers, trackers, blobs):10.0f} frames/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+memory and allocation benchmark of the profile classes. Run it with
+    python3 -m benchmark.profile_bench
+"""
+import contextlib
+import io
+import time
+import tracemalloc
+
+from pythontuio import Blob
+from pythontuio.dispatcher import TuioDispatcher
+
+
+class DictBlob: # pylint: disable=too-many-instance-attributes,too-few-public-methods
+    """
+    Blob as plain class with instance dict, like the profiles before __slots__
+    """
+    def __init__(self, session_id):
+        self.session_id             = session_id
+        self.position               = (0, 0)
+        self.angle                  =  5
+        self.dimension              = (.1, .1)
+        self.area                   = 0.1
+        self.velocity               = (0.1, 0.1)
+        self.velocity_rotation      = 0.1
+        self.motion_acceleration    = 0.1
+        self.rotation_acceleration  = 0.1
+
+
+def memory_per_profile(profile_type, count :int) -> float:
+    """
+    returns the allocated bytes per profile for count profiles
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    profiles = [profile_type(session_id) for session_id in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del profiles
+    return used / count
+
+
+def churn(count :int, churn_rate :float, pooled :bool, frames :int = 50):
+    """
+    runs alive diffs where churn_rate of the sessions are replaced every frame.
+    returns (peak of the traced memory in bytes, seconds per frame)
+    """
+    dispatcher = TuioDispatcher()
+    if pooled:
+        dispatcher.enable_profile_pool(max_size=count)
+    replaced = int(count * churn_rate)
+    next_id = count
+    alive = list(range(count))
+    with contextlib.redirect_stdout(io.StringIO()):
+        dispatcher._blob_handler("/tuio/2Dblb", "alive", *alive) # pylint: disable=protected-access
+        dispatcher._blob_handler("/tuio/2Dblb", "fseq", -1)     # pylint: disable=protected-access
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        for _ in range(frames):
+            alive = alive[replaced:] + list(range(next_id, next_id + replaced))
+            next_id += replaced
+            dispatcher._blob_handler("/tuio/2Dblb", "alive", *alive) # pylint: disable=protected-access
+            dispatcher._blob_handler("/tuio/2Dblb", "fseq", -1)     # pylint: disable=protected-access
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return peak, elapsed / frames
+
+
+def main():
+    for count in (1000, 10000):
+        dict_size = memory_per_profile(DictBlob, count)
+        slot_size = memory_per_profile(Blob, count)
+        print(f"{count:>6} sessions: {dict_size:6.0f} bytes/blob with dict, "
+              f"{slot_size:6.0f} bytes/blob with __slots__")
+
+    print()
+    print(f"{'sessions':>8} {'churn':>6} {'pool':>5} {'peak KiB':>9} {'ms/frame':>9}")
+    for count in (1000, 10000):
+        for churn_rate in (0.01, 0.1, 0.5):
+            for pooled in (False, True):
+                peak, seconds = churn(count, churn_rate, pooled)
+                print(f"{count:>8} {churn_rate:>6.2f} {str(pooled):>5} {peak / 1024:>9.0f} "
+                      f"{seconds * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
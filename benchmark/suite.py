@@ -0,0 +1,296 @@
+"""
+offline benchmark suite of the encode, decode and dispatch paths.
+All inputs are generated deterministically, every case is repeated and the
+median is reported, so the results of two runs on the same machine can be
+compared. Run it with
+    python3 -m benchmark.suite [--quick] [--save results.json] [--compare baseline.json]
+
+--compare exits with 1 if a case got slower than --threshold times the baseline.
+"""
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import time
+
+from pythontuio import Cursor, Object, Blob
+from pythontuio import TuioServer
+from pythontuio import TuioListener
+from pythontuio.dispatcher import TuioDispatcher
+from pythontuio.decoder import TuioDecoder
+from pythontuio.encoder import TuioEncoder
+from pythontuio.spatial import GridIndex
+from pythontuio.relay import TuioRelay, RelayTransform
+
+SIZES = (10, 100, 1000, 10000)
+CHURN_RATES = (0.0, 0.01, 0.1, 0.5)
+FRAMES = 20     # frames per measurement of the frame based cases
+
+
+class NullSocket:
+    """
+    socket which discards everything sent through it
+    """
+    def sendto(self, data, address):
+        pass
+
+
+class NullListener(TuioListener):
+    """
+    listener with all callbacks, so every event costs a call
+    """
+    # pylint: disable=multiple-statements
+    def add_tuio_object(self, obj): pass
+    def update_tuio_object(self, obj): pass
+    def remove_tuio_object(self, obj): pass
+    def add_tuio_cursor(self, cur): pass
+    def update_tuio_cursor(self, cur): pass
+    def remove_tuio_cursor(self, cur): pass
+    def add_tuio_blob(self, blob): pass
+    def update_tuio_blob(self, blob): pass
+    def remove_tuio_blob(self, blob): pass
+    def refresh(self, time): pass
+
+
+def alive_sequence(sessions :int, churn :float, frames :int = FRAMES) -> list:
+    """
+    returns the session ids of frames alive messages. Every frame the churn
+    fraction of the oldest sessions is replaced by new ones
+    """
+    session_ids = list(range(sessions))
+    next_id = sessions
+    replaced = round(sessions * churn)
+    sequence = []
+    for _ in range(frames):
+        session_ids = session_ids[replaced:] + list(range(next_id, next_id + replaced))
+        next_id += replaced
+        sequence.append(session_ids)
+    return sequence
+
+
+def _cursors(session_ids) -> list:
+    cursors = []
+    for session_id in session_ids:
+        cursor = Cursor(session_id)
+        cursor.position = (session_id % 100 / 100, session_id % 37 / 37)
+        cursors.append(cursor)
+    return cursors
+
+
+def _median(function, repeat :int) -> float:
+    """
+    returns the median of the seconds returned by function
+    """
+    return statistics.median(function() for _ in range(repeat))
+
+
+def bench_get_message(sessions :int, repeat :int) -> dict:
+    results = {}
+    for profile_type in (Cursor, Object, Blob):
+        profiles = [profile_type(session_id) for session_id in range(sessions)]
+        def run():
+            start = time.perf_counter()
+            for profile in profiles:
+                profile.get_message()
+            return (time.perf_counter() - start) / sessions
+        results[f"get_message/{profile_type.__name__.lower()}/{sessions}"] = _median(run, repeat)
+    return results
+
+
+def bench_send_bundle(sessions :int, repeat :int) -> dict:
+    results = {}
+    for name in ("cursors", "objects", "blobs"):
+        server = TuioServer()
+        server._sock = NullSocket() # pylint: disable=protected-access
+        profile_type = {"cursors" : Cursor, "objects" : Object, "blobs" : Blob}[name]
+        getattr(server, name).extend(profile_type(session_id) for session_id in range(sessions))
+        def run():
+            start = time.perf_counter()
+            for _ in range(FRAMES):
+                server.send_bundle()
+            return (time.perf_counter() - start) / FRAMES
+        results[f"send_bundle/{name}/{sessions}"] = _median(run, repeat)
+    return results
+
+
+def bench_fanout(sessions :int, repeat :int, destinations :int = 8) -> dict:
+    server = TuioServer()
+    for port in range(4000, 4000 + destinations - 1):
+        server.add_destination("127.0.0.1", port)
+    server._sock = NullSocket() # pylint: disable=protected-access
+    server.cursors.extend(Cursor(session_id) for session_id in range(sessions))
+    def run():
+        start = time.perf_counter()
+        for _ in range(FRAMES):
+            server.send_bundle()
+        return (time.perf_counter() - start) / FRAMES
+    return {f"send_bundle/fanout{destinations}/{sessions}" : _median(run, repeat)}
+
+
+def bench_kinematics(sessions :int, repeat :int) -> dict:
+    server = TuioServer()
+    server._sock = NullSocket() # pylint: disable=protected-access
+    server.enable_kinematics()
+    server.blobs.extend(Blob(session_id) for session_id in range(sessions))
+    def run():
+        start = time.perf_counter()
+        for frame in range(FRAMES):
+            for blob in server.blobs:
+                blob.position = (frame / FRAMES, blob.session_id / sessions)
+            server.send_bundle()
+        return (time.perf_counter() - start) / FRAMES
+    return {f"send_bundle/kinematics/{sessions}" : _median(run, repeat)}
+
+
+def bench_spatial(sessions :int, repeat :int) -> dict:
+    cursors = _cursors(range(sessions))
+    for cursor in cursors:
+        cursor.position = (cursor.session_id * 0.618 % 1, cursor.session_id * 0.382 % 1)
+    index = GridIndex()
+    for cursor in cursors:
+        index.move(cursor)
+    points = [(i / FRAMES, 1 - i / FRAMES) for i in range(FRAMES)]
+    def scan():
+        start = time.perf_counter()
+        for x, y in points:
+            _ = [c for c in cursors
+                 if (c.position[0] - x) ** 2 + (c.position[1] - y) ** 2 <= 0.0025]
+        return (time.perf_counter() - start) / FRAMES
+    def grid():
+        start = time.perf_counter()
+        for x, y in points:
+            index.radius(x, y, 0.05)
+        return (time.perf_counter() - start) / FRAMES
+    return {
+        f"radius/scan/{sessions}" : _median(scan, repeat),
+        f"radius/grid/{sessions}" : _median(grid, repeat),
+    }
+
+
+def bench_handlers(sessions :int, churn :float, repeat :int) -> dict:
+    encoder = TuioEncoder()
+    bundles = [bytes(encoder.encode(_cursors(session_ids), [], []))
+               for session_ids in alive_sequence(sessions, churn)]
+    results = {}
+    for path in ("generic", "fast"):
+        dispatcher = TuioDispatcher()
+        if path == "fast":
+            dispatcher._decoder = TuioDecoder(dispatcher) # pylint: disable=protected-access
+        dispatcher.add_listener(NullListener())
+        def run():
+            start = time.perf_counter()
+            for bundle in bundles:
+                dispatcher.call_handlers_for_packet(bundle, ("127.0.0.1", 3333))
+            return (time.perf_counter() - start) / len(bundles)
+        results[f"handlers/{path}/{sessions}/{churn}"] = _median(run, repeat)
+    return results
+
+
+def bench_sort_and_call(sessions :int, churn :float, repeat :int) -> dict:
+    # pylint: disable=protected-access
+    sequence = alive_sequence(sessions, churn)
+    dispatcher = TuioDispatcher()
+    dispatcher.add_listener(NullListener())
+    def run():
+        sort_time = call_time = 0
+        for session_ids in sequence:
+            start = time.perf_counter()
+            dispatcher.cursors = dispatcher._sort_matchs("cursor_store", session_ids)
+            middle = time.perf_counter()
+            dispatcher._call_listener()
+            call_time += time.perf_counter() - middle
+            sort_time += middle - start
+        return sort_time / len(sequence), call_time / len(sequence)
+    timings = [run() for _ in range(repeat)]
+    return {
+        f"sort_matchs/{sessions}/{churn}"   : statistics.median(t[0] for t in timings),
+        f"call_listener/{sessions}/{churn}" : statistics.median(t[1] for t in timings),
+    }
+
+def bench_relay(sessions :int, repeat :int) -> dict:
+    encoder = TuioEncoder()
+    bundles = [bytes(encoder.encode(_cursors(session_ids), [], [], frame_id))
+               for frame_id, session_ids in enumerate(alive_sequence(sessions, 0.01), 1)]
+    results = {}
+    for name, transform in (("passthrough", None), ("transform", RelayTransform([[0.5, 0, 0.25],
+                                                                                [0, 0.5, 0.25]]))):
+        server = TuioServer()
+        server._sock = NullSocket() # pylint: disable=protected-access
+        relay = TuioRelay(("127.0.0.1", 0), server, default=transform)
+        relay.frame_sequence = None # the bundles are replayed every run
+        def run():
+            start = time.perf_counter()
+            for bundle in bundles:
+                relay.call_handlers_for_packet(bundle, ("127.0.0.1", 3333))
+            return (time.perf_counter() - start) / len(bundles)
+        results[f"relay/{name}/{sessions}"] = _median(run, repeat)
+    return results
+
+
+def run_suite(sizes, churn_rates, repeat :int) -> dict:
+    """
+    returns the seconds per operation of all cases
+    """
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for sessions in sizes:
+            results.update(bench_get_message(sessions, repeat))
+            results.update(bench_send_bundle(sessions, repeat))
+            results.update(bench_fanout(sessions, repeat))
+            results.update(bench_kinematics(sessions, repeat))
+            results.update(bench_spatial(sessions, repeat))
+            results.update(bench_relay(sessions, repeat))
+            for churn in churn_rates:
+                results.update(bench_handlers(sessions, churn, repeat))
+                results.update(bench_sort_and_call(sessions, churn, repeat))
+    return results
+
+
+def compare(results :dict, baseline :dict, threshold :float) -> list:
+    """
+    prints the ratio to the baseline and returns the names of regressed cases
+    """
+    regressions = []
+    print(f"{'case':<40} {'baseline':>12} {'now':>12} {'ratio':>7}")
+    for name, seconds in results.items():
+        if name not in baseline:
+            continue
+        ratio = seconds / baseline[name]
+        mark = ""
+        if ratio > threshold:
+            regressions.append(name)
+            mark = "  REGRESSION"
+        print(f"{name:<40} {baseline[name] * 1e6:>10.2f}us {seconds * 1e6:>10.2f}us {ratio:>6.2f}x{mark}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="up to 1000 sessions, fewer repeats")
+    parser.add_argument("--repeat", type=int, default=None)
+    parser.add_argument("--save", help="write the results as json")
+    parser.add_argument("--compare", help="json results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    sizes = SIZES[:-1] if args.quick else SIZES
+    repeat = args.repeat or (3 if args.quick else 7)
+    results = run_suite(sizes, CHURN_RATES, repeat)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=1, sort_keys=True)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+    else:
+        for name, seconds in results.items():
+            print(f"{name:<40} {seconds * 1e6:>10.2f}us")
+
+
+if __name__ == "__main__":
+    main()
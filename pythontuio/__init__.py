@@ -7,4 +7,8 @@ from pythontuio.tuio_profiles import Object
 
 from pythontuio.tuio import TuioServer
 from pythontuio.tuio import TuioClient
+from pythontuio.tuio import AsyncTuioClient
+from pythontuio.multiprocess import MultiProcessTuioClient
+from pythontuio.stream import TuioStreamClient
 from pythontuio.dispatcher import TuioListener
+from pythontuio.dispatcher import TuioFrameListener
@@ -0,0 +1,126 @@
+"""
+struct of arrays view of the TUIO sessions for vectorized consumers.
+Every profile type keeps one NumPy column per field of its set message. The
+columns are updated in place by the set handlers of the TuioDispatcher, so
+`client.arrays.blobs.x` always holds the x positions of all alive blobs.
+
+NumPy is an optional dependency, it is only needed if the arrays are enabled.
+np is None without it, the other vectorized modules import it from here.
+"""
+try:
+    import numpy as np
+except ImportError: # pragma: no cover
+    np = None
+
+from pythontuio.encoder import cursor_payload, object_payload, blob_payload
+
+# columns in the order of the set message arguments
+CURSOR_FIELDS = ("session_id", "x", "y", "vx", "vy", "motion_acceleration")
+OBJECT_FIELDS = ("session_id", "class_id", "x", "y", "angle", "vx", "vy",
+                 "velocity_rotation", "motion_acceleration", "rotation_acceleration")
+BLOB_FIELDS   = ("session_id", "x", "y", "angle", "w", "h", "area", "vx", "vy",
+                 "velocity_rotation", "motion_acceleration", "rotation_acceleration")
+
+
+class ProfileArrays:
+    """
+    columns of one profile type. Rows are kept dense: a removed session is
+    replaced by the last row, so the order of the rows is not the alive order.
+    The rows are keyed by the profile instance, so the sessions of several
+    sources share the columns even if their session ids collide.
+    The field names are attributes returning views on the first `count` rows,
+    they are invalidated if the capacity grows
+    """
+    def __init__(self, fields, payload, capacity :int = 64):
+        if np is None:
+            raise ImportError("numpy is required for the array views of pythontuio")
+        self.fields = fields
+        self._payload = payload
+        self._columns = {name : index for index, name in enumerate(fields)}
+        self._data = np.zeros((capacity, len(fields)), dtype=np.float64, order="F")
+        self._rows = {}
+        self._profiles = []
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get("_columns")
+        if columns is None or name not in columns:
+            raise AttributeError(name)
+        return self._data[:self.count, columns[name]]
+
+    @property
+    def session_ids(self):
+        """
+        returns the session ids as int64 array
+        """
+        return self._data[:self.count, 0].astype(np.int64)
+
+    @property
+    def profiles(self) -> list:
+        """
+        returns the profiles in the order of the rows
+        """
+        return list(self._profiles)
+
+    def row(self, profile) -> int:
+        """
+        returns the row of the profile or None
+        """
+        return self._rows.get(profile)
+
+    def add(self, profile):
+        """
+        adds a row with the current values of the profile
+        """
+        if profile in self._rows:
+            return
+        if self.count == len(self._data):
+            data = np.zeros((2 * len(self._data), len(self.fields)), dtype=np.float64, order="F")
+            data[:self.count] = self._data
+            self._data = data
+        self._data[self.count] = self._payload(profile)
+        self._rows[profile] = self.count
+        self._profiles.append(profile)
+        self.count += 1
+
+    def remove(self, profile):
+        """
+        removes the row of the profile by moving the last row into its place
+        """
+        row = self._rows.pop(profile, None)
+        if row is None:
+            return
+        last = self._profiles.pop()
+        if last is not profile:
+            self._data[row] = self._data[self.count - 1]
+            self._profiles[row] = last
+            self._rows[last] = row
+        self.count -= 1
+
+    def set(self, profile, values):
+        """
+        writes the arguments of a set message into the row of the profile
+        """
+        row = self._rows.get(profile)
+        if row is not None:
+            self._data[row] = values
+
+    def snapshot(self) -> dict:
+        """
+        returns a copy of all columns, e.g. to hand a frame to another thread
+        """
+        data = self._data[:self.count].copy(order="F")
+        return {name : data[:, index] for name, index in self._columns.items()}
+
+
+class TuioArrays:
+    """
+    array views of cursors, objects and blobs
+    """
+    def __init__(self):
+        self.cursors = ProfileArrays(CURSOR_FIELDS, cursor_payload)
+        self.objects = ProfileArrays(OBJECT_FIELDS, object_payload)
+        self.blobs   = ProfileArrays(BLOB_FIELDS, blob_payload)
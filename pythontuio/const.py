@@ -10,3 +10,12 @@ TUIO_ALIVE = "alive"
 TUIO_SET =  "set"
 TUIO_END = "fseq"
 TUIO_SOURCE = "source"
+
+UDP_MAX_DATAGRAM = 65507    # biggest UDP payload over IPv4
+
+# TUIO 2.0
+TUIO2_FRAME   = "/tuio2/frm"
+TUIO2_POINTER = "/tuio2/ptr"
+TUIO2_TOKEN   = "/tuio2/tok"
+TUIO2_BOUNDS  = "/tuio2/bnd"
+TUIO2_ALIVE   = "/tuio2/alv"
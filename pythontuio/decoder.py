@@ -0,0 +1,138 @@
+"""
+fast path decoder for TUIO 1.1 bundles.
+The fixed layouts of the 2Dcur, 2Dobj and 2Dblb set messages are unpacked
+with precompiled struct formats directly from the datagram and written into
+the session stores of the TuioDispatcher. alive, fseq and source messages are
+parsed without building OscMessage objects. Everything else is handed to the
+generic python-osc path of the dispatcher.
+
+Notice that the timetag of a bundle is ignored, TUIO bundles are always
+processed immediately.
+"""
+import struct
+
+from pythonosc.osc_message import OscMessage, ParseError
+
+from pythontuio.const import TUIO_BLOB, TUIO_CURSOR, TUIO_OBJECT
+from pythontuio.osc_layout import BUNDLE_PREFIX, BUNDLE_HEADER_SIZE
+from pythontuio.osc_layout import CURSOR_SET_TAGS, OBJECT_SET_TAGS, BLOB_SET_TAGS
+from pythontuio.osc_layout import read_string, set_header
+
+_INT = struct.Struct(">i")
+
+_ARG_FORMATS = {
+    "i" : (">i", 4),
+    "f" : (">f", 4),
+}
+
+
+class _SetLayout:
+    """
+    precompiled layout of a TUIO set message
+    """
+    def __init__(self, address, type_tags, handler):
+        self.header = set_header(address, type_tags)
+        self.struct = struct.Struct(">" + type_tags[2:])
+        self.size = len(self.header) + self.struct.size
+        self.handler = handler
+
+
+class TuioDecoder:
+    """
+    decodes TUIO 1.1 datagrams without the address pattern dispatch of python-osc
+    and updates the state of the given TuioDispatcher
+    """
+    def __init__(self, dispatcher):
+        self._dispatcher = dispatcher
+        layouts = [
+            _SetLayout(TUIO_CURSOR, CURSOR_SET_TAGS, dispatcher._set_cursor),
+            _SetLayout(TUIO_OBJECT, OBJECT_SET_TAGS, dispatcher._set_object),
+            _SetLayout(TUIO_BLOB,   BLOB_SET_TAGS,   dispatcher._set_blob),
+        ]
+        self._set_layouts = {layout.size : layout for layout in layouts}
+        self._profile_handlers = {
+            TUIO_CURSOR : dispatcher._cursor_handler,
+            TUIO_OBJECT : dispatcher._object_handler,
+            TUIO_BLOB   : dispatcher._blob_handler,
+        }
+        self.fallback_messages = 0
+
+    def decode(self, data, client_address) -> list:
+        """
+        decodes a OSC bundle or message and applies it to the dispatcher.
+        Malformed packets are dropped like python-osc does.
+        """
+        try:
+            if data.startswith(BUNDLE_PREFIX):
+                self._decode_bundle(data, 0, len(data), client_address)
+            else:
+                self._decode_message(data, 0, len(data), client_address)
+        except (struct.error, ValueError, IndexError, UnicodeDecodeError, ParseError):
+            pass
+        return []
+
+    def _decode_bundle(self, data, start, end, client_address):
+        index = start + BUNDLE_HEADER_SIZE
+        set_layouts = self._set_layouts
+        while index < end:
+            size, = _INT.unpack_from(data, index)
+            index += 4
+            element_end = index + size
+            if element_end > end:
+                raise ValueError("bundle element exceeds the datagram")
+
+            layout = set_layouts.get(size)
+            if layout is not None and data.startswith(layout.header, index):
+                layout.handler(layout.struct.unpack_from(data, index + len(layout.header)))
+            elif data.startswith(BUNDLE_PREFIX, index):
+                self._decode_bundle(data, index, element_end, client_address)
+            else:
+                self._decode_message(data, index, element_end, client_address)
+            index = element_end
+
+    def _decode_message(self, data, start, end, client_address):
+        address, index = read_string(data, start)
+        handler = self._profile_handlers.get(address)
+        if handler is not None and data.startswith(b",s", index):
+            type_tags, index = read_string(data, index)
+            args = self._read_args(data, index, end, type_tags)
+            if args is not None:
+                handler(address, *args)
+                return
+        self._fallback(data[start:end], client_address)
+
+    def _read_args(self, data, index, end, type_tags):
+        """
+        reads the TUIO type string followed by string, int and float arguments.
+        returns None for other types
+        """
+        ttype, index = read_string(data, index)
+        args = [ttype]
+        tags = type_tags[2:]
+        if tags.count("i") == len(tags): # alive and fseq, read all ids at once
+            if index + 4 * len(tags) > end:
+                raise ValueError("message arguments exceed the element")
+            args.extend(struct.unpack_from(f">{len(tags)}i", data, index))
+            return args
+        for tag in tags:
+            if tag == "s":
+                value, index = read_string(data, index)
+            elif tag in _ARG_FORMATS:
+                fmt, size = _ARG_FORMATS[tag]
+                value, = struct.unpack_from(fmt, data, index)
+                index += size
+            else:
+                return None
+            args.append(value)
+        if index > end:
+            raise ValueError("message arguments exceed the element")
+        return args
+
+    def _fallback(self, message_data, client_address):
+        """
+        hands messages the decoder does not know to the generic python-osc path
+        """
+        self.fallback_messages += 1
+        message = OscMessage(bytes(message_data))
+        for handler in self._dispatcher.handlers_for_address(message.address):
+            handler.invoke(client_address, message)
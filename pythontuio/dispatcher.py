@@ -2,14 +2,36 @@
 classes to handle incoming osc messages
 """
 from abc import ABC # abstract base class of python
-from typing import List
+from itertools import chain
+import threading
+import time as _time
+import traceback
+from typing import Dict, List
 from pythonosc.dispatcher import Dispatcher
 
 from pythontuio.tuio_profiles import Cursor, Blob, Object
 from pythontuio.tuio_profiles import TUIO_BLOB, TUIO_CURSOR, TUIO_OBJECT
+from pythontuio.session import SessionStore, SourceSessions, ProfilePool
+from pythontuio.frame_queue import FrameQueue
+from pythontuio.arrays import TuioArrays
+from pythontuio.sequence import FrameSequence, read_frame_header
+from pythontuio.recording import TuioRecorder
+from pythontuio.metrics import TuioMetrics
+from pythontuio.filters import TuioFilter
+from pythontuio.spatial import SpatialIndex, ENTER
 
 from pythontuio.const import TUIO_END,TUIO_ALIVE,TUIO_SET, TUIO_SOURCE
+from pythontuio.const import TUIO2_FRAME, TUIO2_POINTER, TUIO2_TOKEN, TUIO2_BOUNDS, TUIO2_ALIVE
+from pythontuio.tuio2 import pointer_set_args, token_set_args, bounds_set_args, unix_time
 
+# event categories of a frame, the profile events are keyed with their profile type
+ADD     = "add"
+UPDATE  = "update"
+REMOVE  = "remove"
+REGION  = "region"
+REFRESH = "refresh"
+ALL_EVENTS = frozenset([(kind, profile_type) for kind in (ADD, UPDATE, REMOVE)
+                        for profile_type in (Cursor, Object, Blob)] + [REGION, REFRESH])
 
 
 # pylint: disable=unnecessary-pass
@@ -46,6 +68,12 @@ class TuioListener(ABC):
     def remove_tuio_blob(self, blob):
         """Abstract function to add a behavior for tuio remove blob event"""
         pass
+    def enter_tuio_region(self, profile, region):
+        """Abstract function to add a behavior for a profile entering a spatial index region"""
+        pass
+    def leave_tuio_region(self, profile, region):
+        """Abstract function to add a behavior for a profile leaving a spatial index region"""
+        pass
     def refresh(self, time):
         """Abstract This callback method is invoked by the TuioClient
         to mark the end of a received TUIO message bundle."""
@@ -53,9 +81,219 @@ class TuioListener(ABC):
 # pylint: enable=unnecessary-pass
 
 
-class TuioDispatcher(Dispatcher):
+class TuioFrameListener(ABC):
+    """
+    listener which gets every completed frame at once with its events partitioned
+    by profile type, see TuioFrame.events. subscriptions holds the event categories
+    it reads, a frame without any of them is skipped unless REFRESH is subscribed
+    """
+    subscriptions = ALL_EVENTS
+
+    @property
+    def name(self) -> str:
+        """
+        name of the listener in the metrics
+        """
+        return type(self).__name__
+
+    def on_frame(self, frame):
+        """Abstract function to handle a completed frame"""
+
+    def wants(self, frame) -> bool:
+        """
+        True if the frame has events the listener subscribed to
+        """
+        subscriptions = self.subscriptions
+        return REFRESH in subscriptions or not subscriptions.isdisjoint(frame.tables())
+
+    def callbacks(self, frame):
+        """
+        generator which handles the frame and yields the results of the calls,
+        the AsyncTuioClient awaits them
+        """
+        yield self.on_frame(frame)
+
+
+# per profile callbacks of a TuioListener in the order they are called
+_PROFILE_CALLBACKS = (
+    ((ADD, Cursor), "add_tuio_cursor"), ((ADD, Object), "add_tuio_object"),
+    ((ADD, Blob), "add_tuio_blob"),
+    ((UPDATE, Cursor), "update_tuio_cursor"), ((UPDATE, Object), "update_tuio_object"),
+    ((UPDATE, Blob), "update_tuio_blob"),
+    ((REMOVE, Cursor), "remove_tuio_cursor"), ((REMOVE, Object), "remove_tuio_object"),
+    ((REMOVE, Blob), "remove_tuio_blob"),
+)
+
+
+def _overrides(listener :TuioListener, name :str) -> bool:
+    """
+    True if the listener replaced the empty callback of TuioListener, by
+    subclassing or by assigning a function to the instance
+    """
+    callback = getattr(listener, name, None)
+    if callback is None:
+        return False
+    return getattr(callback, "__func__", callback) is not getattr(TuioListener, name)
+
+
+def _override(listener :TuioListener, name :str):
+    """
+    returns the callback of the listener if it overrides the one of TuioListener, otherwise None
+    """
+    return getattr(listener, name) if _overrides(listener, name) else None
+
+
+class ListenerAdapter(TuioFrameListener):
+    """
+    calls the per profile callbacks of a TuioListener for a frame. Only the
+    callbacks the listener overrides are subscribed, the others cost nothing.
+    The callbacks are looked up when the adapter is created
+    """
+    def __init__(self, listener :TuioListener):
+        self.listener = listener
+        self._callbacks = [(category, getattr(listener, name))
+                           for category, name in _PROFILE_CALLBACKS if _overrides(listener, name)]
+        self._enter = _override(listener, "enter_tuio_region")
+        self._leave = _override(listener, "leave_tuio_region")
+        self._refresh = _override(listener, "refresh")
+        subscriptions = {category for category, _ in self._callbacks}
+        if self._enter is not None or self._leave is not None:
+            subscriptions.add(REGION)
+        if self._refresh is not None:
+            subscriptions.add(REFRESH)
+        self.subscriptions = frozenset(subscriptions)
+
+    @property
+    def name(self) -> str:
+        return type(self.listener).__name__
+
+    def on_frame(self, frame):
+        for _ in self.callbacks(frame):
+            pass
+
+    def callbacks(self, frame):
+        tables = frame.tables()
+        for category, callback in self._callbacks:
+            for profile in tables.get(category, ()):
+                yield callback(profile)
+        if REGION in self.subscriptions:
+            for kind, profile, region in frame.regions:
+                callback = self._enter if kind == ENTER else self._leave
+                if callback is not None:
+                    yield callback(profile, region)
+        if self._refresh is not None:
+            yield self._refresh(frame.time)
+
+
+class TuioFrame:
+    """
+    events of one completed TUIO frame. The profiles are the live instances
+    of the dispatcher, so they show the latest state. regions holds the
+    (kind, profile, region) events of the spatial index
+    """
+    def __init__(self, added, updated, removed, frame_id :int = -1, time :float = 0):
+        self.added   : list = added
+        self.updated : list = updated
+        self.removed : list = removed
+        self.regions : list = []
+        self.frame_id = frame_id
+        self.time = time
+        self._tables : dict = None
+
+    def tables(self) -> dict:
+        """
+        returns the events partitioned into lists keyed by (ADD, Cursor),
+        (UPDATE, Object), ... and REGION. Computed once and shared by all listeners
+        """
+        tables = self._tables
+        if tables is None:
+            tables = {}
+            for kind, profiles in ((ADD, self.added), (UPDATE, self.updated),
+                                   (REMOVE, self.removed)):
+                for profile in profiles:
+                    key = (kind, type(profile))
+                    table = tables.get(key)
+                    if table is None:
+                        table = tables[key] = []
+                    table.append(profile)
+            if self.regions:
+                tables[REGION] = self.regions
+            self._tables = tables
+        return tables
+
+    def events(self, kind :str, profile_type) -> list:
+        """
+        returns the profiles of profile_type with the event kind ADD, UPDATE or REMOVE
+        """
+        return self.tables().get((kind, profile_type), [])
+
+    def can_merge(self, frame) -> bool:
+        """
+        False if the newer frame adds a session id this frame removes. Merged,
+        the add would be delivered before the remove of the old session
+        """
+        if not self.removed or not frame.added:
+            return True
+        removed = {(type(p), p.session_id) for p in self.removed}
+        return not any((type(p), p.session_id) in removed for p in frame.added)
+
+    def merge(self, frame) -> int:
+        """
+        merges the events of the newer frame into this one. All adds and removes
+        are kept, an update is dropped if the session is updated again or was
+        added in this frame. Returns the number of dropped updates
+        """
+        newer_updates = set(frame.updated)
+        updated = [p for p in self.updated if p not in newer_updates]
+        merged = len(self.updated) - len(updated)
+        added = set(self.added)
+        for profile in frame.updated:
+            if profile in added:
+                merged += 1
+            else:
+                updated.append(profile)
+
+        self.added.extend(frame.added)
+        self.updated = updated
+        self.removed.extend(frame.removed)
+        self.regions.extend(frame.regions)
+        self.frame_id = frame.frame_id
+        self.time = frame.time
+        self._tables = None
+        return merged
+
+    def collapse(self, frame):
+        """
+        merges the newer frame into this one so that only the net changes remain.
+        A session added and removed within both frames disappears, a session
+        removed in the newer frame gets no update. Check can_merge before
+        """
+        added = set(self.added)
+        gone = set(frame.removed)
+        if gone:
+            self.added = [p for p in self.added if p not in gone]
+            self.updated = [p for p in self.updated if p not in gone]
+            self.removed.extend(p for p in frame.removed if p not in added)
+        updated = set(self.updated)
+        self.updated.extend(p for p in frame.updated if p not in added and p not in updated)
+        self.added.extend(frame.added)
+        self.regions.extend(frame.regions)
+        self.frame_id = frame.frame_id
+        self.time = frame.time
+        self._tables = None
+
+
+class TuioDispatcher(Dispatcher): # pylint: disable=too-many-instance-attributes
+    # pylint: disable=too-many-public-methods
     """
     class to hold Eventlistener and the TuioCursors, TuioBlobs, and TuioObjects
+
+    Every source has its own session ids and alive diff, see sources. A source is
+    identified by the name@address of its source messages or, without them, by the
+    (ip, port) of the sender. A name without address is extended by the address of
+    the sender. cursors, objects and blobs are merged over all sources.
+    A sender without source message which was idle for source_timeout seconds
+    is removed, e.g. a tracker which restarted on another port
     """
     def __init__(self):
         super().__init__()
@@ -63,16 +301,37 @@ class TuioDispatcher(Dispatcher):
         self.objects : List(Object) = []
         self.blobs   : List(Blob) = []
         self._listener : list = []
+        self._decoder = None
         self.map(f"{TUIO_CURSOR}*", self._cursor_handler)
         self.map(f"{TUIO_OBJECT}*", self._object_handler)
         self.map(f"{TUIO_BLOB}*", self._blob_handler)
+        self.map("/tuio2/*", self._tuio2_handler)
         self.set_default_handler(self._default_handler)
 
         self._to_delete = []
         self._to_add    = []
         self._to_update = []
-
-    def _cursor_handler(self, address, *args):
+        self._frame_queue : FrameQueue = None
+        self._merged_updates = 0    # of the queues of earlier enable_queued_dispatch calls
+        self._dispatch_worker : threading.Thread = None
+        self.arrays : TuioArrays = None
+        self._pools : dict = None
+        self.frame_sequence = FrameSequence()   # None disables the fseq ordering
+        self.recorder : TuioRecorder = None
+        self.metrics : TuioMetrics = None
+        self.position_filter : TuioFilter = None
+        self.spatial_index : SpatialIndex = None
+        self._nested_time = 0.0     # diff and listener time of the current packet
+        self._holding = False       # frames are collapsed into _held instead of dispatched
+        self._held : TuioFrame = None
+        self.collapsed_frames = 0
+        self.sources : Dict[object, SourceSessions] = {}
+        self.source_timeout : float = 2.0   # None keeps idle senders without source message
+        self._sender = None         # address of the packet which is handled
+        self._expired_at = 0.0
+        self._source : SourceSessions = self._select_source(None)
+
+    def _cursor_handler(self, _address, *args):
         """
         callback to convert OSC message into TUIO Cursor
         """
@@ -81,31 +340,23 @@ class TuioDispatcher(Dispatcher):
         ttype = args[0]
         args = list(args[1:])
         if ttype == TUIO_SOURCE:
-            pass
-            #print(f"Message by {args} reveiced")
+            self._select_source(self._named_source(args[0]))
         elif ttype == TUIO_ALIVE :
-            cursors = self.cursors.copy()
-            self.cursors = self._sort_matchs(cursors, args, Cursor)
+            self.cursors = self._sort_matchs("cursor_store", args)
 
         elif ttype == TUIO_SET:
-            for cursor in self.cursors:
-                if cursor.session_id != args[0]:
-                    continue
-                cursor.position = (args[1], args[2])
-                cursor.velocity = (args[3], args[4])
-                cursor.motion_acceleration = args[5]
+            self._set_cursor(args)
 
 
         elif ttype == TUIO_END:
-            self._call_listener()
-            print(f"Bundle recived with {address}:{ttype} {args}")
+            self._end_frame(args)
 
 
         else:
             raise Exception("Broken TUIO Package")
 
 
-    def _object_handler(self, address, *args):
+    def _object_handler(self, _address, *args):
         """
         callback to convert OSC message into TUIO Object
         """
@@ -114,32 +365,20 @@ class TuioDispatcher(Dispatcher):
         ttype = args[0]
         args = list(args[1:])
         if ttype == TUIO_SOURCE:
-            #print(f"Message by {args} reveiced")
-            pass
+            self._select_source(self._named_source(args[0]))
         elif ttype == TUIO_ALIVE :
-            objects = self.objects.copy()
-            self.objects = self._sort_matchs(objects, args, Object)
+            self.objects = self._sort_matchs("object_store", args)
 
         elif ttype == TUIO_SET:
-            for obj in self.objects:
-                if obj.session_id != args[0]:
-                    continue
-                obj.class_id               = args[1]                # i
-                obj.position               = (args[2], args[3])     # x,y
-                obj.angle                  = args[4]                # a
-                obj.velocity               = (args[5], args[6])     # X,Y
-                obj.velocity_rotation      = args[7]                # A
-                obj.motion_acceleration    = args[8]                # m
-                obj.rotation_acceleration  = args[9]                # r
+            self._set_object(args)
 
 
         elif ttype == TUIO_END:
-            self._call_listener()
-            print(f"Bundle recived with {address}:{ttype} {args}")
+            self._end_frame(args)
         else:
             raise Exception("Broken TUIO Package")
 
-    def _blob_handler(self, address, *args):
+    def _blob_handler(self, _address, *args):
         """
         callback to convert OSC message into TUIO Blob
          """
@@ -149,75 +388,547 @@ class TuioDispatcher(Dispatcher):
         ttype = args[0]
         args = list(args[1:])
         if ttype == TUIO_SOURCE:
-            pass
+            self._select_source(self._named_source(args[0]))
         elif ttype == TUIO_ALIVE :
-            blobs = self.blobs.copy()
-            self.blobs = self._sort_matchs(blobs, args, Blob)
+            self.blobs = self._sort_matchs("blob_store", args)
 
         elif ttype == TUIO_SET:
-            for blob in self.blobs:
-                if blob.session_id != args[0]:
-                    continue
-                blob.position               = (args[1], args[2])     # x,y
-                blob.angle                  = args[3]                # a
-                blob.dimension              = (args[4], args[5])     # w, h
-                blob.area                   = args[6]                # f
-                blob.velocity               = (args[7], args[8])     # X,Y
-                blob.velocity_rotation      = args[9]                # A
-                blob.motion_acceleration    = args[10]               # m
-                blob.rotation_acceleration  = args[11]               # r
+            self._set_blob(args)
 
 
         elif ttype == TUIO_END:
-            self._call_listener()
-            print(f"Bundle recived with {address}:{ttype} {args}")
+            self._end_frame(args)
         else:
             raise Exception("Broken TUIO Package")
 
-    def _call_listener(self):    # pylint: disable=R0912 
-        for listner in self._listener:
-            for profile in self._to_add:
-                if  isinstance(profile, Cursor) :
-                    listner.add_tuio_cursor(profile)
-                elif isinstance(profile, Object) :
-                    listner.add_tuio_object(profile)
-                elif isinstance(profile, Blob) :
-                    listner.add_tuio_blob(profile)
-
-            for profile in self._to_update:
-                if  isinstance(profile, Cursor) :
-                    listner.update_tuio_cursor(profile)
-                elif isinstance(profile, Object) :
-                    listner.update_tuio_object(profile)
-                elif isinstance(profile, Blob) :
-                    listner.update_tuio_blob(profile)
-
-
-            for profile in self._to_delete:
-                if  isinstance(profile, Cursor) :
-                    listner.remove_tuio_cursor(profile)
-                elif isinstance(profile, Object) :
-                    listner.remove_tuio_object(profile)
-                elif isinstance(profile, Blob) :
-                    listner.remove_tuio_blob(profile)
-
-            listner.refresh(0) # TODO implement time conzept pylint
-            self._to_add    = []
-            self._to_update = []
-            self._to_delete = []
+    def _tuio2_handler(self, address, *args):
+        """
+        callback of the TUIO 2.0 messages. The component messages are buffered
+        until the alv message, which ends the frame
+        """
+        if address == TUIO2_FRAME:
+            sessions = self._source
+            if len(args) > 3:
+                sessions = self._select_source(self._named_source(args[3]))
+            sessions.frame_id = args[0]
+            sessions.frame_time = unix_time(args[1])
+            sessions.components.clear()
+        elif address == TUIO2_POINTER:
+            self._buffer_component("cursor_store", pointer_set_args(args))
+        elif address == TUIO2_TOKEN:
+            self._buffer_component("object_store", token_set_args(args))
+        elif address == TUIO2_BOUNDS:
+            self._buffer_component("blob_store", bounds_set_args(args))
+        elif address == TUIO2_ALIVE:
+            self._end_tuio2_frame(args)
+
+    def _buffer_component(self, store_name :str, set_args :list):
+        sessions = self._source
+        sessions.session_types[set_args[0]] = store_name
+        sessions.components.append((store_name, set_args))
+
+    def _end_tuio2_frame(self, session_ids):
+        """
+        splits the single alive of a TUIO 2.0 frame by profile type, applies the
+        buffered components and calls the listeners
+        """
+        sessions = self._source
+        types = sessions.session_types
+        alive = {"cursor_store" : [], "object_store" : [], "blob_store" : []}
+        for session_id in session_ids:
+            store_name = types.get(session_id)
+            if store_name is not None: # sessions without component message are unknown
+                alive[store_name].append(session_id)
+        self.cursors = self._sort_matchs("cursor_store", alive["cursor_store"])
+        self.objects = self._sort_matchs("object_store", alive["object_store"])
+        self.blobs   = self._sort_matchs("blob_store",   alive["blob_store"])
+        if len(types) > len(session_ids):
+            alive = set(session_ids)
+            sessions.session_types = {i : t for i, t in types.items() if i in alive}
+
+        setters = {"cursor_store" : self._set_cursor, "object_store" : self._set_object,
+                   "blob_store" : self._set_blob}
+        for store_name, set_args in sessions.components:
+            setters[store_name](set_args)
+        sessions.components.clear()
+        self._call_listener(sessions.frame_id, sessions.frame_time)
+
+    def _set_cursor(self, args):
+        """
+        applies the arguments of a cursor set message (without "set")
+        """
+        store = self._source.cursor_store
+        cursor = store.get(args[0])
+        if cursor is not None:
+            cursor.position = (args[1], args[2])
+            cursor.velocity = (args[3], args[4])
+            cursor.motion_acceleration = args[5]
+            if store.arrays is not None:
+                store.arrays.set(cursor, args)
+            if self.spatial_index is not None and self.position_filter is None:
+                self.spatial_index.move(cursor)
+
+    def _set_object(self, args):
+        """
+        applies the arguments of a object set message (without "set")
+        """
+        store = self._source.object_store
+        obj = store.get(args[0])
+        if obj is not None:
+            obj.class_id               = args[1]                # i
+            obj.position               = (args[2], args[3])     # x,y
+            obj.angle                  = args[4]                # a
+            obj.velocity               = (args[5], args[6])     # X,Y
+            obj.velocity_rotation      = args[7]                # A
+            obj.motion_acceleration    = args[8]                # m
+            obj.rotation_acceleration  = args[9]                # r
+            if store.arrays is not None:
+                store.arrays.set(obj, args)
+            if self.spatial_index is not None and self.position_filter is None:
+                self.spatial_index.move(obj)
+
+    def _set_blob(self, args):
+        """
+        applies the arguments of a blob set message (without "set")
+        """
+        store = self._source.blob_store
+        blob = store.get(args[0])
+        if blob is not None:
+            blob.position               = (args[1], args[2])     # x,y
+            blob.angle                  = args[3]                # a
+            blob.dimension              = (args[4], args[5])     # w, h
+            blob.area                   = args[6]                # f
+            blob.velocity               = (args[7], args[8])     # X,Y
+            blob.velocity_rotation      = args[9]                # A
+            blob.motion_acceleration    = args[10]               # m
+            blob.rotation_acceleration  = args[11]               # r
+            if store.arrays is not None:
+                store.arrays.set(blob, args)
+            if self.spatial_index is not None and self.position_filter is None:
+                self.spatial_index.move(blob)
+
+    def _end_frame(self, args):
+        """
+        handles the fseq message. A second argument counts the fragments of the
+        frame which still follow, the listeners are called after the last one
+        """
+        if len(args) > 1 and args[1] > 0:
+            self._source.partial_frame = True
+            return
+        self._source.partial_frame = False
+        self._call_listener(args[0] if args else -1)
+
+    def call_handlers_for_packet(self, data, client_address):
+        """
+        decodes the OSC packet and invokes the handlers of its messages.
+        Uses the fast TuioDecoder if one is set, otherwise the generic path of python-osc.
+        Bundles whose fseq is older than the last frame of their source are dropped
+        before any message is applied, see frame_sequence
+        """
+        metrics = self.metrics
+        if metrics is None:
+            return self._handle_packet(data, client_address)
+        metrics.inc("packets_total")
+        metrics.inc("bytes_total", len(data))
+        self._nested_time = 0.0
+        start = metrics.clock()
+        results = self._handle_packet(data, client_address)
+        metrics.observe("decode_seconds", metrics.clock() - start - self._nested_time)
+        return results
+
+    def _handle_packet(self, data, client_address):
+        if self.recorder is not None:
+            self.recorder.record(data, client_address)
+        source, frame_id, remaining, profile = read_frame_header(data) or (None, -1, 0, None)
+        self._sender = client_address
+        if source is None:
+            source = self._address_source(client_address)
+        else:
+            source = self._named_source(source)
+        sequence = self.frame_sequence
+        if sequence is not None and not sequence.accept(source, frame_id, remaining, profile):
+            return []
+        self._receive_source(source)
+        if self._decoder is not None:
+            return self._decoder.decode(data, client_address)
+        return super().call_handlers_for_packet(data, client_address)
+
+    @staticmethod
+    def _address_source(client_address):
+        """
+        returns the source of a sender without source message, its (ip, port).
+        Several trackers on one host are kept apart by their ports
+        """
+        return None if client_address is None else tuple(client_address[:2])
+
+    def _named_source(self, name :str):
+        """
+        returns the source of a source message. A name without address part,
+        like the default of all TUIO 2.0 servers, gets the address of its sender
+        """
+        sender = self._sender
+        if sender is None or "@" in name:
+            return name
+        return f"{name}@{sender[0]}:{sender[1]}"
+
+    def _receive_source(self, source) -> SourceSessions:
+        """
+        selects the source of a received packet and removes the idle senders
+        """
+        if self.source_timeout is None:
+            return self._select_source(source)
+        now = _time.monotonic()
+        if now - self._expired_at > self.source_timeout:
+            self._expire_sources(now)
+        sessions = self._select_source(source)
+        sessions.last_packet = now
+        return sessions
+
+    def _expire_sources(self, now :float):
+        """
+        removes the senders without source message which sent nothing for
+        source_timeout seconds. A restarted sender comes back on another port,
+        its old sessions are removed with this
+        """
+        self._expired_at = now
+        for source, sessions in list(self.sources.items()):
+            if isinstance(source, tuple) and now - sessions.last_packet > self.source_timeout:
+                self.remove_source(source)
+
+    def _select_source(self, source) -> SourceSessions:
+        """
+        makes the sessions of the source the target of the following messages.
+        The stores of a new source share the pools and arrays of the dispatcher
+        """
+        sessions = self.sources.get(source)
+        if sessions is None:
+            sessions = SourceSessions(source)
+            for store in sessions.stores:
+                if self._pools is not None:
+                    store.pool = self._pools[store.profile_type]
+            if self.arrays is not None:
+                for store, arrays in zip(sessions.stores, (self.arrays.cursors, self.arrays.objects,
+                                                           self.arrays.blobs)):
+                    store.arrays = arrays
+            self.sources[source] = sessions
+        self._source = sessions
+        return sessions
+
+    def remove_source(self, source):
+        """
+        removes all sessions of the source, e.g. after its tracker was shut down.
+        The listeners get the remove events with the next frame
+        """
+        sessions = self.sources.pop(source, None)
+        if sessions is None:
+            return
+        for store in sessions.stores:
+            _, _, removed = store.alive([])
+            self._to_delete.extend(removed)
+            self._unindex(removed)
+        if self.frame_sequence is not None:
+            self.frame_sequence.reset(source)
+        if self.position_filter is not None:
+            self.position_filter.remove(source)
+        self._select_source(None)   # the frame of the removal does not step the other sources
+        self.cursors = self._merged("cursor_store")
+        self.objects = self._merged("object_store")
+        self.blobs   = self._merged("blob_store")
+        self._call_listener()
+
+    def _merged(self, store_name :str) -> list:
+        """
+        returns the alive profiles of all sources. With only one source sending
+        its list is used as it is
+        """
+        profiles = [getattr(sessions, store_name).profiles for sessions in self.sources.values()]
+        profiles = [alive for alive in profiles if alive]
+        if len(profiles) == 1:
+            return profiles[0]
+        return list(chain.from_iterable(profiles))
 
+    def _call_listener(self, frame_id :int = -1, time :float = 0):
+        """
+        completes the current frame and hands it to the listeners
+        """
+        spatial_index = self.spatial_index
+        if self.position_filter is not None: # only the source of the frame is filtered
+            sessions = self._source
+            cursors, objects, blobs = (store.profiles for store in sessions.stores)
+            self.position_filter.update(cursors, objects, blobs, source=sessions.source)
+            if spatial_index is not None: # the index only sees the filtered positions
+                for profile in chain(cursors, objects, blobs):
+                    spatial_index.move(profile)
+        frame = TuioFrame(self._to_add, self._to_update, self._to_delete, frame_id, time)
+        if spatial_index is not None:
+            frame.regions = spatial_index.pop_events()
+        self._to_add    = []
+        self._to_update = []
+        self._to_delete = []
+        if self._holding:
+            frame = self._hold(frame)
+            if frame is None:
+                return
+        self._deliver(frame)
+
+    def _deliver(self, frame :TuioFrame):
+        metrics = self.metrics
+        if metrics is None:
+            self._dispatch(frame)
+            return
+        metrics.inc("frames_total")
+        start = metrics.clock()
+        self._dispatch(frame)
+        self._nested_time += metrics.clock() - start
+
+    def _hold(self, frame :TuioFrame) -> TuioFrame:
+        """
+        collapses the frame into the held one. returns the held frame if both
+        can not be collapsed, because a session id is removed and added again
+        """
+        held = self._held
+        if held is None:
+            self._held = frame
+            return None
+        if held.can_merge(frame):
+            held.collapse(frame)
+            self.collapsed_frames += 1
+            if self.metrics is not None:
+                self.metrics.inc("collapsed_frames_total")
+            return None
+        self._held = frame
+        return held
+
+    def hold_frames(self):
+        """
+        collapses all following frames into one until release_frames is called.
+        The listeners then get the net events relative to the last delivered frame
+        """
+        self._holding = True
+
+    def release_frames(self):
+        """
+        delivers the frame collapsed since hold_frames
+        """
+        self._holding = False
+        held, self._held = self._held, None
+        if held is not None:
+            self._deliver(held)
+
+    def _dispatch(self, frame :TuioFrame):
+        """
+        calls the callbacks of all listeners for the frame, or queues the frame
+        for the dispatch worker
+        """
+        if self._frame_queue is not None:
+            self._frame_queue.put(frame)
+            return
+        self._notify_listeners(frame)
+
+    def _notify_listeners(self, frame :TuioFrame):
+        metrics = self.metrics
+        for listener in self._listener:
+            if not listener.wants(frame):
+                continue
+            if metrics is None:
+                listener.on_frame(frame)
+                continue
+            start = metrics.clock()
+            listener.on_frame(frame)
+            metrics.observe("listener_seconds", metrics.clock() - start,
+                            (("listener", listener.name),))
+        self._release_removed(frame)
+
+    def _release_removed(self, frame :TuioFrame):
+        """
+        hands the removed profiles of a delivered frame back to the profile pools
+        """
+        if self._pools is None or not frame.removed:
+            return
+        for profile in frame.removed:
+            self._pools[type(profile)].release(profile)
+
+    def enable_profile_pool(self, max_size :int = 1024):
+        """
+        recycles the profiles of removed sessions for new sessions. A removed
+        profile is reused after its remove callbacks ran, so listeners must not
+        keep references to removed profiles
+        """
+        if self._pools is not None:
+            return
+        self._pools = {profile_type : ProfilePool(profile_type, max_size)
+                       for profile_type in (Cursor, Object, Blob)}
+        for sessions in self.sources.values():
+            for store in sessions.stores:
+                store.pool = self._pools[store.profile_type]
+
+    def enable_arrays(self) -> TuioArrays:
+        """
+        keeps NumPy columns of all sessions in self.arrays, updated in place by
+        the set messages. Requires numpy
+        """
+        if self.arrays is None:
+            self.arrays = TuioArrays()
+            for sessions in self.sources.values():
+                for store, arrays in zip(sessions.stores, (self.arrays.cursors, self.arrays.objects,
+                                                           self.arrays.blobs)):
+                    for profile in store.profiles:
+                        arrays.add(profile)
+                    store.arrays = arrays
+        return self.arrays
+
+    def enable_filter(self, method=None, prediction :float = 0.0) -> TuioFilter:
+        """
+        smooths the positions of all sessions with method, a OneEuroFilter or
+        KalmanFilter, and moves them prediction seconds ahead before the listeners
+        are called. Requires numpy
+        """
+        self.position_filter = TuioFilter(method, prediction)
+        return self.position_filter
+
+    def disable_filter(self):
+        """
+        stops filtering, the positions of the next set messages are passed on as they are
+        """
+        self.position_filter = None
+
+    def enable_spatial_index(self, cells :int = 32) -> SpatialIndex:
+        """
+        keeps the sessions in a grid of cells x cells over the normalized
+        positions for region, radius and nearest queries, see spatial_index.
+        Listeners get enter_tuio_region and leave_tuio_region for its regions
+        """
+        if self.spatial_index is None:
+            self.spatial_index = SpatialIndex(cells)
+            for profile in chain(self.cursors, self.objects, self.blobs):
+                self.spatial_index.move(profile)
+        return self.spatial_index
+
+    def disable_spatial_index(self):
+        """
+        drops the index and its regions
+        """
+        self.spatial_index = None
+
+    def _unindex(self, removed):
+        if self.spatial_index is not None:
+            for profile in removed:
+                self.spatial_index.remove(profile)
+
+    def enable_recording(self, path :str) -> TuioRecorder:
+        """
+        appends every received datagram to the recording at path, including
+        the ones dropped by the frame ordering. Replay it with TuioReplay
+        """
+        self.disable_recording()
+        self.recorder = TuioRecorder(path)
+        return self.recorder
+
+    def disable_recording(self):
+        """
+        stops the recording and writes its index
+        """
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.close()
+
+    def enable_metrics(self, metrics :TuioMetrics = None) -> TuioMetrics:
+        """
+        starts collecting runtime metrics into metrics or a new TuioMetrics
+        """
+        if metrics is None:
+            metrics = TuioMetrics()
+        metrics.gauge("dispatch_queue_depth", lambda: self.dispatch_queue_depth)
+        metrics.gauge("merged_updates", lambda: self.merged_updates)
+        metrics.gauge("sources", lambda: len(self.sources))
+        for name in ("dropped", "reordered", "lost"):
+            metrics.gauge(f"{name}_frames", lambda name=name: self._sequence_count(name))
+        self.metrics = metrics
+        return metrics
+
+    def disable_metrics(self):
+        """
+        stops collecting metrics
+        """
+        self.metrics = None
+
+    def _sequence_count(self, name :str) -> int:
+        return 0 if self.frame_sequence is None else getattr(self.frame_sequence, name)
+
+    def enable_queued_dispatch(self, maxsize :int = 8):
+        """
+        calls the listeners on a worker thread instead of the receiving thread.
+        Completed frames wait in a FrameQueue of maxsize frames, if it is full
+        updates are merged into the newest frame. Adds and removes are always delivered,
+        a frame which reuses a removed session id waits for room in the queue
+        """
+        if self._frame_queue is not None:
+            return
+        self._frame_queue = FrameQueue(maxsize)
+        self._dispatch_worker = threading.Thread(target=self._run_dispatch_worker,
+                                                 args=(self._frame_queue,),
+                                                 name="tuio-dispatch", daemon=True)
+        self._dispatch_worker.start()
+
+    def disable_queued_dispatch(self, timeout :float = None):
+        """
+        delivers the queued frames and stops the dispatch worker
+        """
+        frame_queue, self._frame_queue = self._frame_queue, None
+        if frame_queue is None:
+            return
+        frame_queue.close()
+        self._dispatch_worker.join(timeout)
+        self._dispatch_worker = None
+        self._merged_updates += frame_queue.merged_updates
+
+    def _run_dispatch_worker(self, frame_queue :FrameQueue):
+        while True:
+            frame = frame_queue.get()
+            if frame is None:
+                return
+            try:
+                self._notify_listeners(frame)
+            except Exception: # pylint: disable=broad-except
+                if self.metrics is not None:
+                    self.metrics.inc("handler_errors_total")
+                traceback.print_exc()
+
+    @property
+    def dispatch_queue_depth(self) -> int:
+        """
+        number of frames waiting for the dispatch worker
+        """
+        return 0 if self._frame_queue is None else len(self._frame_queue)
+
+    @property
+    def merged_updates(self) -> int:
+        """
+        number of update events merged because the dispatch worker fell behind
+        """
+        frame_queue = self._frame_queue
+        if frame_queue is None:
+            return self._merged_updates
+        return self._merged_updates + frame_queue.merged_updates
 
     def add_listener(self, listener :TuioListener):
         """
-        Adds the provided TuioListener to the list of registered TUIO event listeners
+        Adds the provided TuioListener or TuioFrameListener to the list of registered
+        TUIO event listeners. The callbacks of a TuioListener are looked up now
         """
+        if not isinstance(listener, TuioFrameListener):
+            listener = ListenerAdapter(listener)
         self._listener.append(listener)
 
     def remove_listener(self, listener :TuioListener):
         """
         Removes the provided TuioListener from the list of registered TUIO event listeners
         """
-        self._listener.remove(listener)
+        for registered in self._listener:
+            if registered is listener or getattr(registered, "listener", None) is listener:
+                self._listener.remove(registered)
+                return
+        raise ValueError(f"{listener!r} is not registered")
 
     def remove_all_listeners(self):
         """
@@ -225,30 +936,29 @@ class TuioDispatcher(Dispatcher):
         """
         self._listener.clear()
 
-    def _sort_matchs(self, profile_list, session_ids, Profile_type):
+    def _sort_matchs(self, store_name :str, session_ids):
         """
-        sort incoming session_ids into the lists and fill the listner stacks
+        sort incoming session_ids into the store of the current source and fill the
+        listner stacks. returns the alive profiles of all sources
         """
-        new_profiles = []
-        rest_profiles = profile_list.copy()
-        rest_sessions = session_ids.copy()
-
-        for session_id in session_ids:
-            # search for profile
-            for profile in profile_list:
-
-                if profile.session_id == session_id:
-                    new_profiles.append(profile)
-                    self._to_update.append(profile)# add into event list update
-                    rest_profiles.remove(profile)
-                    rest_sessions.remove(session_id)
-
-        for profile in rest_profiles:
-            self._to_delete.append(profile)# add into event list delete
-
-        for session_id in rest_sessions:
-            profile = Profile_type(session_id)
-            new_profiles.append(profile)
-            self._to_add.append(profile)# add into event list add
-
-        return new_profiles
+        store : SessionStore = getattr(self._source, store_name)
+        metrics = self.metrics
+        if metrics is None:
+            added, updated, removed = store.alive(session_ids)
+        else:
+            start = metrics.clock()
+            added, updated, removed = store.alive(session_ids)
+            elapsed = metrics.clock() - start
+            metrics.observe("diff_seconds", elapsed)
+            self._nested_time += elapsed
+        if self._source.partial_frame: # alive is repeated in every fragment of a frame
+            pending = set(self._to_add)
+            pending.update(self._to_update)
+            updated = [profile for profile in updated if profile not in pending]
+        self._to_add.extend(added)
+        self._to_update.extend(updated)
+        self._to_delete.extend(removed)
+        self._unindex(removed)
+        if len(self.sources) == 1:
+            return store.profiles
+        return self._merged(store_name)
@@ -0,0 +1,274 @@
+"""
+template based encoder for the bundles of the TuioServer.
+The layout of every message type (address, type tags and sizes) is computed
+once. Per frame only the session ids and the float payloads are packed into a
+reused bytearray, the result is byte identical to a bundle built with the
+OscBundleBuilder and the get_message functions of the profiles.
+"""
+import struct
+from typing import List
+
+from pythontuio.const import TUIO_BLOB, TUIO_CURSOR, TUIO_OBJECT
+from pythontuio.const import TUIO_ALIVE, TUIO_END, TUIO_SOURCE, UDP_MAX_DATAGRAM
+from pythontuio.osc_layout import BUNDLE_PREFIX, BUNDLE_HEADER_SIZE, IMMEDIATELY
+from pythontuio.osc_layout import CURSOR_SET_TAGS, OBJECT_SET_TAGS, BLOB_SET_TAGS
+from pythontuio.osc_layout import osc_string, set_header
+
+_INT = struct.Struct(">i")
+
+
+def cursor_payload(cursor):
+    """
+    returns the values of the cursor set message in their order
+    """
+    x, y = cursor.position
+    X, Y = cursor.velocity
+    return (int(cursor.session_id), x, y, X, Y, cursor.motion_acceleration)
+
+def object_payload(obj):
+    """
+    returns the values of the object set message in their order
+    """
+    x, y = obj.position
+    X, Y = obj.velocity
+    return (int(obj.session_id), int(obj.class_id), x, y, obj.angle, X, Y,
+            obj.velocity_rotation, obj.motion_acceleration, obj.rotation_acceleration)
+
+def blob_payload(blob):
+    """
+    returns the values of the blob set message in their order
+    """
+    x, y = blob.position
+    X, Y = blob.velocity
+    w, h = blob.dimension
+    return (int(blob.session_id), x, y, blob.angle, w, h, blob.area, X, Y,
+            blob.velocity_rotation, blob.motion_acceleration, blob.rotation_acceleration)
+
+
+class MessageTemplate:
+    """
+    precompiled set message of one profile type including the size prefix
+    of the bundle element. Without set_message the arguments follow the type
+    tags directly, like in the TUIO 2.0 component messages
+    """
+    def __init__(self, address :str, type_tags :str, payload, set_message :bool = True):
+        self.address = address
+        if set_message:
+            self.header = set_header(address, type_tags)
+            arguments = type_tags[2:]
+        else:
+            self.header = osc_string(address) + osc_string(type_tags)
+            arguments = type_tags[1:]
+        self.struct = struct.Struct(f">i{len(self.header)}s{arguments}")
+        self.size = self.struct.size               # bytes in the bundle
+        self.payload = payload                     # profile -> tuple of values
+
+    def write(self, buffer, offset :int, profiles) -> int:
+        """
+        packs the set messages of the profiles into buffer at offset.
+        returns the offset behind the last message
+        """
+        pack_into = self.struct.pack_into
+        payload = self.payload
+        header = self.header
+        size = self.size
+        message_size = size - 4
+        for profile in profiles:
+            pack_into(buffer, offset, message_size, header, *payload(profile))
+            offset += size
+        return offset
+
+
+CURSOR_TEMPLATE = MessageTemplate(TUIO_CURSOR, CURSOR_SET_TAGS, cursor_payload)
+OBJECT_TEMPLATE = MessageTemplate(TUIO_OBJECT, OBJECT_SET_TAGS, object_payload)
+BLOB_TEMPLATE   = MessageTemplate(TUIO_BLOB,   BLOB_SET_TAGS,   blob_payload)
+
+
+def alive_message(address :str, session_ids) -> bytes:
+    """
+    returns the alive message of the session_ids
+    """
+    count = len(session_ids)
+    return b"".join((
+        osc_string(address),
+        osc_string(",s" + "i" * count),
+        osc_string(TUIO_ALIVE),
+        struct.pack(f">{count}i", *session_ids),
+    ))
+
+def fseq_message(address :str, frame_id :int, remaining :int = 0) -> bytes:
+    """
+    returns the fseq message which ends a TUIO bundle.
+    Fragments of a frame carry the number of fragments which still follow as
+    second argument, the last fragment is a plain fseq message
+    """
+    if remaining:
+        return (osc_string(address) + osc_string(",sii") + osc_string(TUIO_END)
+                + struct.pack(">ii", frame_id, remaining))
+    return osc_string(address) + osc_string(",si") + osc_string(TUIO_END) + _INT.pack(frame_id)
+
+def source_message(address :str, source :str) -> bytes:
+    """
+    returns the source message with the name@address of the sender
+    """
+    return osc_string(address) + osc_string(",ss") + osc_string(TUIO_SOURCE) + osc_string(source)
+
+def element(message :bytes) -> bytes:
+    """
+    returns the message as size prefixed bundle element
+    """
+    return _INT.pack(len(message)) + message
+
+# size of the biggest fseq element, used to plan fragments
+_FSEQ_FRAGMENT_SIZE = len(element(fseq_message(TUIO_CURSOR, 0, 1)))
+
+
+class TuioEncoder:
+    """
+    encodes the TUIO bundles of the TuioServer into a reused buffer
+    """
+    def __init__(self, capacity :int = 4096):
+        self._buffer = bytearray(capacity)
+
+    def _reserve(self, size :int) -> bytearray:
+        """
+        returns a buffer with at least size bytes. A new buffer is allocated instead
+        of resizing, so views on the previous frame stay valid.
+        """
+        if len(self._buffer) < size:
+            self._buffer = bytearray(max(size, 2 * len(self._buffer)))
+        return self._buffer
+
+    def encode(self, cursors, objects, blobs, frame_id :int = -1,
+               updates=None, source :str = None) -> memoryview:
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        encodes the alive messages of all profiles, the set messages and a fseq into
+        one bundle. updates is a tuple of the cursors, objects and blobs which get a set
+        message, by default all of them. source adds the source messages.
+        The returned view is valid until the buffer is reused by the next encode
+        """
+        sections = self._sections(cursors, objects, blobs, updates, source)
+        fseq = element(fseq_message(TUIO_CURSOR, frame_id))
+        return self._write_bundle(sections, fseq, self._bundle_size(sections, fseq))
+
+    def encode_fragments(self, cursors, objects, blobs, frame_id :int = -1,
+                         max_size :int = UDP_MAX_DATAGRAM,
+                         updates=None, source :str = None) -> List[memoryview]:
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        encodes a frame like encode into bundles of at most max_size bytes.
+        A frame which fits is encoded like encode does. Otherwise every fragment
+        carries the alive messages of the profile types it contains and its own
+        fseq. A single alive message is never split, so a fragment exceeds
+        max_size if one alive alone does.
+        """
+        sections = self._sections(cursors, objects, blobs, updates, source)
+        fseq = element(fseq_message(TUIO_CURSOR, frame_id))
+        size = self._bundle_size(sections, fseq)
+        if size <= max_size:
+            return [self._write_bundle(sections, fseq, size)]
+
+        budget = max_size - BUNDLE_HEADER_SIZE - _FSEQ_FRAGMENT_SIZE
+        return self._write_fragments(self._plan_fragments(sections, budget), frame_id)
+
+    def _write_fragments(self, fragments, frame_id :int) -> List[memoryview]:
+        """
+        writes the planned fragments into one bundle each, every one with its own fseq
+        """
+        buffer = self._reserve(sum(BUNDLE_HEADER_SIZE + _FSEQ_FRAGMENT_SIZE + used
+                                   for used, _ in fragments))
+        view = memoryview(buffer)
+
+        bundles = []
+        offset = 0
+        for index, (_, items) in enumerate(fragments):
+            start = offset
+            buffer[offset:offset + BUNDLE_HEADER_SIZE] = BUNDLE_PREFIX + IMMEDIATELY
+            offset += BUNDLE_HEADER_SIZE
+            for template, head, profiles in items:
+                offset = self._write(buffer, offset, head)
+                offset = template.write(buffer, offset, profiles)
+            remaining = len(fragments) - index - 1
+            offset = self._write(buffer, offset,
+                                 element(fseq_message(TUIO_CURSOR, frame_id, remaining)))
+            bundles.append(view[start:offset])
+        return bundles
+
+    @staticmethod
+    def _sections(cursors, objects, blobs, updates, source):
+        """
+        returns (template, head elements, profiles with set message) in the order of
+        the bundle. The head holds the source and alive message of the profile type
+        """
+        if updates is None:
+            updates = (cursors, objects, blobs)
+        update_cursors, update_objects, update_blobs = updates
+        sections = []
+        for template, profiles, changed in ((CURSOR_TEMPLATE, cursors, update_cursors),
+                                            (BLOB_TEMPLATE,   blobs,   update_blobs),
+                                            (OBJECT_TEMPLATE, objects, update_objects)):
+            head = element(alive_message(template.address, [p.session_id for p in profiles]))
+            if source is not None:
+                head = element(source_message(template.address, source)) + head
+            sections.append((template, head, changed))
+        return sections
+
+    @staticmethod
+    def _bundle_size(sections, fseq :bytes) -> int:
+        return BUNDLE_HEADER_SIZE + len(fseq) + sum(
+            len(head) + template.size * len(profiles) for template, head, profiles in sections)
+
+    def _write_bundle(self, sections, fseq :bytes, size :int) -> memoryview:
+        """
+        writes all source and alive messages, then all set messages and the fseq into one bundle
+        """
+        buffer = self._reserve(size)
+        buffer[0:BUNDLE_HEADER_SIZE] = BUNDLE_PREFIX + IMMEDIATELY
+        offset = BUNDLE_HEADER_SIZE
+        for _, head, _ in sections:
+            offset = self._write(buffer, offset, head)
+        for template, _, profiles in sections:
+            offset = template.write(buffer, offset, profiles)
+        offset = self._write(buffer, offset, fseq)
+        return memoryview(buffer)[:offset]
+
+    @staticmethod
+    def _plan_fragments(sections, budget :int):
+        """
+        splits the sections into fragments of at most budget bytes.
+        returns a list of (used bytes, items) where an item is
+        (template, head elements, profiles)
+        """
+        fragments = []
+        items = []
+        used = 0
+        for template, head, profiles in sections:
+            needed = len(head) + (template.size if profiles else 0)
+            if items and used + needed > budget:
+                fragments.append((used, items))
+                items, used = [], 0
+            items.append((template, head, profiles[0:0]))
+            used += len(head)
+            start = 0 # set messages are split over as many fragments as needed
+            while start < len(profiles):
+                room = (budget - used) // template.size
+                if room <= 0:
+                    if len(items) > 1: # otherwise the head alone exceeds the budget
+                        fragments.append((used, items))
+                        items, used = [(template, head, profiles[0:0])], len(head)
+                    room = max(1, (budget - used) // template.size)
+                end = min(len(profiles), start + room)
+                items.append((template, b"", profiles[start:end]))
+                used += template.size * (end - start)
+                start = end
+        fragments.append((used, items))
+        return fragments
+
+    @staticmethod
+    def _write(buffer, offset :int, data :bytes) -> int:
+        """
+        copies encoded elements into the buffer and returns the offset behind them
+        """
+        buffer[offset:offset + len(data)] = data
+        return offset + len(data)
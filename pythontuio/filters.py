@@ -0,0 +1,260 @@
+"""
+smoothing and prediction of the received positions for all sessions at once.
+Tracked positions are noisy and lag behind the finger. A TuioFilter runs one
+filter method over the positions of all profiles of a type in NumPy arrays when
+a frame of their source is complete and writes the filtered position, moved
+ahead by the prediction horizon, into the profiles before the listeners are
+called. Every source has its own filter state and frame times, so the frames
+of one tracker do not step the sessions of another.
+
+    OneEuroFilter   adaptive low pass, smooth at rest and responsive in motion
+    KalmanFilter    constant velocity model per axis
+
+A profile without set message in a frame still has the position the filter
+wrote into it, then its last raw position is measured again. The raw
+positions are kept by the filter, client.arrays keeps the raw values of the
+set messages as well.
+NumPy is an optional dependency.
+"""
+import math
+import time
+
+from pythontuio.arrays import np    # None without numpy
+from pythontuio.tuio_profiles import Cursor, Object, Blob
+
+
+def _alpha(dt :float, cutoff):
+    """
+    returns the smoothing factor of a low pass with the cutoff frequency in Hz
+    """
+    return 1.0 / (1.0 + 1.0 / (2 * math.pi * cutoff * dt))
+
+
+class OneEuroFilter:
+    """
+    One Euro filter of Casiez et al. min_cutoff in Hz smooths the jitter at rest,
+    beta raises the cutoff with the speed and so reduces the lag in motion.
+    The state columns are x, y, vx, vy
+    """
+    width = 4
+
+    def __init__(self, min_cutoff :float = 1.0, beta :float = 0.0, d_cutoff :float = 1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+
+    def start(self, measured):
+        """
+        returns the state of new sessions at their first position
+        """
+        state = np.zeros((len(measured), self.width))
+        state[:, 0:2] = measured
+        return state
+
+    def step(self, state, measured, fresh, dt :float): # pylint: disable=unused-argument
+        """
+        filters the measured positions into the state dt seconds later
+        """
+        velocity = (measured - state[:, 0:2]) / dt
+        state[:, 2:4] += _alpha(dt, self.d_cutoff) * (velocity - state[:, 2:4])
+        cutoff = self.min_cutoff + self.beta * np.hypot(state[:, 2], state[:, 3])
+        state[:, 0:2] += _alpha(dt, cutoff)[:, None] * (measured - state[:, 0:2])
+
+    @staticmethod
+    def predict(state, horizon :float):
+        """
+        returns the positions horizon seconds after the last frame
+        """
+        return state[:, 0:2] + horizon * state[:, 2:4]
+
+
+class KalmanFilter:
+    """
+    Kalman filter with constant velocity model. process_noise is the variance of
+    the acceleration, measurement_noise the one of the tracked positions. Both
+    axes share the covariance, the state columns are x, y, vx, vy, p00, p01, p11
+    """
+    width = 7
+
+    def __init__(self, process_noise :float = 1.0, measurement_noise :float = 1e-4):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+
+    def start(self, measured):
+        """
+        returns the state of new sessions at their first position, with unknown velocity
+        """
+        state = np.zeros((len(measured), self.width))
+        state[:, 0:2] = measured
+        state[:, 4] = self.measurement_noise
+        state[:, 6] = 1.0
+        return state
+
+    def step(self, state, measured, fresh, dt :float):
+        """
+        predicts the state dt seconds later and corrects it with the fresh measurements
+        """
+        q = self.process_noise
+        p00, p01, p11 = state[:, 4], state[:, 5], state[:, 6]
+        state[:, 0:2] += dt * state[:, 2:4]
+        p00 += dt * (2 * p01 + dt * p11) + q * dt ** 3 / 3
+        p01 += dt * p11 + q * dt ** 2 / 2
+        p11 += q * dt
+
+        rows = np.flatnonzero(fresh)
+        if rows.size == 0:
+            return
+        gain_position = p00[rows] / (p00[rows] + self.measurement_noise)
+        gain_velocity = p01[rows] / (p00[rows] + self.measurement_noise)
+        innovation = measured[rows] - state[rows, 0:2]
+        state[rows, 0:2] += gain_position[:, None] * innovation
+        state[rows, 2:4] += gain_velocity[:, None] * innovation
+        p11[rows] -= gain_velocity * p01[rows]
+        p01[rows] *= 1 - gain_position
+        p00[rows] *= 1 - gain_position
+
+    @staticmethod
+    def predict(state, horizon :float):
+        """
+        returns the positions horizon seconds after the last frame
+        """
+        return state[:, 0:2] + horizon * state[:, 2:4]
+
+
+class FilterState:
+    """
+    raw positions and filter state of the profiles of one type, keyed by profile
+    """
+    def __init__(self, method):
+        self.method = method
+        self._rows = {}                             # profile -> row
+        self._raw = np.zeros((0, 2))
+        self._written = np.zeros((0, 2))            # positions written into the profiles
+        self._state = np.zeros((0, method.width))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def update(self, profiles, dt :float, prediction :float):
+        """
+        filters the positions of the profiles and writes the predicted ones into them
+        """
+        count = len(profiles)
+        rows = np.fromiter((self._rows.get(p, -1) for p in profiles), dtype=np.intp, count=count)
+        measured = np.array([p.position for p in profiles], dtype=np.float64).reshape(count, 2)
+        known = rows >= 0
+        fresh = ~known
+        fresh[known] = (measured[known] != self._written[rows[known]]).any(axis=1)
+        stale = ~fresh              # no set message overwrote the filtered position
+        measured[stale] = self._raw[rows[stale]]
+
+        state = np.empty((count, self.method.width))
+        state[~known] = self.method.start(measured[~known])
+        if known.any():
+            current = self._state[rows[known]]
+            if dt > 0:
+                self.method.step(current, measured[known], fresh[known], dt)
+            state[known] = current
+
+        predicted = self.method.predict(state, prediction)
+        for profile, position in zip(profiles, predicted.tolist()):
+            profile.position = tuple(position)
+        self._rows = {p : row for row, p in enumerate(profiles)}
+        self._raw = measured
+        self._written = predicted
+        self._state = state
+
+    def raw(self, profiles):
+        """
+        returns the last received positions of the profiles as (n, 2) array
+        """
+        return self._raw[self._lookup(profiles)]
+
+    def predict(self, profiles, horizon :float):
+        """
+        returns the filtered positions of the profiles horizon seconds after the last frame
+        """
+        return self.method.predict(self._state[self._lookup(profiles)], horizon)
+
+    def _lookup(self, profiles):
+        return np.fromiter((self._rows[p] for p in profiles), dtype=np.intp, count=len(profiles))
+
+
+class SourceFilter:
+    """
+    filter states of the cursors, objects and blobs of one source and the time
+    of its last frame
+    """
+    def __init__(self, method):
+        self.cursors = FilterState(method)
+        self.objects = FilterState(method)
+        self.blobs   = FilterState(method)
+        self.states = {Cursor : self.cursors, Object : self.objects, Blob : self.blobs}
+        self.last_time :float = None
+
+
+class TuioFilter:
+    """
+    filter stage of a TuioClient. method is a OneEuroFilter or KalmanFilter,
+    prediction the horizon in seconds the written positions are moved ahead.
+    Other horizons are returned by predict
+    """
+    def __init__(self, method=None, prediction :float = 0.0, clock=time.monotonic):
+        if np is None:
+            raise ImportError("numpy is required for the filters of pythontuio")
+        if method is None:
+            method = OneEuroFilter()
+        self.method = method
+        self.prediction = prediction
+        self.clock = clock
+        self.sources = {}       # source -> SourceFilter
+
+    def update(self, cursors, objects, blobs, now :float = None, source=None):
+        """
+        filters the positions of all profiles of a completed frame of the source
+        """
+        if now is None:
+            now = self.clock()
+        state = self.sources.get(source)
+        if state is None:
+            state = self.sources[source] = SourceFilter(self.method)
+        dt = 0.0 if state.last_time is None else now - state.last_time
+        state.last_time = now
+        state.cursors.update(cursors, dt, self.prediction)
+        state.objects.update(objects, dt, self.prediction)
+        state.blobs.update(blobs, dt, self.prediction)
+
+    def remove(self, source):
+        """
+        forgets the filter state of the source
+        """
+        self.sources.pop(source, None)
+
+    def predict(self, profiles, horizon :float):
+        """
+        returns the positions of profiles of one type horizon seconds after the
+        last frame of their source as (n, 2) array
+        """
+        return self._gather(profiles, lambda state, group: state.predict(group, horizon))
+
+    def raw(self, profiles):
+        """
+        returns the last received positions of profiles of one type as (n, 2) array
+        """
+        return self._gather(profiles, lambda state, group: state.raw(group))
+
+    def _gather(self, profiles, read):
+        """
+        reads the rows of the profiles from the filter states of their sources
+        """
+        result = np.zeros((len(profiles), 2))
+        if not profiles:
+            return result
+        profile_type = type(profiles[0])
+        groups = {}
+        for index, profile in enumerate(profiles):
+            groups.setdefault(profile.source, []).append(index)
+        for source, indexes in groups.items():
+            state = self.sources[source].states[profile_type]
+            result[indexes] = read(state, [profiles[index] for index in indexes])
+        return result
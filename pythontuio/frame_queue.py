@@ -0,0 +1,66 @@
+"""
+bounded queue between the receiving thread and the listener worker of the
+TuioDispatcher. If the worker falls behind, new frames are merged into the
+newest queued frame instead of blocking the socket thread. Only a frame
+which reuses a removed session id waits for the worker.
+"""
+from collections import deque
+import threading
+
+
+class FrameQueue:
+    """
+    bounded FIFO of TuioFrames. When it is full, a new frame is merged into the
+    last queued one: adds and removes are kept, updates of the same session are
+    collapsed into the newest. merged_updates counts the collapsed updates.
+    A frame which can not be merged, because it reuses a removed session id,
+    waits until the consumer made room, so the queue never exceeds maxsize.
+    """
+    def __init__(self, maxsize :int = 8):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.merged_updates = 0
+        self.merged_frames = 0
+        self._frames = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def __len__(self):
+        return len(self._frames)
+
+    def put(self, frame):
+        """
+        queues the frame. Blocks only if the queue is full and the frame can not
+        be merged into the last one
+        """
+        frames = self._frames
+        with self._condition:
+            if len(frames) >= self.maxsize and frames[-1].can_merge(frame):
+                self.merged_updates += frames[-1].merge(frame)
+                self.merged_frames += 1
+            else: # a session id was reused, keep the order
+                self._condition.wait_for(lambda: len(frames) < self.maxsize or self._closed)
+                frames.append(frame)
+            self._condition.notify_all()
+
+    def get(self, timeout :float = None):
+        """
+        returns the oldest frame. Returns None if the queue was closed or
+        the timeout expired
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._frames or self._closed, timeout):
+                return None
+            if self._frames:
+                self._condition.notify_all()    # wakes up a put waiting for room
+                return self._frames.popleft()
+            return None
+
+    def close(self):
+        """
+        wakes up the consumer, get returns None once the queue is empty
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
@@ -0,0 +1,122 @@
+"""
+automatic motion fields of the profiles of a TuioServer.
+The positions and angles of the last frame are kept in NumPy arrays. At send
+time velocity, motion_acceleration, velocity_rotation and rotation_acceleration
+of all sessions of a profile type are derived in one vectorized pass like the
+TUIO reference implementation does:
+
+    velocity               position difference per second
+    motion_acceleration    change of the speed per second
+    velocity_rotation      rotations per second, the angle in radians
+    rotation_acceleration  change of velocity_rotation per second
+
+Only profiles whose motion fields changed are assigned, so resting profiles
+keep their set values and are left out of delta frames. NumPy is an optional dependency.
+"""
+import math
+import time
+
+from pythontuio.arrays import np    # None without numpy
+
+
+class MotionState:
+    """
+    positions, angles and speeds of the profiles of one type in the last frame
+    """
+    def __init__(self, angular :bool):
+        self.angular = angular                  # profiles have an angle
+        self._rows = {}                         # profile -> row of the last frame
+        self._state = np.zeros((0, 7))          # x, y, angle, vx, vy, speed, rotation
+
+    def __len__(self):
+        return len(self._rows)
+
+    def update(self, profiles, dt :float):
+        """
+        derives the motion fields of the profiles from the last frame dt seconds ago
+        """
+        count = len(profiles)
+        rows = np.fromiter((self._rows.get(p, -1) for p in profiles), dtype=np.intp, count=count)
+        position = np.array([p.position for p in profiles], dtype=np.float64).reshape(count, 2)
+        if self.angular:
+            angle = np.fromiter((p.angle for p in profiles), dtype=np.float64, count=count)
+        else:
+            angle = np.zeros(count)
+
+        known = rows >= 0
+        last = self._state[rows[known]] if len(self._state) else np.zeros((0, 7))
+        state = np.zeros((count, 7))
+        state[:, 0:2] = position
+        state[:, 2] = angle
+        acceleration, rotation_acceleration = self._derive(state, last, known, dt)
+
+        previous = np.zeros((count, 7))
+        previous[known] = last
+        self._assign(profiles, state, previous, acceleration, rotation_acceleration)
+        self._state = state
+        self._rows = {p : row for row, p in enumerate(profiles)}
+
+    def _derive(self, state, last, known, dt :float):
+        """
+        writes the velocities of the known rows into state and returns the motion
+        and rotation accelerations, the latter is None for profiles without angle
+        """
+        count = len(state)
+        acceleration = np.zeros(count)
+        rotation_acceleration = np.zeros(count) if self.angular else None
+        if dt <= 0 or not known.any():
+            return acceleration, rotation_acceleration
+        velocity = (state[known, 0:2] - last[:, 0:2]) / dt
+        speed = np.hypot(velocity[:, 0], velocity[:, 1])
+        state[known, 3:5] = velocity
+        state[known, 5] = speed
+        acceleration[known] = (speed - last[:, 5]) / dt
+        if self.angular:
+            turn = (state[known, 2] - last[:, 2] + math.pi) % (2 * math.pi) - math.pi
+            rotation = turn / (2 * math.pi) / dt
+            state[known, 6] = rotation
+            rotation_acceleration[known] = (rotation - last[:, 6]) / dt
+        return acceleration, rotation_acceleration
+
+    def _assign(self, profiles, state, previous, acceleration, rotation_acceleration):
+        """
+        writes the motion fields into the profiles which are moving or stopped moving
+        """
+        moving = (state[:, 3:7] != 0).any(axis=1) | (previous[:, 3:7] != 0).any(axis=1)
+        vx, vy, rotation = state[:, 3].tolist(), state[:, 4].tolist(), state[:, 6].tolist()
+        acceleration = acceleration.tolist()
+        if rotation_acceleration is not None:
+            rotation_acceleration = rotation_acceleration.tolist()
+        for row in np.flatnonzero(moving).tolist():
+            profile = profiles[row]
+            profile.velocity = (vx[row], vy[row])
+            profile.motion_acceleration = acceleration[row]
+            if rotation_acceleration is not None:
+                profile.velocity_rotation = rotation[row]
+                profile.rotation_acceleration = rotation_acceleration[row]
+
+
+class TuioKinematics:
+    """
+    motion state of cursors, objects and blobs of a TuioServer
+    """
+    def __init__(self, clock=time.monotonic):
+        if np is None:
+            raise ImportError("numpy is required for the kinematics of pythontuio")
+        self.clock = clock
+        self.cursors = MotionState(angular=False)
+        self.objects = MotionState(angular=True)
+        self.blobs   = MotionState(angular=True)
+        self._last_time :float = None
+
+    def update(self, cursors, objects, blobs, now :float = None):
+        """
+        derives the motion fields of all profiles since the last update
+        """
+        if now is None:
+            now = self.clock()
+        dt = 0.0 if self._last_time is None else now - self._last_time
+        self._last_time = now
+        self.cursors.update(cursors, dt)
+        self.objects.update(objects, dt)
+        self.blobs.update(blobs, dt)
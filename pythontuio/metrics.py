@@ -0,0 +1,165 @@
+"""
+opt-in runtime metrics of the TuioClient and TuioServer.
+The dispatcher only checks `self.metrics is None` on its hot paths, so the
+metrics cost nothing while they are disabled. Enabled, they count packets,
+frames and errors and keep histograms of the time spent in decoding, in the
+alive diff and in every listener. Every observation can be forwarded to timing
+hooks, e.g. a statsd client, and the state can be exported as Prometheus text.
+
+The counters are updated without lock, concurrent threads may lose increments.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+import time
+
+# upper bounds in seconds, from 1 microsecond to 1 second
+DEFAULT_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+                   1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0)
+
+
+class Histogram:
+    """
+    cumulative histogram with fixed bucket bounds like the Prometheus ones
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value :float):
+        """
+        adds a value
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, fraction :float) -> float:
+        """
+        returns the upper bound of the bucket which holds the fraction quantile
+        """
+        if not self.count:
+            return float("nan")
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        """
+        returns count, sum, p50, p99 and the cumulative bucket counts
+        """
+        cumulative = []
+        seen = 0
+        for count in self.counts:
+            seen += count
+            cumulative.append(seen)
+        return {
+            "count"   : self.count,
+            "sum"     : self.sum,
+            "p50"     : self.quantile(0.5),
+            "p99"     : self.quantile(0.99),
+            "buckets" : dict(zip(self.buckets + (float("inf"),), cumulative)),
+        }
+
+
+class TuioMetrics:
+    """
+    counters, histograms and gauges of one TuioClient or TuioServer.
+    clock returns seconds and is used for all timings. A hook is called as
+    hook(name, seconds, labels) for every observed timing, labels is a tuple
+    of (key, value) pairs
+    """
+    def __init__(self, clock=time.perf_counter, buckets=DEFAULT_BUCKETS):
+        self.clock = clock
+        self.buckets = buckets
+        self.counters = defaultdict(int)
+        self.histograms = {}            # (name, labels) -> Histogram
+        self._gauges = {}               # name -> function returning the value
+        self._hooks = []
+
+    def inc(self, name :str, value :int = 1):
+        """
+        increments the counter name
+        """
+        self.counters[name] += value
+
+    def observe(self, name :str, seconds :float, labels :tuple = ()):
+        """
+        adds a timing to the histogram name with the labels
+        """
+        histogram = self.histograms.get((name, labels))
+        if histogram is None:
+            histogram = self.histograms[(name, labels)] = Histogram(self.buckets)
+        histogram.observe(seconds)
+        for hook in self._hooks:
+            hook(name, seconds, labels)
+
+    def gauge(self, name :str, function):
+        """
+        registers a function which returns the current value of the gauge name
+        """
+        self._gauges[name] = function
+
+    def add_hook(self, hook):
+        """
+        forwards every timing to hook(name, seconds, labels)
+        """
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """
+        stops forwarding the timings to hook
+        """
+        self._hooks.remove(hook)
+
+    def snapshot(self) -> dict:
+        """
+        returns a copy of all counters, gauges and histograms
+        """
+        return {
+            "counters"   : dict(self.counters),
+            "gauges"     : {name : function() for name, function in self._gauges.items()},
+            "histograms" : {(name, labels) : histogram.snapshot()
+                            for (name, labels), histogram in list(self.histograms.items())},
+        }
+
+    def to_prometheus(self, prefix :str = "tuio") -> str:
+        """
+        returns the metrics in the Prometheus text exposition format
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            lines.append(f"{prefix}_{name} {value}")
+        for name, value in sorted(snapshot["gauges"].items()):
+            lines.append(f"# TYPE {prefix}_{name} gauge")
+            lines.append(f"{prefix}_{name} {value}")
+        typed = set()
+        for (name, labels), histogram in sorted(snapshot["histograms"].items()):
+            metric = f"{prefix}_{name}"
+            if name not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(name)
+            for bound, count in histogram["buckets"].items():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{metric}_bucket{_labels(labels + (('le', le),))} {count}")
+            lines.append(f"{metric}_sum{_labels(labels)} {histogram['sum']}")
+            lines.append(f"{metric}_count{_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels :tuple) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,212 @@
+"""
+multi process receiving of TUIO bundles.
+
+                      MultiProcessTuioClient
+                               |  Pipe (frame deltas)
+            ---------------------------------------
+            |                  |                  |
+         worker             worker             worker
+   (SO_REUSEPORT socket + TuioDispatcher each)
+
+Every worker binds the same port with SO_REUSEPORT, the kernel hashes the
+datagrams by sender, so all bundles of one tracker end up in the same worker.
+A worker decodes the bundles with its own TuioDispatcher and sends one compact
+delta per frame to the parent: the set values of added and changed sessions
+and the ids of updated and removed ones. The parent applies the deltas to its
+own sessions and calls the listeners, so they see one merged stream.
+"""
+import multiprocessing
+from multiprocessing.connection import wait
+import socket
+import threading
+import traceback
+from typing import Tuple
+
+from pythontuio.const import UDP_MAX_DATAGRAM
+from pythontuio.dispatcher import TuioDispatcher, TuioFrame
+from pythontuio.decoder import TuioDecoder
+from pythontuio.encoder import cursor_payload, object_payload, blob_payload
+from pythontuio.tuio_profiles import Cursor, Object, Blob
+
+_PAYLOADS = ((Cursor, cursor_payload), (Object, object_payload), (Blob, blob_payload))
+_HANDLER_ERROR = "handler_error"    # sent instead of a delta for a broken datagram
+
+
+class _WorkerDispatcher(TuioDispatcher):
+    """
+    TuioDispatcher of a worker process, which sends the completed frames as
+    deltas to the parent instead of calling listeners
+    """
+    def __init__(self, connection, fast_decoder :bool):
+        TuioDispatcher.__init__(self)
+        self._connection = connection
+        self._rows = {}     # profile -> row of the last delta
+        self.source_timeout = None  # the parent removes the idle sources
+        if fast_decoder:
+            self._decoder = TuioDecoder(self)
+
+    def _dispatch(self, frame :TuioFrame):
+        delta = frame_delta(frame, self._rows)
+        self._connection.send((self._source.source, frame.frame_id, delta))
+
+
+def frame_delta(frame :TuioFrame, rows :dict) -> tuple:
+    """
+    returns (added rows, changed rows, updated ids, removed ids) for cursors,
+    objects and blobs. A row holds the values of a set message. Only updated
+    profiles whose row differs from the one in rows get a row, rows is updated
+    """
+    delta = []
+    for profile_type, payload in _PAYLOADS:
+        added = []
+        for profile in frame.added:
+            if isinstance(profile, profile_type):
+                row = rows[profile] = payload(profile)
+                added.append(row)
+        updated = []
+        changed = []
+        for profile in frame.updated:
+            if isinstance(profile, profile_type):
+                updated.append(profile.session_id)
+                row = payload(profile)
+                if rows.get(profile) != row:
+                    rows[profile] = row
+                    changed.append(row)
+        removed = []
+        for profile in frame.removed:
+            if isinstance(profile, profile_type):
+                rows.pop(profile, None)
+                removed.append(profile.session_id)
+        delta.append((added, changed, updated, removed))
+    return tuple(delta)
+
+
+def _run_worker(server_address, connection, stop_event, fast_decoder :bool):
+    """
+    receive loop of a worker process
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind(server_address)
+    sock.settimeout(0.1)
+    dispatcher = _WorkerDispatcher(connection, fast_decoder)
+    connection.send(None) # bound, the parent may continue
+    try:
+        while not stop_event.is_set():
+            try:
+                data, client_address = sock.recvfrom(UDP_MAX_DATAGRAM)
+            except socket.timeout:
+                continue
+            try:
+                dispatcher.call_handlers_for_packet(data, client_address)
+            except Exception: # pylint: disable=broad-except
+                traceback.print_exc()
+                connection.send(_HANDLER_ERROR)
+    finally:
+        sock.close()
+        connection.close()
+
+
+class MultiProcessTuioClient(TuioDispatcher): # pylint: disable=too-many-instance-attributes
+    """
+    TuioClient which decodes on several worker processes bound to the same port.
+    Use it if one core can not keep up with many trackers, a single tracker is
+    always decoded by one worker. The listeners are called on a merge thread of
+    this process. Requires SO_REUSEPORT (Linux, BSD, macOS)
+    """
+    def __init__(self, server_address: Tuple[str, int], workers :int = None,
+                 fast_decoder :bool = True):
+        if not hasattr(socket, "SO_REUSEPORT"):
+            raise OSError("SO_REUSEPORT is not supported on this platform")
+        TuioDispatcher.__init__(self)
+        self.server_address = server_address
+        self.workers = workers or multiprocessing.cpu_count()
+        self.fast_decoder = fast_decoder
+        self.frame_sequence = None  # the workers order the frames of their sources
+        self._processes = []
+        self._connections = []
+        self._stop_event = None
+        self._merge_thread : threading.Thread = None
+
+    @property
+    def running(self) -> bool:
+        """
+        True while the merge thread is alive
+        """
+        return self._merge_thread is not None and self._merge_thread.is_alive()
+
+    def start(self):
+        """
+        starts the worker processes and returns when all of them are bound
+        """
+        if self.running:
+            return
+        self._stop_event = multiprocessing.Event()
+        for _ in range(self.workers):
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_run_worker, name="tuio-worker", daemon=True,
+                                              args=(self.server_address, sender, self._stop_event,
+                                                    self.fast_decoder))
+            process.start()
+            sender.close()
+            self._processes.append(process)
+            self._connections.append(receiver)
+        for connection in self._connections:
+            connection.recv()
+        self._merge_thread = threading.Thread(target=self._run_merge,
+                                              args=(list(self._connections),),
+                                              name="tuio-merge", daemon=True)
+        self._merge_thread.start()
+
+    def stop(self, timeout :float = None):
+        """
+        stops the workers and the merge thread
+        """
+        if self._stop_event is None:
+            return
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout)
+        if self._merge_thread is not None:
+            self._merge_thread.join(timeout)
+        self._processes.clear()
+        self._connections.clear()
+        self._stop_event = None
+        self._merge_thread = None
+
+    def _run_merge(self, connections):
+        while connections:
+            for connection in wait(connections):
+                try:
+                    message = connection.recv()
+                except EOFError: # worker stopped
+                    connections.remove(connection)
+                    connection.close()
+                    continue
+                if message == _HANDLER_ERROR:
+                    if self.metrics is not None:
+                        self.metrics.inc("handler_errors_total")
+                    continue
+                self._apply_delta(*message)
+
+    def _apply_delta(self, source, frame_id :int, delta :tuple):
+        """
+        applies the delta of a worker frame to the sessions of the source and
+        calls the listeners
+        """
+        sessions = self._receive_source(source)
+        for store, set_values, (added_rows, changed_rows, updated_ids, removed_ids) in zip(
+                sessions.stores, (self._set_cursor, self._set_object, self._set_blob), delta):
+            added, removed = store.apply([row[0] for row in added_rows], removed_ids)
+            for row in added_rows:
+                set_values(row)
+            for row in changed_rows:
+                set_values(row)
+            self._to_add.extend(added)
+            self._to_update.extend(store.get(session_id) for session_id in updated_ids)
+            self._to_delete.extend(removed)
+            self._unindex(removed)
+        self.cursors = self._merged("cursor_store")
+        self.objects = self._merged("object_store")
+        self.blobs   = self._merged("blob_store")
+        self._call_listener(frame_id)
@@ -0,0 +1,41 @@
+"""
+binary layout of the OSC packets used by TUIO 1.1.
+Shared by the TuioEncoder and the TuioDecoder, see
+http://opensoundcontrol.org/spec-1_0
+"""
+import struct
+
+from pythontuio.const import TUIO_SET
+
+BUNDLE_PREFIX = b"#bundle\x00"
+BUNDLE_HEADER_SIZE = 16                     # prefix + timetag
+IMMEDIATELY = struct.pack(">Q", 1)          # timetag of bundles without a timestamp
+
+# type tags of the set messages
+CURSOR_SET_TAGS = ",sifffff"                # s_id, x, y, X, Y, m
+OBJECT_SET_TAGS = ",siiffffffff"            # s_id, i, x, y, a, X, Y, A, m, r
+BLOB_SET_TAGS   = ",sifffffffffff"          # s_id, x, y, a, w, h, f, X, Y, A, m, r
+
+
+def osc_string(value :str) -> bytes:
+    """
+    returns the null terminated and 4 byte padded OSC string
+    """
+    data = value.encode("utf-8")
+    return data + b"\x00" * (4 - len(data) % 4)
+
+
+def set_header(address :str, type_tags :str) -> bytes:
+    """
+    returns the constant beginning of a set message up to the session_id
+    """
+    return osc_string(address) + osc_string(type_tags) + osc_string(TUIO_SET)
+
+
+def read_string(data, index :int):
+    """
+    returns the OSC string at index and the index behind its padding
+    """
+    terminator = data.index(b"\x00", index)
+    value = data[index:terminator].decode("utf-8")
+    return value, terminator + 4 - (terminator - index) % 4
@@ -0,0 +1,191 @@
+"""
+binary recording and replay of the received TUIO datagrams.
+
+A recording starts with MAGIC followed by one record per datagram:
+
+    <d  receive time (time.time())
+    <H  port of the sender
+    <B  length of the sender ip
+    <I  length of the datagram
+        sender ip (utf-8), datagram
+
+When the recorder is closed an index with the offsets of all records is
+appended, followed by its offset, the record count and INDEX_MAGIC. The
+TuioReplay memory maps the file and uses the index to access records
+directly. Recordings without index, e.g. of a crashed client, are scanned once.
+"""
+import mmap
+import socket
+import struct
+import time
+
+MAGIC = b"TUIOREC1"
+INDEX_MAGIC = b"TUIOIDX1"
+
+_RECORD = struct.Struct("<dHBI")
+_TRAILER = struct.Struct("<QQ8s")
+
+
+class TuioRecorder:
+    """
+    appends datagrams with their receive time to a recording file
+    """
+    def __init__(self, path :str):
+        self.path = path
+        self.count = 0
+        self._offsets = []
+        self._file = open(path, "wb") # pylint: disable=consider-using-with
+        self._file.write(MAGIC)
+        self._offset = len(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, data, client_address, timestamp :float = None):
+        """
+        appends the datagram received from client_address
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        ip, port = client_address[0].encode("utf-8"), client_address[1]
+        header = _RECORD.pack(timestamp, port, len(ip), len(data))
+        self._file.write(header)
+        self._file.write(ip)
+        self._file.write(data)
+        self._offsets.append(self._offset)
+        self._offset += len(header) + len(ip) + len(data)
+        self.count += 1
+
+    def close(self):
+        """
+        writes the index and closes the file
+        """
+        if self._file.closed:
+            return
+        self._file.write(struct.pack(f"<{len(self._offsets)}Q", *self._offsets))
+        self._file.write(_TRAILER.pack(self._offset, len(self._offsets), INDEX_MAGIC))
+        self._file.close()
+
+
+class TuioReplay:
+    """
+    memory mapped recording. Records are (receive time, sender address, datagram)
+    """
+    def __init__(self, path :str):
+        self.path = path
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is no TUIO recording")
+        self._offsets = self._read_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, index :int):
+        offset = self._offsets[index]
+        timestamp, port, ip_size, size = _RECORD.unpack_from(self._map, offset)
+        start = offset + _RECORD.size
+        ip = self._map[start:start + ip_size].decode("utf-8")
+        start += ip_size
+        return timestamp, (ip, port), self._map[start:start + size]
+
+    def __iter__(self):
+        for index in range(len(self._offsets)):
+            yield self[index]
+
+    def close(self):
+        """
+        unmaps the recording
+        """
+        self._map.close()
+
+    def _read_index(self) -> list:
+        """
+        returns the record offsets of the index, or scans the records if the
+        recording was not closed
+        """
+        if len(self._map) >= len(MAGIC) + _TRAILER.size:
+            trailer = len(self._map) - _TRAILER.size
+            index_offset, count, magic = _TRAILER.unpack_from(self._map, trailer)
+            if magic == INDEX_MAGIC and index_offset + 8 * count == trailer:
+                return list(struct.unpack_from(f"<{count}Q", self._map, index_offset))
+
+        offsets = []
+        offset = len(MAGIC)
+        while offset + _RECORD.size <= len(self._map):
+            _, _, ip_size, size = _RECORD.unpack_from(self._map, offset)
+            end = offset + _RECORD.size + ip_size + size
+            if end > len(self._map):
+                break # last record was cut off
+            offsets.append(offset)
+            offset = end
+        return offsets
+
+    def replay_into(self, dispatcher, start :int = 0, stop :int = None) -> int:
+        """
+        feeds the records into the dispatcher as fast as possible.
+        returns the number of replayed datagrams
+        """
+        count = 0
+        for index in range(start, len(self) if stop is None else stop):
+            _, client_address, data = self[index]
+            dispatcher.call_handlers_for_packet(data, client_address)
+            count += 1
+        return count
+
+    def replay_to(self, server, speed :float = 1.0, start :int = 0, stop :int = None) -> int:
+        """
+        sends the recorded datagrams unchanged to all destinations and streams of
+        the TuioServer. speed scales the recorded timing, 2.0 replays twice as
+        fast, None sends as fast as possible. returns the number of sent datagrams
+        """
+        count = 0
+        for data in self._paced(speed, start, stop):
+            server.send_packets([data])
+            count += 1
+        return count
+
+    def send_to(self, address, speed :float = 1.0, start :int = 0, stop :int = None,
+                sock=None) -> int:
+        """
+        sends the recorded datagrams to the (ip, port) address, see replay_to
+        """
+        own_socket = sock is None
+        if own_socket:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        count = 0
+        try:
+            for data in self._paced(speed, start, stop):
+                sock.sendto(data, address)
+                count += 1
+        finally:
+            if own_socket:
+                sock.close()
+        return count
+
+    def _paced(self, speed :float, start :int, stop :int):
+        """
+        yields the recorded datagrams at their recorded time scaled by speed
+        """
+        first = None
+        begin = time.monotonic()
+        for index in range(start, len(self) if stop is None else stop):
+            timestamp, _, data = self[index]
+            if speed:
+                if first is None:
+                    first = timestamp
+                delay = begin + (timestamp - first) / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            yield data
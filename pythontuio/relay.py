@@ -0,0 +1,221 @@
+"""
+relay node between trackers and clients which calibrates, crops and remaps
+the TUIO frames on the way.
+
+    tracker --UDP--> TuioRelay --TuioServer--> clients
+
+A source without RelayTransform is forwarded as it is: its datagrams are
+sent on without being decoded. Only a sender without name@address gets
+source messages with its address, as the clients only see the relay. The
+frames of the other sources are decoded into sessions like in every
+TuioClient. When a frame is complete the
+positions of all its profiles are transformed in one vectorized pass, the
+ones outside of the region of interest are dropped and the frame is encoded
+again under the name of its source, so the clients keep the sources apart.
+The transforms need numpy.
+"""
+import math
+from typing import Tuple
+
+from pythontuio.arrays import np    # None without numpy
+from pythontuio.tuio import TuioClient, TuioServer
+from pythontuio.tuio_profiles import Cursor, Object, Blob
+from pythontuio.sequence import read_frame_header, replace_source
+
+# attributes copied from a received profile to its relayed copy
+_FIELDS = {
+    Cursor : Cursor.__slots__,
+    Object : Object.__slots__,
+    Blob   : Blob.__slots__,
+}
+
+
+class RelayTransform:
+    """
+    transform of the frames of one source. matrix is a 2x3 affine or 3x3
+    homography of the normalized positions, velocities, angles and blob sizes
+    follow its local linear part. roi = (x0, y0, x1, y1) drops the profiles
+    outside of it after the transform. session_offset is added to the session
+    ids, so sources can share the session ids of the clients
+    """
+    def __init__(self, matrix=None, roi :Tuple[float, float, float, float] = None,
+                 session_offset :int = 0):
+        if np is None:
+            raise ImportError("numpy is required for the transforms of pythontuio")
+        if matrix is None:
+            matrix = np.eye(3)
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.shape == (2, 3):
+            matrix = np.vstack((matrix, (0.0, 0.0, 1.0)))
+        if matrix.shape != (3, 3):
+            raise ValueError("matrix has to be 2x3 or 3x3")
+        self.matrix = matrix
+        self.roi = roi
+        self.session_offset = session_offset
+
+    @classmethod
+    def from_points(cls, source_points, target_points, **kwargs):
+        """
+        returns the transform of the homography which maps the four source
+        points onto the four target points, e.g. the corners of the display as
+        seen by the tracker onto the unit square
+        """
+        rows = []
+        for (x, y), (u, v) in zip(source_points, target_points):
+            rows.append((x, y, 1, 0, 0, 0, -u * x, -u * y, u))
+            rows.append((0, 0, 0, x, y, 1, -v * x, -v * y, v))
+        system = np.asarray(rows, dtype=np.float64)
+        solution = np.linalg.solve(system[:, :8], system[:, 8])
+        return cls(np.append(solution, 1.0).reshape(3, 3), **kwargs)
+
+    def apply(self, positions):
+        """
+        returns the transformed positions, the jacobians of the transform at the
+        positions as (n, 2, 2) array and the mask of the positions inside the roi
+        """
+        h = self.matrix
+        x, y = positions[:, 0], positions[:, 1]
+        w = h[2, 0] * x + h[2, 1] * y + h[2, 2]
+        u = (h[0, 0] * x + h[0, 1] * y + h[0, 2]) / w
+        v = (h[1, 0] * x + h[1, 1] * y + h[1, 2]) / w
+        jacobian = np.empty((len(positions), 2, 2))
+        jacobian[:, 0, 0] = (h[0, 0] - u * h[2, 0]) / w
+        jacobian[:, 0, 1] = (h[0, 1] - u * h[2, 1]) / w
+        jacobian[:, 1, 0] = (h[1, 0] - v * h[2, 0]) / w
+        jacobian[:, 1, 1] = (h[1, 1] - v * h[2, 1]) / w
+        if self.roi is None:
+            inside = np.ones(len(positions), dtype=bool)
+        else:
+            x0, y0, x1, y1 = self.roi
+            inside = (u >= x0) & (u <= x1) & (v >= y0) & (v <= y1)
+        return np.column_stack((u, v)), jacobian, inside
+
+
+class TuioRelay(TuioClient): # pylint: disable=too-many-ancestors
+    """
+    TuioClient which sends every received frame on with server. transforms maps
+    sources or ips to their RelayTransform, default applies to the sources without one.
+    A source without any transform is forwarded without being decoded. Listeners of the
+    relay see the received, untransformed sessions
+    """
+    def __init__(self, server_address :Tuple[str, int], server :TuioServer,
+                 transforms :dict = None, default :RelayTransform = None,
+                 fast_decoder :bool = True, drain :bool = False):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        TuioClient.__init__(self, server_address, fast_decoder=fast_decoder, drain=drain)
+        self.server = server
+        self.transforms = dict(transforms or {})
+        self.default = default
+        self.forwarded_packets = 0
+        self._outputs = {}      # source -> {received profile : relayed profile}
+        self._removing = False
+
+    def transform_of(self, source) -> RelayTransform:
+        """
+        returns the transform of the source, None if it is forwarded unchanged.
+        Senders without source message are looked up by (ip, port), then by ip
+        """
+        transform = self.transforms.get(source)
+        if transform is None and isinstance(source, tuple):
+            transform = self.transforms.get(source[0])
+        return self.default if transform is None else transform
+
+    def _handle_packet(self, data, client_address):
+        name = (read_frame_header(data) or (None,))[0]
+        self._sender = client_address
+        if name is None:
+            source = self._address_source(client_address)
+        else:
+            source = self._named_source(name)
+        if self.transform_of(source) is not None:
+            return super()._handle_packet(data, client_address)
+        if self.recorder is not None:
+            self.recorder.record(data, client_address)
+        if source != name:  # the clients would take the relay for the sender
+            data = replace_source(data, _source_name(source))
+        self.server.send_packets([data])
+        self.forwarded_packets += 1
+        return []
+
+    def _call_listener(self, frame_id :int = -1, time :float = 0):
+        sessions = self._source
+        super()._call_listener(frame_id, time)
+        transform = self.transform_of(sessions.source)
+        if transform is not None and not self._removing:
+            self._relay(sessions, transform)
+
+    def remove_source(self, source):
+        had_outputs = self._outputs.pop(source, None) is not None
+        self._removing = True
+        try:
+            super().remove_source(source)
+        finally:
+            self._removing = False
+        if had_outputs:   # the clients remove the sessions of the source as well
+            self.server.send_profiles([], [], [], source=_source_name(source))
+
+    def _relay(self, sessions, transform :RelayTransform):
+        """
+        transforms the sessions of the source and sends them as one frame
+        """
+        outputs = self._outputs.get(sessions.source, {})
+        relayed = {}
+        profiles = [self._transform(transform, store.profiles, outputs, relayed)
+                    for store in sessions.stores]
+        self._outputs[sessions.source] = relayed
+        self.server.send_profiles(*profiles, source=_source_name(sessions.source))
+
+    @staticmethod
+    def _transform(transform :RelayTransform, profiles :list, outputs :dict, relayed :dict) -> list:
+        # pylint: disable=too-many-locals
+        """
+        returns the relayed copies of the profiles inside the roi
+        """
+        count = len(profiles)
+        if not count:
+            return []
+        positions = np.array([p.position for p in profiles], dtype=np.float64).reshape(count, 2)
+        velocities = np.array([p.velocity for p in profiles], dtype=np.float64).reshape(count, 2)
+        positions, jacobian, inside = transform.apply(positions)
+        velocities = np.einsum("nij,nj->ni", jacobian, velocities)
+        rotation = np.arctan2(jacobian[:, 1, 0], jacobian[:, 0, 0])
+        scale_x = np.hypot(jacobian[:, 0, 0], jacobian[:, 1, 0])
+        scale_y = np.hypot(jacobian[:, 0, 1], jacobian[:, 1, 1])
+
+        profile_type = type(profiles[0])
+        fields = _FIELDS[profile_type]
+        angular = profile_type is not Cursor
+        sized = profile_type is Blob
+        assign = setattr
+        offset = transform.session_offset
+        rows = np.flatnonzero(inside).tolist()
+        positions, velocities = positions.tolist(), velocities.tolist()
+        rotation, scale_x, scale_y = rotation.tolist(), scale_x.tolist(), scale_y.tolist()
+        result = []
+        for row in rows:
+            profile = profiles[row]
+            output = outputs.get(profile)
+            if output is None:
+                output = profile_type(profile.session_id + offset)
+            for name in fields:
+                assign(output, name, getattr(profile, name))
+            assign(output, "position", tuple(positions[row]))
+            assign(output, "velocity", tuple(velocities[row]))
+            if angular:
+                assign(output, "angle", (profile.angle + rotation[row]) % (2 * math.pi))
+            if sized:
+                width, height = profile.dimension
+                assign(output, "dimension", (width * scale_x[row], height * scale_y[row]))
+            relayed[profile] = output
+            result.append(output)
+        return result
+
+
+def _source_name(source) -> str:
+    """
+    returns the TUIO source name of a source, senders without source message
+    are named after their address
+    """
+    if isinstance(source, tuple):
+        return f"tuio@{source[0]}:{source[1]}"
+    return "tuio" if source is None else str(source)
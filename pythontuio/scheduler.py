@@ -0,0 +1,83 @@
+"""
+background frame scheduler of the TuioServer.
+The frames are paced against absolute deadlines of a monotonic clock, so the
+frame rate does not drift with the time spent in sending or in sleeping.
+"""
+import threading
+import time
+
+CATCH_UP = "catch_up"   # send the missed frames back to back
+SKIP     = "skip"       # continue with the next deadline in the future
+
+
+class FrameScheduler: # pylint: disable=too-many-instance-attributes
+    """
+    calls send_frame every intervall milliseconds on its own thread.
+    missed_deadlines counts the ticks which were not sent within their intervall,
+    either skipped or, with CATCH_UP, sent late. failed_frames counts the ticks
+    whose send_frame raised, last_error keeps the exception, the pacing goes on.
+    """
+    def __init__(self, send_frame, intervall :float, policy :str = SKIP, max_catch_up :int = 5):
+        if policy not in (CATCH_UP, SKIP):
+            raise ValueError(f"unknown scheduler policy {policy}")
+        self._send_frame = send_frame
+        self.intervall = intervall
+        self.policy = policy
+        self.max_catch_up = max_catch_up        # frames sent back to back at most
+        self.frames_sent = 0
+        self.missed_deadlines = 0
+        self.failed_frames = 0
+        self.last_error : Exception = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        """
+        True while the scheduler thread is alive
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        starts the scheduler thread
+        """
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="tuio-frame-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout :float = None):
+        """
+        stops the scheduler thread and waits for it
+        """
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        period = self.intervall / 1000
+        deadline = time.monotonic()
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            if now < deadline:
+                self._stop_event.wait(deadline - now)
+                continue
+
+            behind = int((now - deadline) / period) # ticks whose slot is already over
+            if behind:
+                skipped = behind if self.policy == SKIP else max(0, behind - self.max_catch_up)
+                deadline += skipped * period
+                self.missed_deadlines += skipped
+                if behind > skipped:
+                    self.missed_deadlines += 1      # this tick is sent late
+            try:
+                self._send_frame()
+            except Exception as error: # pylint: disable=broad-except
+                self.failed_frames += 1
+                self.last_error = error
+            else:
+                self.frames_sent += 1
+            deadline += period
@@ -0,0 +1,220 @@
+"""
+ordering of the received TUIO frames by the frame id of their fseq message.
+The fseq and source messages of a bundle are read from the raw datagram before
+any message is applied, so late and duplicated bundles are dropped without
+touching the sessions or calling listeners.
+
+TUIO 1.1 servers send one bundle per profile type and all of them carry the
+same frame id, so the last frame id is kept per source and profile address.
+A frame is accepted if its id is newer than the last one of its source and
+profile, if its id is -1 or if the id jumped back by more than restart_gap
+frames, which happens when the sender restarts.
+
+replace_source renames the sender of a bundle in place of decoding and
+encoding it again, e.g. when a relay forwards it.
+"""
+import struct
+
+from pythontuio.const import TUIO_END, TUIO_SOURCE, TUIO2_FRAME
+from pythontuio.osc_layout import BUNDLE_PREFIX, BUNDLE_HEADER_SIZE, osc_string, read_string
+
+_INT = struct.Struct(">i")
+_FSEQ = TUIO_END.encode()
+_SOURCE = TUIO_SOURCE.encode()
+_SOURCE_ARG = osc_string(TUIO_SOURCE)
+_FRAME2 = osc_string(TUIO2_FRAME)
+
+
+def _message_args(data, start :int, end :int, ttype :bytes):
+    """
+    returns the type tags and the index of the first argument behind the TUIO
+    type if the message at start is of ttype, otherwise None
+    """
+    terminator = data.find(b"\x00", start, end)
+    if terminator < 0:
+        return None
+    index = terminator + 4 - (terminator - start) % 4
+    if not data.startswith(b",s", index):
+        return None
+    type_tags, index = read_string(data, index)
+    if not data.startswith(ttype + b"\x00", index):
+        return None
+    return type_tags, index + len(ttype) + 4 - len(ttype) % 4
+
+
+def _first_and_last(data, end :int):
+    """
+    returns the offsets of the first and the last element of a bundle, None if
+    it has none or its size prefixes are broken. Only the size prefixes are read
+    """
+    index = BUNDLE_HEADER_SIZE
+    first = last = None
+    while index + 4 <= end:
+        size, = _INT.unpack_from(data, index)
+        if size <= 0 or index + 4 + size > end:
+            return None
+        if first is None:
+            first = index + 4
+        last = index + 4
+        index += 4 + size
+    if last is None:
+        return None
+    return first, last
+
+
+def read_frame_header(data):
+    """
+    returns (source, frame_id, remaining, profile) of a TUIO bundle without
+    decoding it. source is None if the bundle has no source message, remaining
+    counts the fragments of the frame which still follow and profile is the
+    address of the fseq message. Returns None if the datagram is no bundle or
+    its last message is no fseq.
+    TUIO 2.0 bundles are read from their first message, the frm
+    """
+    if not data.startswith(BUNDLE_PREFIX):
+        return None
+    end = len(data)
+    elements = _first_and_last(data, end)
+    if elements is None:
+        return None
+    first, last = elements
+    if data.startswith(_FRAME2, first):
+        return _read_frame2(data, first + len(_FRAME2))
+
+    fseq = _message_args(data, last, end, _FSEQ)
+    if fseq is None:
+        return None
+    type_tags, args = fseq
+    if type_tags == ",sii":
+        frame_id, remaining = struct.unpack_from(">ii", data, args)
+    elif type_tags == ",si":
+        frame_id, = _INT.unpack_from(data, args)
+        remaining = 0
+    else:
+        return None
+
+    source = None
+    message = _message_args(data, first, end, _SOURCE)
+    if message is not None and message[0] == ",ss":
+        source, _ = read_string(data, message[1])
+    profile, _ = read_string(data, last)
+    return source, frame_id, remaining, profile
+
+
+def _read_frame2(data, index :int):
+    """
+    returns (source, frame_id, 0, TUIO2_FRAME) of the TUIO 2.0 frm message at index
+    """
+    type_tags, index = read_string(data, index)
+    if not type_tags.startswith(",i"):
+        return None
+    frame_id, = _INT.unpack_from(data, index)
+    source = None
+    if type_tags.startswith(",itis"):
+        source, _ = read_string(data, index + 16)
+    return source, frame_id, 0, TUIO2_FRAME
+
+
+def replace_source(data, source :str) -> bytes:
+    """
+    returns the TUIO bundle with source as the name@address of its sender. The
+    source messages of a TUIO 1.1 bundle are replaced, a bundle without one
+    gets one in front. A TUIO 2.0 bundle gets source in its frm message.
+    Other datagrams are returned unchanged
+    """
+    end = len(data)
+    elements = _first_and_last(data, end) if data.startswith(BUNDLE_PREFIX) else None
+    if elements is None:
+        return bytes(data)
+    first, last = elements
+    if data.startswith(_FRAME2, first):
+        return _replace_frame2_source(data, first, source)
+
+    parts = [data[:BUNDLE_HEADER_SIZE]]
+    replaced = False
+    index = BUNDLE_HEADER_SIZE
+    while index < end:
+        size, = _INT.unpack_from(data, index)
+        start, index = index + 4, index + 4 + size
+        if _message_args(data, start, index, _SOURCE) is None:
+            parts.append(data[start - 4:index])
+        else:
+            parts.append(_source_element(read_string(data, start)[0], source))
+            replaced = True
+    if not replaced:    # sent with the profile address of the fseq message
+        parts.insert(1, _source_element(read_string(data, last)[0], source))
+    return b"".join(parts)
+
+
+def _source_element(address :str, source :str) -> bytes:
+    message = osc_string(address) + osc_string(",ss") + _SOURCE_ARG + osc_string(source)
+    return _INT.pack(len(message)) + message
+
+
+def _replace_frame2_source(data, first :int, source :str) -> bytes:
+    """
+    returns the TUIO 2.0 bundle with source in the frm message at first
+    """
+    type_tags, index = read_string(data, first + len(_FRAME2))
+    if type_tags not in (",iti", ",itis"):
+        return bytes(data)
+    size, = _INT.unpack_from(data, first - 4)
+    message = _FRAME2 + osc_string(",itis") + data[index:index + 16] + osc_string(source)
+    return data[:first - 4] + _INT.pack(len(message)) + message + data[first + size:]
+
+
+class FrameSequence:
+    """
+    last frame id per source and profile address. dropped counts the discarded bundles, reordered
+    the discarded bundles which arrived after a newer one and lost the frame ids
+    which were skipped. A frame which arrives late was counted as lost before,
+    so it is taken off lost again
+    """
+    def __init__(self, restart_gap :int = 100):
+        self.restart_gap = restart_gap
+        self.dropped = 0
+        self.reordered = 0
+        self.lost = 0
+        self._last = {}
+
+    def accept(self, source, frame_id :int, remaining :int = 0, profile :str = None) -> bool:
+        """
+        True if the bundle continues the frames of the source and profile.
+        Fragments of one frame share the frame id and count their remaining
+        fragments down
+        """
+        if frame_id == -1:
+            return True
+        key = (source, profile)
+        last = self._last.get(key)
+        if last is None:
+            self._last[key] = (frame_id, remaining)
+            return True
+
+        last_id, last_remaining = last
+        gap = frame_id - last_id
+        if gap > 0 or gap < -self.restart_gap:
+            if 1 < gap <= self.restart_gap:
+                self.lost += gap - 1
+            self._last[key] = (frame_id, remaining)
+            return True
+        if gap == 0 and remaining < last_remaining:
+            self._last[key] = (frame_id, remaining)
+            return True
+
+        self.dropped += 1
+        if gap < 0 or remaining > last_remaining:
+            self.reordered += 1
+            if gap < 0 and remaining == 0 and self.lost:
+                self.lost -= 1
+        return False
+
+    def reset(self, source=None):
+        """
+        forgets the last frame ids of the source or of all sources
+        """
+        if source is None:
+            self._last.clear()
+        else:
+            for key in [key for key in self._last if key[0] == source]:
+                del self._last[key]
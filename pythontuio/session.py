@@ -0,0 +1,177 @@
+"""
+session bookkeeping of the TuioDispatcher.
+Every profile type (Cursor, Object, Blob) gets its own SessionStore which maps
+the session_id to the profile instance. This makes the alive diff and the
+lookup of a set message O(1) per session instead of scanning the profile lists.
+"""
+from typing import Dict, List, Tuple
+
+from pythontuio.tuio_profiles import Profile, Cursor, Object, Blob
+
+
+class ProfilePool:
+    """
+    recycles removed profiles of one type to avoid allocations when sessions
+    come and go quickly. A recycled profile is initialized like a new one
+    """
+    def __init__(self, profile_type, max_size :int = 1024):
+        self.profile_type = profile_type
+        self.max_size = max_size
+        self._free : List[Profile] = []
+
+    def __len__(self):
+        return len(self._free)
+
+    def acquire(self, session_id) -> Profile:
+        """
+        returns a recycled or new profile with the session_id
+        """
+        if self._free:
+            profile = self._free.pop()
+            profile.__init__(session_id) # pylint: disable=unnecessary-dunder-call
+            return profile
+        return self.profile_type(session_id)
+
+    def release(self, profile :Profile):
+        """
+        takes back a removed profile which is not used anymore
+        """
+        if len(self._free) < self.max_size:
+            self._free.append(profile)
+
+
+class SessionStore:
+    """
+    session_id keyed store of the profiles of one type.
+    `profiles` is an ordered list view of the alive sessions in the order of
+    the last alive message. If `arrays` is set, its rows follow the sessions.
+    New profiles get the source of the store.
+    """
+    def __init__(self, profile_type, source=None):
+        self.profile_type = profile_type
+        self.source = source
+        self.profiles : List[Profile] = []
+        self._sessions : Dict[int, Profile] = {}
+        self.arrays = None
+        self.pool : ProfilePool = None
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def get(self, session_id) -> Profile:
+        """
+        returns the profile of the session or None if the session is not alive
+        """
+        return self._sessions.get(session_id)
+
+    def alive(self, session_ids) -> Tuple[List[Profile], List[Profile], List[Profile]]:
+        """
+        applies the session_ids of an alive message to the store.
+        returns the lists of added, updated and removed profiles
+        """
+        old_sessions = self._sessions
+        sessions = {}
+        added = []
+        updated = []
+        for session_id in session_ids:
+            if session_id in sessions:
+                continue # session_id listed twice
+            profile = old_sessions.pop(session_id, None)
+            if profile is None:
+                profile = self._new_profile(session_id)
+                added.append(profile)
+            else:
+                updated.append(profile)
+            sessions[session_id] = profile
+
+        removed = list(old_sessions.values()) # everything not listed anymore
+        self._sessions = sessions
+        self.profiles = list(sessions.values())
+        self._update_arrays(added, removed)
+        return added, updated, removed
+
+    def apply(self, added_ids, removed_ids) -> Tuple[List[Profile], List[Profile]]:
+        """
+        applies a delta of added and removed session ids instead of a complete
+        alive message. returns the lists of added and removed profiles
+        """
+        removed = []
+        for session_id in removed_ids:
+            profile = self._sessions.pop(session_id, None)
+            if profile is not None:
+                removed.append(profile)
+        added = []
+        for session_id in added_ids:
+            if session_id not in self._sessions:
+                profile = self._new_profile(session_id)
+                self._sessions[session_id] = profile
+                added.append(profile)
+        if added or removed:
+            self.profiles = list(self._sessions.values())
+        self._update_arrays(added, removed)
+        return added, removed
+
+    def _new_profile(self, session_id) -> Profile:
+        if self.pool is None:
+            profile = self.profile_type(session_id)
+        else:
+            profile = self.pool.acquire(session_id)
+        profile.source = self.source
+        return profile
+
+    def _update_arrays(self, added, removed):
+        if self.arrays is not None:
+            for profile in removed:
+                self.arrays.remove(profile)
+            for profile in added:
+                self.arrays.add(profile)
+
+
+class SourceSessions: # pylint: disable=too-many-instance-attributes
+    """
+    session stores of one TUIO source. Every source has its own namespace of
+    session ids and its own alive diff
+    """
+    def __init__(self, source):
+        self.source = source
+        self.cursor_store = SessionStore(Cursor, source)
+        self.object_store = SessionStore(Object, source)
+        self.blob_store   = SessionStore(Blob, source)
+        self.partial_frame = False  # fragments of a frame are still missing
+        # TUIO 2.0 frames: profile type of the sessions and the buffered components
+        self.session_types : Dict[int, str] = {}
+        self.components : list = []
+        self.frame_id = -1
+        self.frame_time = 0.0
+        self.last_packet = 0.0      # monotonic time of the last packet of the source
+
+    @property
+    def stores(self) -> Tuple[SessionStore, SessionStore, SessionStore]:
+        """
+        returns the cursor, object and blob store
+        """
+        return self.cursor_store, self.object_store, self.blob_store
+
+    @property
+    def cursors(self) -> List[Cursor]:
+        """
+        alive cursors of the source
+        """
+        return self.cursor_store.profiles
+
+    @property
+    def objects(self) -> List[Object]:
+        """
+        alive objects of the source
+        """
+        return self.object_store.profiles
+
+    @property
+    def blobs(self) -> List[Blob]:
+        """
+        alive blobs of the source
+        """
+        return self.blob_store.profiles
@@ -0,0 +1,272 @@
+"""
+uniform grid index over the normalized positions of the TUIO sessions.
+The TuioDispatcher moves a profile in the index when its set message arrives
+and removes it with its session, so hit tests and neighbour queries only look
+at the cells around the query instead of all profiles.
+
+Regions are rectangles in the same coordinates. They are registered in the
+cells they overlap, a moved profile is only tested against the regions of its
+cell and the ones it was inside before. The enter and leave events are handed
+to the listeners with the frame.
+"""
+import math
+
+from pythontuio.tuio_profiles import Cursor, Object, Blob
+
+ENTER = "enter"
+LEAVE = "leave"
+
+
+class Region:
+    """
+    rectangle from (x0, y0) to (x1, y1) which reports the profiles of
+    profile_types entering and leaving it
+    """
+    def __init__(self, name, x0 :float, y0 :float, x1 :float, y1 :float,
+                 profile_types=(Cursor, Object, Blob)):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self.name = name
+        self.bounds = (min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+        self.profile_types = tuple(profile_types)
+
+    def contains(self, x :float, y :float) -> bool:
+        """
+        True if the point lies inside the rectangle or on its border
+        """
+        x0, y0, x1, y1 = self.bounds
+        return x0 <= x <= x1 and y0 <= y <= y1
+
+    def __repr__(self):
+        return f"Region({self.name!r}, {self.bounds})"
+
+
+class GridIndex:
+    """
+    profiles of one type in cells x cells buckets over the unit square.
+    Positions outside of it are clamped into the border cells
+    """
+    def __init__(self, cells :int = 32):
+        self.cells = cells
+        self._grid = {}         # (cx, cy) -> set of profiles
+        self._cell_of = {}      # profile -> (cx, cy)
+
+    def __len__(self):
+        return len(self._cell_of)
+
+    def __contains__(self, profile):
+        return profile in self._cell_of
+
+    def cell(self, x :float, y :float) -> tuple:
+        """
+        returns the cell of a position
+        """
+        last = self.cells - 1
+        return (min(last, max(0, int(x * self.cells))), min(last, max(0, int(y * self.cells))))
+
+    def move(self, profile):
+        """
+        inserts the profile or moves it to the cell of its current position
+        """
+        cell = self.cell(*profile.position)
+        old = self._cell_of.get(profile)
+        if old == cell:
+            return
+        if old is not None:
+            self._discard(old, profile)
+        self._cell_of[profile] = cell
+        bucket = self._grid.get(cell)
+        if bucket is None:
+            bucket = self._grid[cell] = set()
+        bucket.add(profile)
+
+    def remove(self, profile):
+        """
+        removes the profile if it is in the index
+        """
+        cell = self._cell_of.pop(profile, None)
+        if cell is not None:
+            self._discard(cell, profile)
+
+    def clear(self):
+        """
+        removes all profiles
+        """
+        self._grid.clear()
+        self._cell_of.clear()
+
+    def _discard(self, cell, profile):
+        bucket = self._grid[cell]
+        bucket.discard(profile)
+        if not bucket:
+            del self._grid[cell]
+
+    def _cells_in(self, x0 :float, y0 :float, x1 :float, y1 :float):
+        cx0, cy0 = self.cell(x0, y0)
+        cx1, cy1 = self.cell(x1, y1)
+        grid = self._grid
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = grid.get((cx, cy))
+                if bucket:
+                    yield bucket
+
+    def region(self, x0 :float, y0 :float, x1 :float, y1 :float) -> list:
+        """
+        returns the profiles inside the rectangle
+        """
+        found = []
+        for bucket in self._cells_in(x0, y0, x1, y1):
+            for profile in bucket:
+                x, y = profile.position
+                if x0 <= x <= x1 and y0 <= y <= y1:
+                    found.append(profile)
+        return found
+
+    def radius(self, x :float, y :float, radius :float) -> list:
+        """
+        returns the profiles within radius of the point
+        """
+        found = []
+        square = radius * radius
+        for bucket in self._cells_in(x - radius, y - radius, x + radius, y + radius):
+            for profile in bucket:
+                px, py = profile.position
+                if (px - x) ** 2 + (py - y) ** 2 <= square:
+                    found.append(profile)
+        return found
+
+    def nearest(self, x :float, y :float, k :int = 1) -> list:
+        """
+        returns the k profiles next to the point, the nearest first. The rings of
+        cells around the point are searched until no closer profile can follow
+        """
+        if not self._cell_of:
+            return []
+        cx, cy = self.cell(x, y)
+        size = 1 / self.cells
+        candidates = []
+        for ring in range(self.cells):
+            for cell in _ring(cx, cy, ring):
+                for profile in self._grid.get(cell, ()):
+                    px, py = profile.position
+                    candidates.append(((px - x) ** 2 + (py - y) ** 2, profile))
+            if len(candidates) >= k:
+                candidates.sort(key=lambda candidate: candidate[0])
+                # profiles outside of the searched rings are at least this far away
+                if math.sqrt(candidates[k - 1][0]) <= ring * size:
+                    break
+        candidates.sort(key=lambda candidate: candidate[0])
+        return [profile for _, profile in candidates[:k]]
+
+
+def _ring(cx :int, cy :int, ring :int):
+    """
+    yields the cells at chebyshev distance ring around (cx, cy)
+    """
+    if ring == 0:
+        yield (cx, cy)
+        return
+    for dx in range(-ring, ring + 1):
+        yield (cx + dx, cy - ring)
+        yield (cx + dx, cy + ring)
+    for dy in range(-ring + 1, ring):
+        yield (cx - ring, cy + dy)
+        yield (cx + ring, cy + dy)
+
+
+class SpatialIndex: # pylint: disable=too-many-instance-attributes
+    """
+    grid indexes of cursors, objects and blobs and the regions watched for
+    enter and leave events
+    """
+    def __init__(self, cells :int = 32):
+        self.cells = cells
+        self.cursors = GridIndex(cells)
+        self.objects = GridIndex(cells)
+        self.blobs   = GridIndex(cells)
+        self._indexes = {Cursor : self.cursors, Object : self.objects, Blob : self.blobs}
+        self.regions = []
+        self._region_grid = GridIndex(cells) # only used for its cell mapping
+        self._regions_of = {}   # (cx, cy) -> list of regions
+        self._inside = {}       # profile -> dict of the regions it is inside
+        self._events = []
+
+    def index(self, profile_type) -> GridIndex:
+        """
+        returns the index of Cursor, Object or Blob
+        """
+        return self._indexes[profile_type]
+
+    def add_region(self, region :Region) -> Region:
+        """
+        watches the region. Profiles already inside enter it with their next move
+        """
+        self.regions.append(region)
+        x0, y0, x1, y1 = region.bounds
+        (cx0, cy0), (cx1, cy1) = self._region_grid.cell(x0, y0), self._region_grid.cell(x1, y1)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self._regions_of.setdefault((cx, cy), []).append(region)
+        return region
+
+    def remove_region(self, region :Region):
+        """
+        stops watching the region, the profiles inside leave it
+        """
+        self.regions.remove(region)
+        for cell, regions in list(self._regions_of.items()):
+            if region in regions:
+                regions.remove(region)
+                if not regions:
+                    del self._regions_of[cell]
+        for profile, inside in self._inside.items():
+            if inside.pop(region, None) is not None:
+                self._events.append((LEAVE, profile, region))
+
+    def move(self, profile):
+        """
+        updates the profile after a set message and checks its regions
+        """
+        self._indexes[type(profile)].move(profile)
+        if self._regions_of or profile in self._inside:
+            self._check_regions(profile)
+
+    def remove(self, profile):
+        """
+        removes the profile of an ended session, it leaves all its regions
+        """
+        self._indexes[type(profile)].remove(profile)
+        for region in self._inside.pop(profile, ()):
+            self._events.append((LEAVE, profile, region))
+
+    def _check_regions(self, profile):
+        x, y = profile.position
+        candidates = self._regions_of.get(self._region_grid.cell(x, y), ())
+        old = self._inside.get(profile, {})
+        inside = {region : True for region in candidates
+                  if isinstance(profile, region.profile_types) and region.contains(x, y)}
+        for region in old:
+            if region not in inside:
+                self._events.append((LEAVE, profile, region))
+        for region in inside:
+            if region not in old:
+                self._events.append((ENTER, profile, region))
+        if inside:
+            self._inside[profile] = inside
+        else:
+            self._inside.pop(profile, None)
+
+    def inside(self, profile) -> list:
+        """
+        returns the regions the profile is inside
+        """
+        return list(self._inside.get(profile, ()))
+
+    def pop_events(self) -> list:
+        """
+        returns the (kind, profile, region) events since the last call, kind is
+        ENTER or LEAVE
+        """
+        events = self._events
+        self._events = []
+        return events
@@ -0,0 +1,270 @@
+"""
+TUIO over TCP. A stream does not lose bundles, so a remote client never misses
+the alive message which removes a session. The OSC packets are framed like
+OSC 1.0 does it for streams, with an int32 size prefix, or like OSC 1.1 with
+double ended SLIP:
+
+    SIZE_PREFIX   | size | packet | size | packet | ...
+    SLIP          END packet END END packet END ...   END and ESC in packets escaped
+
+The TuioStreamClient listens like the TuioClient does and the TuioServer
+connects to it with add_stream. Every frame is written with one send per
+connection, the client reads into a reusable buffer and cuts the packets out
+incrementally.
+"""
+import selectors
+import socket
+import struct
+import threading
+import traceback
+from typing import Tuple
+
+from pythontuio.dispatcher import TuioDispatcher
+from pythontuio.decoder import TuioDecoder
+
+SIZE_PREFIX = "size"
+SLIP = "slip"
+MAX_PACKET_SIZE = 1 << 20   # bigger frames are split into fragments like for UDP
+
+_SIZE = struct.Struct(">i")
+_END, _ESC, _ESC_END, _ESC_ESC = b"\xc0", b"\xdb", b"\xdc", b"\xdd"
+
+
+def slip_encode(packet) -> bytes:
+    """
+    returns the packet escaped and enclosed in END bytes
+    """
+    packet = bytes(packet).replace(_ESC, _ESC + _ESC_ESC).replace(_END, _ESC + _ESC_END)
+    return _END + packet + _END
+
+
+def slip_decode(data) -> bytes:
+    """
+    returns the packet of the escaped data between two END bytes
+    """
+    return bytes(data).replace(_ESC + _ESC_END, _END).replace(_ESC + _ESC_ESC, _ESC)
+
+
+def frame_packets(packets, framing :str = SIZE_PREFIX) -> bytes:
+    """
+    returns the packets framed for a stream, joined for a single send
+    """
+    if framing == SIZE_PREFIX:
+        return b"".join(_SIZE.pack(len(packet)) + bytes(packet) for packet in packets)
+    if framing == SLIP:
+        return b"".join(slip_encode(packet) for packet in packets)
+    raise ValueError(f"unknown framing {framing}")
+
+
+class StreamDecoder:
+    """
+    cuts the OSC packets out of the received chunks of a stream. An incomplete
+    packet stays in the buffer until the rest of it is fed
+    """
+    def __init__(self, framing :str = SIZE_PREFIX, max_packet_size :int = MAX_PACKET_SIZE):
+        if framing not in (SIZE_PREFIX, SLIP):
+            raise ValueError(f"unknown framing {framing}")
+        self.framing = framing
+        self.max_packet_size = max_packet_size
+        self._buffer = bytearray()
+
+    def __len__(self):
+        return len(self._buffer)
+
+    def feed(self, data) -> list:
+        """
+        appends the chunk and returns the packets it completed
+        """
+        buffer = self._buffer
+        buffer += data
+        if self.framing == SIZE_PREFIX:
+            packets, offset = self._sized(buffer)
+        else:
+            packets, offset = self._slip(buffer)
+        if offset:
+            del buffer[:offset]
+        return packets
+
+    def _sized(self, buffer):
+        packets = []
+        offset = 0
+        end = len(buffer)
+        while offset + 4 <= end:
+            size, = _SIZE.unpack_from(buffer, offset)
+            if size < 0 or size > self.max_packet_size:
+                raise ValueError(f"invalid packet size {size} in stream")
+            if offset + 4 + size > end:
+                break
+            packets.append(bytes(buffer[offset + 4:offset + 4 + size]))
+            offset += 4 + size
+        return packets, offset
+
+    def _slip(self, buffer):
+        packets = []
+        offset = 0
+        while True:
+            end = buffer.find(_END, offset)
+            if end < 0:
+                if len(buffer) - offset > self.max_packet_size:
+                    raise ValueError("SLIP packet exceeds max_packet_size")
+                return packets, offset
+            if end > offset:    # consecutive END bytes enclose no packet
+                packets.append(slip_decode(buffer[offset:end]))
+            offset = end + 1
+
+
+class StreamWriter:
+    """
+    connection of a TuioServer to a TuioStreamClient
+    """
+    def __init__(self, address :Tuple[str, int], framing :str = SIZE_PREFIX, timeout :float = 5.0):
+        if framing not in (SIZE_PREFIX, SLIP):
+            raise ValueError(f"unknown framing {framing}")
+        self.address = address
+        self.framing = framing
+        self.sock = socket.create_connection(address, timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def write(self, packets) -> int:
+        """
+        writes the packets of one frame with a single send and returns the written bytes
+        """
+        data = frame_packets(packets, self.framing)
+        self.sock.sendall(data)
+        return len(data)
+
+    def close(self):
+        """
+        closes the connection
+        """
+        self.sock.close()
+
+
+def _listen_socket(address :Tuple[str, int]) -> socket.socket:
+    """
+    returns a TCP socket listening on address, socket.create_server needs python 3.8
+    """
+    host, port = address
+    family, kind, proto, _, sockaddr = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM,
+                                                          0, socket.AI_PASSIVE)[0]
+    sock = socket.socket(family, kind, proto)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(sockaddr)
+        sock.listen()
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class TuioStreamClient(TuioDispatcher): # pylint: disable=too-many-instance-attributes
+    """
+    TuioClient which accepts TCP connections of TuioServers. All connections
+    are read by one receive thread, which calls the listeners. Every connection
+    is its own source unless its bundles have source messages. The sessions of
+    a connection are removed when it is closed
+    """
+    def __init__(self, server_address: Tuple[str, int], framing :str = SIZE_PREFIX,
+                 fast_decoder :bool = False, receive_size :int = 1 << 16):
+        TuioDispatcher.__init__(self)
+        if fast_decoder:
+            self._decoder = TuioDecoder(self)
+        self.server_address = server_address
+        self.framing = framing
+        self.source_timeout = None  # the sessions of a connection are removed when it is closed
+        self._receive_buffer = bytearray(receive_size)
+        self._listen : socket.socket = None
+        self._selector : selectors.BaseSelector = None
+        self._thread : threading.Thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        """
+        True while the receive thread is alive
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        binds server_address and starts the receive thread
+        """
+        if self.running:
+            return
+        self._listen = _listen_socket(self.server_address)
+        self._listen.setblocking(False)
+        self.server_address = self._listen.getsockname()[:2]
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listen, selectors.EVENT_READ)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tuio-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout :float = None):
+        """
+        stops the receive thread and closes all connections
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        for key in list(self._selector.get_map().values()):
+            key.fileobj.close()
+        self._selector.close()
+
+    def _run(self):
+        view = memoryview(self._receive_buffer)
+        while not self._stop.is_set():
+            for key, _ in self._selector.select(timeout=0.1):
+                if key.fileobj is self._listen:
+                    self._accept()
+                else:
+                    self._receive(key, view)
+
+    def _accept(self):
+        try:
+            connection, address = self._listen.accept()
+        except BlockingIOError:
+            return
+        connection.setblocking(False)
+        self._selector.register(connection, selectors.EVENT_READ,
+                                (address, StreamDecoder(self.framing), set()))
+
+    def _receive(self, key, view):
+        address, decoder, sources = key.data
+        try:
+            size = key.fileobj.recv_into(view)
+        except BlockingIOError:
+            return
+        except OSError:
+            size = 0
+            if self.metrics is not None:
+                self.metrics.inc("socket_errors_total")
+        try:
+            packets = decoder.feed(view[:size]) if size else None
+        except ValueError:  # the framing is broken, the stream can not be resynchronized
+            if self.metrics is not None:
+                self.metrics.inc("handler_errors_total")
+            packets = None
+        if packets is None:
+            self._close(key.fileobj, sources)
+            return
+        for packet in packets:
+            try:
+                self.call_handlers_for_packet(packet, address)
+            except Exception: # pylint: disable=broad-except
+                if self.metrics is not None:
+                    self.metrics.inc("handler_errors_total")
+                traceback.print_exc()
+            sources.add(self._source.source)
+
+    def _close(self, connection, sources):
+        """
+        closes a connection and removes the sessions it sent
+        """
+        self._selector.unregister(connection)
+        connection.close()
+        for source in sources:
+            self.remove_source(source)
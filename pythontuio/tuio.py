@@ -3,25 +3,36 @@
               TuioDispatcher
                     |
                     |
-            ---------------------
-            |                   |
-        TuioClient          TuioServer
+            ---------------------------------------
+            |                   |                 |
+        TuioClient      AsyncTuioClient       TuioServer
 
 
 """
 
 
+import asyncio
+import inspect
+import socket
+import threading
+import time
+import traceback
 from typing import  Tuple
 
 
 from pythonosc.udp_client import UDPClient
 from pythonosc.osc_server import BlockingOSCUDPServer
 
-from pythonosc.osc_message_builder import OscMessageBuilder
-from pythonosc.osc_bundle_builder import OscBundleBuilder
-from pythontuio.const import TUIO_BLOB, TUIO_CURSOR, TUIO_OBJECT
+from pythontuio.const import UDP_MAX_DATAGRAM
 from pythontuio.dispatcher import TuioDispatcher
+from pythontuio.decoder import TuioDecoder
+from pythontuio.encoder import TuioEncoder, cursor_payload, object_payload, blob_payload
+from pythontuio.tuio2 import Tuio2Encoder
+from pythontuio.kinematics import TuioKinematics
+from pythontuio.scheduler import FrameScheduler, SKIP
+from pythontuio.stream import StreamWriter, SIZE_PREFIX, MAX_PACKET_SIZE
 
+_MAX_FRAME_ID = 2**31 - 1   # fseq is a int32, the frame ids wrap around to 1
 
 
 class TuioClient(TuioDispatcher, BlockingOSCUDPServer): # pylint: disable=too-many-ancestors
@@ -31,12 +42,29 @@ class TuioClient(TuioDispatcher, BlockingOSCUDPServer): # pylint: disable=too-ma
     In order to receive and decode TUIO messages an instance of TuioClient needs to be created.
     The TuioClient instance then generates TUIO events which are broadcasted to all
     registered classes that implement the TuioListener interface.
+
+    With fast_decoder the TUIO 1.1 messages are decoded by the TuioDecoder
+    instead of the generic address pattern dispatch of python-osc.
+
+    With drain every wakeup reads all pending datagrams of the socket. Their
+    state is applied, but the listeners get one collapsed frame with the net
+    events since the last delivered frame, so a backlog after a stall costs one
+    round of listener calls instead of one per stale frame.
+    receive_buffer sets SO_RCVBUF, the size of the backlog the kernel keeps.
     """
-    def __init__(self, server_address: Tuple[str, int]): # pylint: disable=W0231
+    max_packet_size = UDP_MAX_DATAGRAM  # socketserver truncates at 8192 bytes by default
+
+    def __init__(self, server_address: Tuple[str, int], # pylint: disable=W0231
+                 fast_decoder: bool = False, drain: bool = False, receive_buffer: int = None):
         TuioDispatcher.__init__(self)
         self._dispatcher = self
+        if fast_decoder:
+            self._decoder = TuioDecoder(self)
         self.connected = False
         self.server_address = server_address
+        self.drain = drain
+        self.drain_limit = 4096     # datagrams per wakeup, so a flood can not starve the listeners
+        self.receive_buffer = receive_buffer
     def start(self):
         """
         start serving for UDP OSC packages
@@ -45,102 +73,511 @@ class TuioClient(TuioDispatcher, BlockingOSCUDPServer): # pylint: disable=too-ma
         BlockingOSCUDPServer.__init__(self,self.server_address, self)
         self.serve_forever()
 
-class TuioServer(TuioDispatcher, UDPClient):
+    def server_bind(self):
+        if self.receive_buffer is not None:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer)
+        if self.drain:
+            self.socket.setblocking(False)
+        BlockingOSCUDPServer.server_bind(self)
+
+    def _handle_request_noblock(self):
+        if not self.drain:
+            BlockingOSCUDPServer._handle_request_noblock(self)
+            return
+        self.hold_frames()
+        try:
+            for _ in range(self.drain_limit):
+                try:
+                    data, client_address = self.socket.recvfrom(self.max_packet_size)
+                except BlockingIOError:
+                    break
+                except OSError:
+                    if self.metrics is not None:
+                        self.metrics.inc("socket_errors_total")
+                    break
+                try:
+                    self.call_handlers_for_packet(data, client_address)
+                except Exception: # pylint: disable=broad-except
+                    self.handle_error((data, self.socket), client_address)
+        finally:
+            self.release_frames()
+
+    def get_request(self):
+        try:
+            return BlockingOSCUDPServer.get_request(self)
+        except OSError:
+            if self.metrics is not None:
+                self.metrics.inc("socket_errors_total")
+            raise
+
+    def handle_error(self, request, client_address):
+        if self.metrics is not None:
+            self.metrics.inc("handler_errors_total")
+        BlockingOSCUDPServer.handle_error(self, request, client_address)
+
+class _TuioProtocol(asyncio.DatagramProtocol):
+    """
+    asyncio protocol which feeds the received datagrams into the AsyncTuioClient
+    """
+    def __init__(self, client):
+        self._client = client
+
+    def datagram_received(self, data, addr):
+        self._client.call_handlers_for_packet(data, addr)
+
+    def error_received(self, exc):
+        if self._client.metrics is not None:
+            self._client.metrics.inc("socket_errors_total")
+
+
+class AsyncTuioClient(TuioDispatcher):
+    """
+    TuioClient for asyncio applications. It receives with a datagram endpoint
+    of the running event loop, so one loop serves any number of ports.
+    Listener callbacks may be coroutines, they are awaited in order by a
+    worker task, so slow listeners do not block the receiving.
+    Completed frames can also be consumed with `async for frame in client`.
+    """
+    def __init__(self, server_address: Tuple[str, int], fast_decoder: bool = False):
+        TuioDispatcher.__init__(self)
+        if fast_decoder:
+            self._decoder = TuioDecoder(self)
+        self.server_address = server_address
+        self.transport = None
+        self._frames : asyncio.Queue = None
+        self._subscribers : list = []
+        self._worker : asyncio.Task = None
+
+    async def start(self):
+        """
+        binds the server_address and starts the listener task
+        """
+        loop = asyncio.get_running_loop()
+        self._frames = asyncio.Queue()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: _TuioProtocol(self), local_addr=self.server_address)
+        self._worker = loop.create_task(self._run_listeners())
+
+    def close(self):
+        """
+        closes the endpoint and stops the listener task
+        """
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        for subscriber in self._subscribers:
+            subscriber.put_nowait(None)
+
+    def _dispatch(self, frame):
+        self._frames.put_nowait(frame)
+
+    async def _run_listeners(self):
+        while True:
+            frame = await self._frames.get()
+            for listener in list(self._listener):
+                if not listener.wants(frame):
+                    continue
+                try:
+                    await self._call_listener_callbacks(listener, frame)
+                except Exception: # pylint: disable=broad-except
+                    if self.metrics is not None:
+                        self.metrics.inc("handler_errors_total")
+                    traceback.print_exc()
+            if self._subscribers:
+                for subscriber in self._subscribers:
+                    subscriber.put_nowait(frame)
+            else: # iterated frames may still be read, their profiles are not recycled
+                self._release_removed(frame)
+
+    async def _call_listener_callbacks(self, listener, frame):
+        """
+        calls the callbacks of the listener for the frame and awaits the coroutines
+        """
+        metrics = self.metrics
+        start = None if metrics is None else metrics.clock()
+        for result in listener.callbacks(frame):
+            if inspect.isawaitable(result):
+                await result
+        if metrics is not None:
+            metrics.observe("listener_seconds", metrics.clock() - start,
+                            (("listener", listener.name),))
+
+    def enable_metrics(self, metrics=None):
+        metrics = TuioDispatcher.enable_metrics(self, metrics)
+        metrics.gauge("dispatch_queue_depth",
+                      lambda: 0 if self._frames is None else self._frames.qsize())
+        return metrics
+
+    def frames(self):
+        """
+        returns an async iterator of the completed frames. It receives every
+        frame completed after this call and ends when the client is closed
+        """
+        return _FrameIterator(self._subscribers)
+
+    def __aiter__(self):
+        return self.frames()
+
+
+class _FrameIterator:
+    """
+    async iterator over the frames of an AsyncTuioClient
+    """
+    def __init__(self, subscribers :list):
+        self._subscribers = subscribers
+        self._queue = asyncio.Queue()
+        subscribers.append(self._queue)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        frame = await self._queue.get()
+        if frame is None:
+            self.aclose()
+            raise StopAsyncIteration
+        return frame
+
+    def aclose(self):
+        """
+        stops receiving frames
+        """
+        if self._queue in self._subscribers:
+            self._subscribers.remove(self._queue)
+
+
+class TuioServer(TuioDispatcher, UDPClient): # pylint: disable=too-many-instance-attributes
 
     """
     Tuio client based on a basic osc udp client of the lib python-osc
 
-    Notice that TuioSource is not implemented yet
+    Frames bigger than max_datagram_size are split into several bundles. Each of
+    them carries the alive messages of its profiles and a fseq, the TuioClient
+    reassembles them into one frame. Use 1472 to stay below a ethernet MTU.
+    The frames are numbered from 1 upwards, so clients can drop late bundles.
+
+    With version=2 the frames are sent as TUIO 2.0 bundles with one alv message
+    and the send time in the frm message. The session ids then have to be unique
+    over cursors, objects and blobs, and a frame is never split.
+
+    A frame is encoded once and the same bundles are sent to every destination,
+    (ip, port) is the first one. More can be given as destinations or added at
+    runtime, including multicast groups and the broadcast address.
+
+    With stream set to SIZE_PREFIX or SLIP (see pythontuio.stream) (ip, port) is
+    a TuioStreamClient the server connects to over TCP instead. Streams get a
+    frame in one bundle unless UDP destinations are added as well
     """
 
-    def __init__(self, ip: str ="127.0.0.1" , port :int=3333):
+    def __init__(self, ip: str ="127.0.0.1" , port :int=3333,
+                 max_datagram_size :int=UDP_MAX_DATAGRAM, version :int = 1,
+                 destinations=(), stream :str = None):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        if version not in (1, 2):
+            raise ValueError(f"unknown TUIO version {version}")
         UDPClient.__init__(self,ip, port)
         TuioDispatcher.__init__(self)
         self._ip = ip
         self._port = port
+        self.version = version
+        self._encoder = TuioEncoder() if version == 1 else Tuio2Encoder()
+        self.max_datagram_size = max_datagram_size
 
-        self.is_full_update : bool = False
+        self.is_full_update : bool = True    # False sends set messages only for changed profiles
         self._periodic_messages : bool = False
         self._intervall : int = 1000
+        self._last_full_update : float = 0
+        self._sent_payloads = {}                # profile -> set values of the last bundle
+        self._source_name : str = None       # name@ip of the source messages
+        self.frame_id : int = 0                 # fseq of the last sent frame
+        self.lock = threading.RLock()
+        self.scheduler : FrameScheduler = None
+        self.kinematics : TuioKinematics = None
+        self._family = self._sock.family
+        self._destinations = {}                 # (host, port) -> resolved socket address
+        self._targets : tuple = ()              # socket addresses send_bundle sends to
+        self._streams = {}                      # (host, port) -> StreamWriter
+        if stream is None:
+            destinations = ((ip, port),) + tuple(destinations)
+        else:
+            self.add_stream(ip, port, stream)
+        for host, destination_port in destinations:
+            self.add_destination(host, destination_port)
 
-    @staticmethod
-    def _build_alive(address, profile_list):
+    def send_bundle(self):
         """
-        builds a OSC which implements a alive message of TUIO
-        returns the message
+        encodes the alive, set and fseq messages of the profiles into
+        TUIO bundles of at most max_datagram_size bytes and sends them.
+        Without is_full_update only changed profiles get a set message,
+        except for the periodic full updates.
+        The profiles are read while holding lock, so threads which change
+        them while the frame scheduler is running should hold it as well
         """
-        builder = OscMessageBuilder(address=address)
-        builder.add_arg("alive")
-        for profile in profile_list:
-            builder.add_arg(profile.session_id) ## add id of cursors
-
-        alive_msg = builder.build()
-        return alive_msg
-    def send_bundle(self):
-        """Build :class:`OscMessage` from arguments and send to server
-
-        Args:
-            address: OSC address the message shall go to
-            value: One or more arguments to be added to the message
+        with self.lock:
+            metrics = self.metrics
+            start = None if metrics is None else metrics.clock()
+            self.frame_id = self.frame_id % _MAX_FRAME_ID + 1
+            if self.kinematics is not None:
+                self.kinematics.update(self.cursors, self.objects, self.blobs)
+            full_update = self.is_full_update or self._full_update_due()
+            if self.is_full_update:
+                sent, updates = None, None
+            else:
+                sent, updates = self._changed_profiles(full_update)
+
+            bundles = self._encoder.encode_fragments(self.cursors, self.objects, self.blobs,
+                                                     self.frame_id, max_size=self._max_size(),
+                                                     updates=updates, source=self._source_name)
+            if metrics is not None:
+                metrics.observe("encode_seconds", metrics.clock() - start)
+                metrics.inc("frames_total")
+            self._send(bundles, metrics)
+
+            if sent is not None:
+                self._sent_payloads = sent
+            if full_update:
+                self._last_full_update = time.monotonic()
+
+    def _changed_profiles(self, full_update :bool):
+        """
+        returns the set values of all profiles keyed by profile and the cursors,
+        objects and blobs whose values differ from the ones of the last bundle
+        """
+        last = self._sent_payloads
+        sent = {}
+        updates = []
+        for profiles, payload in ((self.cursors, cursor_payload), (self.objects, object_payload),
+                                  (self.blobs, blob_payload)):
+            changed = []
+            for profile in profiles:
+                values = sent[profile] = payload(profile)
+                if full_update or last.get(profile) != values:
+                    changed.append(profile)
+            updates.append(changed)
+        return sent, tuple(updates)
+
+    def send_profiles(self, cursors, objects, blobs, source :str = None):
+        """
+        encodes and sends a frame of other profiles than the ones of the server,
+        e.g. the transformed profiles of a TuioRelay. All profiles get a set
+        message, source defaults to the source of the server
         """
+        with self.lock:
+            metrics = self.metrics
+            start = None if metrics is None else metrics.clock()
+            self.frame_id = self.frame_id % _MAX_FRAME_ID + 1
+            bundles = self._encoder.encode_fragments(cursors, objects, blobs, self.frame_id,
+                                                     max_size=self._max_size(),
+                                                     source=source or self._source_name)
+            if metrics is not None:
+                metrics.observe("encode_seconds", metrics.clock() - start)
+                metrics.inc("frames_total")
+            self._send(bundles, metrics)
+
+    def send_packets(self, packets):
+        """
+        sends already encoded packets unchanged to all destinations
+        """
+        with self.lock:
+            self._send(packets, self.metrics)
 
-        bundle_builder = OscBundleBuilder(0)
+    def _max_size(self) -> int:
+        """
+        size limit of the bundles, streams take big frames in one bundle
+        """
+        return self.max_datagram_size if self._targets or not self._streams else MAX_PACKET_SIZE
 
-        # build alive message
+    def _send(self, bundles, metrics):
+        """
+        sends every bundle to all destinations. A failing destination does not
+        keep the others from getting the frame, the first error is raised afterwards
+        """
+        sendto = self._sock.sendto
+        targets = self._targets
+        error = None
+        for bundle in bundles:
+            for target in targets:
+                try:
+                    sendto(bundle, target)
+                except OSError as exception:
+                    if metrics is not None:
+                        metrics.inc("socket_errors_total")
+                    error = error or exception
+                    continue
+                if metrics is not None:
+                    metrics.inc("packets_total")
+                    metrics.inc("bytes_total", len(bundle))
+        for key, writer in list(self._streams.items()):
+            try:
+                written = writer.write(bundles)
+            except OSError as exception: # the client is gone, it has to be added again
+                writer.close()
+                del self._streams[key]
+                if metrics is not None:
+                    metrics.inc("socket_errors_total")
+                error = error or exception
+                continue
+            if metrics is not None:
+                metrics.inc("packets_total", len(bundles))
+                metrics.inc("bytes_total", written)
+        if error is not None:
+            raise error
+
+    @property
+    def destinations(self) -> list:
+        """
+        the (host, port) pairs the frames are sent to
+        """
+        return list(self._destinations)
 
-        bundle_builder.add_content(TuioServer._build_alive(TUIO_CURSOR,self.cursors))
+    def add_destination(self, host :str, port :int):
+        """
+        sends the following frames to host:port as well. The host is resolved once
+        """
+        info = socket.getaddrinfo(host, port, self._family, socket.SOCK_DGRAM)
+        with self.lock:
+            self._destinations[(host, port)] = info[0][4]
+            self._targets = tuple(self._destinations.values())
 
-        bundle_builder.add_content(TuioServer._build_alive(TUIO_BLOB,self.blobs))
+    def remove_destination(self, host :str, port :int):
+        """
+        stops sending frames to host:port
+        """
+        with self.lock:
+            del self._destinations[(host, port)]
+            self._targets = tuple(self._destinations.values())
 
-        bundle_builder.add_content(TuioServer._build_alive(TUIO_OBJECT,self.objects))
+    @property
+    def streams(self) -> list:
+        """
+        the (host, port) pairs of the connected TuioStreamClients
+        """
+        return list(self._streams)
 
+    def add_stream(self, host :str, port :int, framing :str = SIZE_PREFIX, timeout :float = 5.0):
+        """
+        connects to the TuioStreamClient at host:port and writes the following
+        frames to it with the SIZE_PREFIX or SLIP framing. A write blocks up to
+        timeout seconds if the client does not keep up
+        """
+        writer = StreamWriter((host, port), framing, timeout)
+        with self.lock:
+            old = self._streams.pop((host, port), None)
+            if old is not None:
+                old.close()
+            self._streams[(host, port)] = writer
+
+    def remove_stream(self, host :str, port :int):
+        """
+        closes the connection to the TuioStreamClient at host:port
+        """
+        with self.lock:
+            self._streams.pop((host, port)).close()
 
-        # set message of cursor
-        for cursor in self.cursors:
-            cursor_msg = cursor.get_message()
-            bundle_builder.add_content(cursor_msg)
+    def add_multicast_group(self, group :str, port :int = None, ttl :int = 1, loop :bool = True):
+        """
+        sends the frames to a multicast group, so any number of clients which
+        joined it get them with a single send. ttl limits the routers the
+        datagrams pass, loop delivers them to clients on this host as well.
+        An IPv6 server sets the hop limit instead of the ttl
+        """
+        if self._family == socket.AF_INET6:
+            self._sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_HOPS, ttl)
+            self._sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_LOOP, int(loop))
+        else:
+            self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+            self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, int(loop))
+        self.add_destination(group, self._port if port is None else port)
+
+    def add_broadcast(self, port :int = None, address :str = "255.255.255.255"):
+        """
+        sends the frames to all hosts of the local network
+        """
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        self.add_destination(address, self._port if port is None else port)
 
-        # set message of blob
-        for blob in self.blobs:
-            blob_msg = blob.get_message()
-            bundle_builder.add_content(blob_msg)
+    def enable_metrics(self, metrics=None):
+        metrics = TuioDispatcher.enable_metrics(self, metrics)
+        metrics.gauge("missed_deadlines",
+                      lambda: 0 if self.scheduler is None else self.scheduler.missed_deadlines)
+        return metrics
 
-        # set message of object
-        for o in self.objects:
-            object_msg = o.get_message()
-            bundle_builder.add_content(object_msg)
+    def enable_kinematics(self) -> TuioKinematics:
+        """
+        derives velocity, motion_acceleration, velocity_rotation and rotation_acceleration
+        of all profiles from their positions and angles at every send_bundle.
+        Requires numpy
+        """
+        if self.kinematics is None:
+            self.kinematics = TuioKinematics()
+        return self.kinematics
 
-        # message fseq to end the bundle and send (optinal) frame id
-        builder = OscMessageBuilder(address=TUIO_CURSOR)
-        builder.add_arg("fseq")
-        builder.add_arg(-1)
-        fseq = builder.build()
-        bundle_builder.add_content(fseq)
+    def disable_kinematics(self):
+        """
+        stops deriving the motion fields, they keep their last values
+        """
+        self.kinematics = None
 
-        # build bundle and send
-        bundle = bundle_builder.build()
-        self.send(bundle)
+    def _full_update_due(self) -> bool:
+        """
+        True if the periodic full update intervall elapsed
+        """
+        if not self._periodic_messages:
+            return False
+        return (time.monotonic() - self._last_full_update) * 1000 >= self._intervall
 
-    def disable_periodic_messages(self, ):
+    def disable_periodic_messages(self):
         """
-        Not implemented
+        stops the periodic full updates and the frame scheduler
         """
         self._periodic_messages = False
-        raise Exception("Not implemented")
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
 
-    def enable_periodic_messages(self, intervall:int):
+    def enable_periodic_messages(self, intervall :int = 1000, frame_intervall :float = None,
+                                 policy :str = SKIP):
         """
-        Not implemented
+        sends the set messages of all profiles at least every intervall milliseconds,
+        even if they did not change. Used together with is_full_update = False,
+        so late joining clients receive the complete state.
+
+        With frame_intervall a FrameScheduler thread calls send_bundle every
+        frame_intervall milliseconds. policy decides whether missed frames are
+        skipped or sent back to back, see self.scheduler.missed_deadlines
         """
         self._periodic_messages = True
         self._intervall = intervall
-        raise Exception("Not implemented")
-
-    def set_source_name(self, _name : str, ip :str=None):
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
+        if frame_intervall is not None:
+            self.scheduler = FrameScheduler(self.send_bundle, frame_intervall, policy)
+            self.scheduler.start()
+
+    def set_source_name(self, name : str, ip :str=None):
         """
-        Not implemented
+        adds source messages with name@ip to the bundles. ip defaults to the
+        local address the server sends from, so the clients keep the servers
+        of several hosts apart
         """
-        if ip is not None:
-            ip = self._ip
+        if ip is None:
+            ip = self._local_ip()
+        self._source_name = f"{name}@{ip}"
 
-        raise Exception("Not implemented")
+    def _local_ip(self) -> str:
+        """
+        returns the local ip address of the route to the first destination.
+        Connecting a UDP socket only selects the route, nothing is sent
+        """
+        probe = socket.socket(self._family, socket.SOCK_DGRAM)
+        try:
+            probe.connect((self._ip, self._port))
+            return probe.getsockname()[0]
+        except OSError:     # no route, the host name still tells the servers apart
+            return socket.gethostname()
+        finally:
+            probe.close()
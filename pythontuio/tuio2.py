@@ -0,0 +1,152 @@
+"""
+TUIO 2.0 encoding of the common profile model, see
+https://www.tuio.org/?tuio20
+
+    Cursor  <->  /tuio2/ptr     pointer
+    Object  <->  /tuio2/tok     token, class_id is the component id
+    Blob    <->  /tuio2/bnd     bounds
+
+A frame is one bundle: a frm message with frame id, time and source, the
+component messages and one alv message with the session ids of all profiles.
+The session ids have to be unique over all profile types.
+"""
+from datetime import datetime
+import struct
+import time
+
+from pythontuio.const import TUIO2_FRAME, TUIO2_POINTER, TUIO2_TOKEN, TUIO2_BOUNDS, TUIO2_ALIVE
+from pythontuio.encoder import TuioEncoder, MessageTemplate, blob_payload, element
+from pythontuio.osc_layout import BUNDLE_PREFIX, BUNDLE_HEADER_SIZE, IMMEDIATELY, osc_string
+
+# s_id, tu_id, c_id, x, y, a, shear, radius, press, X, Y, P, m, p
+POINTER_TAGS = ",iiifffffffffff"
+TOKEN_TAGS   = ",iiiffffffff"       # s_id, tu_id, c_id, x, y, a, X, Y, A, m, r
+BOUNDS_TAGS  = ",ifffffffffff"      # s_id, x, y, a, w, h, f, X, Y, A, m, r
+
+_NTP_DELTA = 2208988800             # seconds from 1900 to 1970
+_UNIX_EPOCH = datetime(1970, 1, 1)
+
+
+def pointer_payload(cursor):
+    """
+    returns the values of the ptr message of the cursor in their order
+    """
+    x, y = cursor.position
+    X, Y = cursor.velocity
+    return (int(cursor.session_id), 0, 0, x, y, 0.0, 0.0, 0.0, 0.0, X, Y, 0.0,
+            cursor.motion_acceleration, 0.0)
+
+def token_payload(obj):
+    """
+    returns the values of the tok message of the object in their order
+    """
+    x, y = obj.position
+    X, Y = obj.velocity
+    return (int(obj.session_id), 0, int(obj.class_id), x, y, obj.angle, X, Y,
+            obj.velocity_rotation, obj.motion_acceleration, obj.rotation_acceleration)
+
+
+POINTER_TEMPLATE = MessageTemplate(TUIO2_POINTER, POINTER_TAGS, pointer_payload, set_message=False)
+TOKEN_TEMPLATE   = MessageTemplate(TUIO2_TOKEN,   TOKEN_TAGS,   token_payload,   set_message=False)
+BOUNDS_TEMPLATE  = MessageTemplate(TUIO2_BOUNDS,  BOUNDS_TAGS,  blob_payload,    set_message=False)
+
+
+def pointer_set_args(args) -> list:
+    """
+    maps the arguments of a ptr message to the ones of a TUIO 1.1 cursor set
+    """
+    if len(args) >= 13:
+        return [args[0], args[3], args[4], args[9], args[10], args[12]]
+    return [args[0], args[3], args[4], 0.0, 0.0, 0.0]
+
+def token_set_args(args) -> list:
+    """
+    maps the arguments of a tok message to the ones of a TUIO 1.1 object set
+    """
+    velocities = list(args[6:11]) if len(args) >= 11 else [0.0] * 5
+    return [args[0], args[2], args[3], args[4], args[5]] + velocities
+
+def bounds_set_args(args) -> list:
+    """
+    maps the arguments of a bnd message to the ones of a TUIO 1.1 blob set
+    """
+    if len(args) >= 12:
+        return list(args[:12])
+    return list(args[:7]) + [0.0] * 5
+
+
+def ntp_timetag(seconds :float) -> int:
+    """
+    returns the OSC timetag of a unix time
+    """
+    whole = int(seconds)
+    return (whole + _NTP_DELTA) << 32 | int((seconds - whole) * (1 << 32))
+
+def unix_time(timetag) -> float:
+    """
+    returns the unix time of a timetag parsed by python-osc, a tuple of the
+    utc datetime and the fraction of the second
+    """
+    utc, fraction = timetag
+    return (utc - _UNIX_EPOCH).total_seconds() + fraction / (1 << 32)
+
+
+def frame_message(frame_id :int, seconds :float, dimension :int, source :str) -> bytes:
+    """
+    returns the frm message which starts a TUIO 2.0 bundle
+    """
+    return (osc_string(TUIO2_FRAME) + osc_string(",itis")
+            + struct.pack(">iQi", frame_id, ntp_timetag(seconds), dimension) + osc_string(source))
+
+def alive_message(session_ids) -> bytes:
+    """
+    returns the alv message with the session ids of all profiles
+    """
+    count = len(session_ids)
+    return (osc_string(TUIO2_ALIVE) + osc_string("," + "i" * count)
+            + struct.pack(f">{count}i", *session_ids))
+
+
+class Tuio2Encoder(TuioEncoder):
+    """
+    encodes the frames of the TuioServer as TUIO 2.0 bundles. dimension is the
+    sensor size as width << 16 | height
+    """
+    def __init__(self, capacity :int = 4096, dimension :int = 0):
+        super().__init__(capacity)
+        self.dimension = dimension
+
+    def encode(self, cursors, objects, blobs, frame_id :int = -1,
+               updates=None, source :str = None, seconds :float = None) -> memoryview:
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        encodes frm, the component messages of updates and one alv into one bundle.
+        updates defaults to all profiles, seconds to the current time
+        """
+        if updates is None:
+            updates = (cursors, objects, blobs)
+        if seconds is None:
+            seconds = time.time()
+        head = element(frame_message(frame_id, seconds, self.dimension, source or "pythontuio"))
+        tail = element(alive_message([p.session_id for p in cursors]
+                                     + [p.session_id for p in objects]
+                                     + [p.session_id for p in blobs]))
+        # updates are ordered like the templates: cursors, objects, blobs
+        sections = tuple(zip((POINTER_TEMPLATE, TOKEN_TEMPLATE, BOUNDS_TEMPLATE), updates))
+        buffer = self._reserve(BUNDLE_HEADER_SIZE + len(head) + len(tail) + sum(
+            template.size * len(profiles) for template, profiles in sections))
+        buffer[0:BUNDLE_HEADER_SIZE] = BUNDLE_PREFIX + IMMEDIATELY
+        offset = self._write(buffer, BUNDLE_HEADER_SIZE, head)
+        for template, profiles in sections:
+            offset = template.write(buffer, offset, profiles)
+        offset = self._write(buffer, offset, tail)
+        return memoryview(buffer)[:offset]
+
+    def encode_fragments(self, cursors, objects, blobs, frame_id :int = -1,
+                         max_size :int = None, updates=None, source :str = None) -> list:
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        TUIO 2.0 frames are not split, a frame has a single alv message.
+        returns a list with the one bundle of the frame
+        """
+        return [self.encode(cursors, objects, blobs, frame_id, updates, source)]
@@ -23,15 +23,22 @@ class Profile:
     custom class of all subjects passing the TUIO connection.
     See more at https://www.tuio.org/?specification
 
+    The profiles use __slots__, so no other attributes can be added.
+    source is set by the TuioClient to the source which sent the session.
     """
+    __slots__ = ("session_id", "source")
 
     def __init__(self, session_id):
         self.session_id = session_id
+        self.source = None
 
 class Object(Profile):
     """
     TUIO Object 2D Interactive Surface
     """
+    __slots__ = ("class_id", "position", "angle", "velocity", "velocity_rotation",
+                 "motion_acceleration", "rotation_acceleration")
+
     def __init__(self, session_id):
         super().__init__(session_id)
         self.class_id               = -1            # i
@@ -69,6 +76,8 @@ class Cursor(Profile):
     """
     TUIO Cursor 2D Interactive Surface
     """
+    __slots__ = ("position", "velocity", "motion_acceleration")
+
     def __init__(self, session_id):
         super().__init__(session_id)
         self.position               = (0, 0)   # x,y
@@ -100,6 +109,9 @@ class Blob(Profile):
     """
     TUIO Blob 2D Interactive Surface
     """
+    __slots__ = ("position", "angle", "dimension", "area", "velocity", "velocity_rotation",
+                 "motion_acceleration", "rotation_acceleration")
+
     def __init__(self, session_id):
         super().__init__(session_id)
         self.position               = (0, 0)        # x,y
@@ -0,0 +1,53 @@
+"""
+tests of the NumPy array views of the TuioDispatcher
+"""
+import pytest
+
+from pythontuio import Blob
+from pythontuio.const import TUIO_BLOB
+from pythontuio.dispatcher import TuioDispatcher
+from pythontuio.decoder import TuioDecoder
+
+from dispatcher_test import _profile_bundle
+
+np = pytest.importorskip("numpy")
+
+
+def _blobs(*session_ids):
+    blobs = []
+    for session_id in session_ids:
+        blob = Blob(session_id)
+        blob.position = (session_id / 8, 0.5)
+        blob.dimension = (0.25, session_id / 16)
+        blobs.append(blob)
+    return blobs
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_arrays_follow_sessions(fast):
+    dispatcher = TuioDispatcher()
+    if fast:
+        dispatcher._decoder = TuioDecoder(dispatcher)
+    arrays = dispatcher.enable_arrays().blobs
+
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_BLOB: _blobs(1, 2, 3)}), ("127.0.0.1", 0))
+    assert list(arrays.session_ids) == [1, 2, 3]
+    assert np.allclose(arrays.x, [0.125, 0.25, 0.375])
+    assert np.allclose(arrays.h, [1 / 16, 2 / 16, 3 / 16])
+
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_BLOB: _blobs(2, 3, 4)}), ("127.0.0.1", 0))
+    assert sorted(arrays.session_ids) == [2, 3, 4]
+    for session_id, x in zip(arrays.session_ids, arrays.x):
+        assert x == pytest.approx(session_id / 8)
+    assert arrays.x.flags["C_CONTIGUOUS"]
+
+
+def test_arrays_grow_and_snapshot():
+    dispatcher = TuioDispatcher()
+    arrays = dispatcher.enable_arrays().blobs
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_BLOB: _blobs(*range(100))}), ("127.0.0.1", 0))
+    snapshot = arrays.snapshot()
+    assert len(arrays) == 100
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_BLOB: []}), ("127.0.0.1", 0))
+    assert len(arrays) == 0
+    assert len(snapshot["x"]) == 100
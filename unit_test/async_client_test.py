@@ -0,0 +1,68 @@
+"""
+tests of the AsyncTuioClient over the loopback interface
+"""
+import asyncio
+
+from pythontuio import AsyncTuioClient
+from pythontuio import TuioServer
+from pythontuio import TuioListener
+from pythontuio import Cursor
+
+
+def test_async_client_frames_and_listener():
+    async def run():
+        client = AsyncTuioClient(("127.0.0.1", 0), fast_decoder=True)
+        added = []
+
+        class AsyncListener(TuioListener):
+            async def add_tuio_cursor(self, cur):
+                await asyncio.sleep(0)
+                added.append(cur.session_id)
+        client.add_listener(AsyncListener())
+        await client.start()
+        port = client.transport.get_extra_info("sockname")[1]
+
+        server = TuioServer(port=port)
+        server.cursors.append(Cursor(5))
+        frames = client.frames()
+        server.send_bundle()
+        frame = await asyncio.wait_for(frames.__anext__(), 2)
+        client.close()
+        frames.aclose()
+        return frame, added
+
+    frame, added = asyncio.run(run())
+    assert [cur.session_id for cur in frame.added] == [5]
+    assert added == [5]
+
+
+def test_async_client_survives_failing_listeners(capsys):
+    async def run():
+        client = AsyncTuioClient(("127.0.0.1", 0))
+        metrics = client.enable_metrics()
+        added = []
+
+        class FailingListener(TuioListener):
+            async def add_tuio_cursor(self, cur):
+                raise ValueError(cur.session_id)
+        listener = TuioListener()
+        listener.add_tuio_cursor = lambda cur: added.append(cur.session_id)
+        client.add_listener(FailingListener())
+        client.add_listener(listener)
+        await client.start()
+        port = client.transport.get_extra_info("sockname")[1]
+
+        server = TuioServer(port=port)
+        frames = client.frames()
+        for session_id in (1, 2):
+            server.cursors.append(Cursor(session_id))
+            server.send_bundle()
+            await asyncio.wait_for(frames.__anext__(), 2)
+        client.close()
+        frames.aclose()
+        return added, metrics.counters["handler_errors_total"]
+
+    added, errors = asyncio.run(run())
+    assert added == [1, 2]
+    assert errors == 2
+    assert "ValueError" in capsys.readouterr().err
@@ -0,0 +1,46 @@
+"""
+tests of the TuioClient socket handling over the loopback interface
+"""
+import time
+
+import pytest
+
+from pythonosc.osc_server import BlockingOSCUDPServer
+
+from pythontuio import TuioClient, TuioServer
+from pythontuio import Cursor
+
+from dispatcher_test import RecordingListener
+
+
+class RefreshListener(RecordingListener):
+    def refresh(self, time):
+        self.events.append(("refresh",))
+
+
+def _bound_client(**kwargs):
+    client = TuioClient(("127.0.0.1", 0), **kwargs)
+    BlockingOSCUDPServer.__init__(client, client.server_address, client)
+    return client
+
+
+def test_drain_delivers_one_frame_for_the_backlog():
+    client = _bound_client(drain=True, receive_buffer=1 << 20)
+    listener = RefreshListener()
+    client.add_listener(listener)
+    server = TuioServer(port=client.socket.getsockname()[1])
+    try:
+        cursor = Cursor(1)
+        server.cursors.append(cursor)
+        for step in range(10):
+            cursor.position = (step / 10, 0.5)
+            if step == 5:
+                server.cursors.append(Cursor(2))
+            server.send_bundle()
+        time.sleep(0.1)
+        client._handle_request_noblock()
+    finally:
+        client.server_close()
+    assert listener.events == [("add", 1), ("add", 2), ("refresh",)]
+    assert client.cursors[0].position == pytest.approx((0.9, 0.5))
+    assert client.collapsed_frames == 9
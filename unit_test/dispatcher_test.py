@@ -0,0 +1,312 @@
+"""
+tests of the TuioDispatcher state handling. The bundles are fed directly into
+the dispatcher, so no network connection is needed.
+"""
+import threading
+import time
+
+from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.osc_bundle_builder import OscBundleBuilder
+
+from pythontuio import Cursor
+from pythontuio import Object
+from pythontuio import Blob
+from pythontuio import TuioListener, TuioFrameListener
+from pythontuio.const import TUIO_CURSOR, TUIO_OBJECT, TUIO_BLOB
+from pythontuio.dispatcher import TuioDispatcher, TuioFrame, ADD, REMOVE
+from pythontuio.frame_queue import FrameQueue
+from pythontuio.decoder import TuioDecoder
+from pythontuio.encoder import TuioEncoder, cursor_payload, object_payload, blob_payload
+from pythontuio.session import SessionStore
+
+
+def _profile_bundle(profiles_by_address, fseq=-1):
+    bundle_builder = OscBundleBuilder(0)
+    for address, profiles in profiles_by_address.items():
+        builder = OscMessageBuilder(address=address)
+        builder.add_arg("alive")
+        for profile in profiles:
+            builder.add_arg(profile.session_id)
+        bundle_builder.add_content(builder.build())
+        for profile in profiles:
+            bundle_builder.add_content(profile.get_message())
+    builder = OscMessageBuilder(address=TUIO_CURSOR)
+    builder.add_arg("fseq")
+    builder.add_arg(fseq)
+    bundle_builder.add_content(builder.build())
+    return bundle_builder.build().dgram
+
+
+class RecordingListener(TuioListener):
+    def __init__(self):
+        self.events = []
+    def add_tuio_cursor(self, cur):
+        self.events.append(("add", cur.session_id))
+    def update_tuio_cursor(self, cur):
+        self.events.append(("update", cur.session_id))
+    def remove_tuio_cursor(self, cur):
+        self.events.append(("remove", cur.session_id))
+
+
+def test_session_store_diff():
+    store = SessionStore(Cursor)
+    added, updated, removed = store.alive([1, 2, 3])
+    assert [p.session_id for p in added] == [1, 2, 3]
+    assert updated == [] and removed == []
+
+    first = store.get(2)
+    added, updated, removed = store.alive([3, 2, 4])
+    assert [p.session_id for p in added] == [4]
+    assert [p.session_id for p in updated] == [3, 2]
+    assert [p.session_id for p in removed] == [1]
+    assert store.get(2) is first
+    assert [p.session_id for p in store.profiles] == [3, 2, 4]
+    assert 1 not in store and len(store) == 3
+
+
+def test_dispatcher_alive_and_set():
+    dispatcher = TuioDispatcher()
+    listener = RecordingListener()
+    dispatcher.add_listener(listener)
+
+    a, b = Cursor(1), Cursor(2)
+    a.position = (0.25, 0.5)
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: [a, b]}), ("127.0.0.1", 0))
+    assert listener.events == [("add", 1), ("add", 2)]
+    assert [c.session_id for c in dispatcher.cursors] == [1, 2]
+    assert dispatcher.cursors[0].position == (0.25, 0.5)
+
+    listener.events.clear()
+    b.position = (0.75, 0.125)
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: [b]}), ("127.0.0.1", 0))
+    assert listener.events == [("update", 2), ("remove", 1)]
+    assert [c.session_id for c in dispatcher.cursors] == [2]
+    assert dispatcher.cursors[0].position == (0.75, 0.125)
+
+
+def test_sources_have_own_sessions():
+    dispatcher = TuioDispatcher()
+    listener = RecordingListener()
+    dispatcher.add_listener(listener)
+    left, right = ("10.0.0.1", 3333), ("10.0.0.2", 3333)
+
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: [Cursor(1), Cursor(2)]}),
+                                        left)
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: [Cursor(1)]}), right)
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: [Cursor(2), Cursor(1)]}),
+                                        left)
+    assert listener.events == [("add", 1), ("add", 2), ("add", 1), ("update", 2), ("update", 1)]
+    assert [(c.source, c.session_id) for c in dispatcher.cursors] == \
+           [(left, 2), (left, 1), (right, 1)]
+    assert [c.session_id for c in dispatcher.sources[right].cursors] == [1]
+
+    listener.events.clear()
+    dispatcher.remove_source(left)
+    assert listener.events == [("remove", 2), ("remove", 1)]
+    assert [(c.source, c.session_id) for c in dispatcher.cursors] == [(right, 1)]
+
+    named = TuioEncoder().encode([Cursor(1)], [], [], source="table@10.0.0.3")
+    dispatcher.call_handlers_for_packet(bytes(named), ("10.0.0.3", 40000))
+    assert [c.source for c in dispatcher.cursors] == [right, "table@10.0.0.3"]
+
+
+def test_senders_on_one_host_keep_their_sessions():
+    dispatcher = TuioDispatcher()
+    listener = RecordingListener()
+    dispatcher.add_listener(listener)
+    for frame in range(1, 4):
+        for port, cursor in ((5000, Cursor(1)), (5001, Cursor(2))):
+            dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: [cursor]}, frame),
+                                                ("127.0.0.1", port))
+    assert listener.events == [("add", 1), ("add", 2)] + [("update", 1), ("update", 2)] * 2
+    assert [c.session_id for c in dispatcher.cursors] == [1, 2]
+    assert dispatcher.frame_sequence.dropped == 0
+
+
+def test_restarted_sender_replaces_its_idle_source():
+    for fast in (False, True):
+        dispatcher = TuioDispatcher()
+        dispatcher.source_timeout = 0.01
+        if fast:
+            dispatcher._decoder = TuioDecoder(dispatcher)
+        listener = RecordingListener()
+        dispatcher.add_listener(listener)
+        dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: [Cursor(1)]}, 50),
+                                            ("10.0.0.1", 40000))
+        time.sleep(0.02)
+        # restarted on another port, its frame ids start again
+        dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: [Cursor(1)]}, 1),
+                                            ("10.0.0.1", 40001))
+        assert [c.source for c in dispatcher.cursors] == [("10.0.0.1", 40001)]
+        assert listener.events == [("add", 1), ("remove", 1), ("add", 1)]
+        assert list(dispatcher.sources) == [None, ("10.0.0.1", 40001)]
+
+
+def test_fast_decoder_matches_generic_path():
+    cursor = Cursor(1)
+    cursor.position = (0.5, 0.25)
+    cursor.velocity = (0.125, -0.5)
+    obj = Object(2)
+    obj.class_id = 7
+    obj.angle = 1.5
+    blob = Blob(3)
+    blob.dimension = (0.25, 0.125)
+    blob.area = 0.03125
+    dgram = _profile_bundle({TUIO_CURSOR: [cursor], TUIO_OBJECT: [obj], TUIO_BLOB: [blob]})
+
+    generic = TuioDispatcher()
+    fast = TuioDispatcher()
+    fast._decoder = TuioDecoder(fast)
+    for dispatcher in (generic, fast):
+        dispatcher.call_handlers_for_packet(dgram, ("127.0.0.1", 0))
+
+    assert fast._decoder.fallback_messages == 0
+    for attr, payload in (("cursors", cursor_payload), ("objects", object_payload), ("blobs", blob_payload)):
+        expected = [payload(p) for p in getattr(generic, attr)]
+        assert [payload(p) for p in getattr(fast, attr)] == expected
+    assert fast.objects[0].class_id == 7
+    assert fast.blobs[0].dimension == (0.25, 0.125)
+
+
+def test_frame_queue_merges_updates():
+    a, b, c = Cursor(1), Cursor(2), Cursor(3)
+    queue = FrameQueue(maxsize=1)
+    queue.put(TuioFrame([a], [b], [], 1))
+    queue.put(TuioFrame([c], [a, b], [], 2))
+    queue.put(TuioFrame([], [b, c], [a], 3))
+    assert len(queue) == 1
+    frame = queue.get()
+    assert frame.added == [a, c]
+    assert frame.updated == [b]
+    assert frame.removed == [a]
+    assert frame.frame_id == 3
+    assert queue.merged_updates == 4
+
+
+def test_frame_queue_keeps_reused_session_ids_apart():
+    old, new = Cursor(1), Cursor(1)
+    queue = FrameQueue(maxsize=1)
+    queue.put(TuioFrame([], [], [old]))
+    putter = threading.Thread(target=queue.put, args=(TuioFrame([new], [], []),))
+    putter.start()
+    putter.join(0.05)
+    assert putter.is_alive() and len(queue) == 1     # waits for room instead of growing
+    assert queue.get().removed == [old]
+    putter.join(2)
+    assert not putter.is_alive()
+    assert queue.get().added == [new]
+
+
+def test_queued_dispatch_delivers_adds_and_removes():
+    dispatcher = TuioDispatcher()
+    listener = RecordingListener()
+    release = threading.Event()
+    threading.Timer(0.1, release.set).start()   # the frame reusing session id 2 waits for it
+    blocking = TuioListener()
+    blocking.refresh = lambda time: release.wait(2)
+    dispatcher.add_listener(blocking)
+    dispatcher.add_listener(listener)
+    dispatcher.enable_queued_dispatch(maxsize=1)
+
+    cursors = [Cursor(1), Cursor(2)]
+    for frame in range(10):
+        alive = cursors[:1] if frame == 5 else cursors
+        dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: alive}), ("127.0.0.1", 0))
+        assert dispatcher.dispatch_queue_depth <= 1
+    merged_updates = dispatcher.merged_updates
+    dispatcher.disable_queued_dispatch()
+
+    assert [e for e in listener.events if e[0] != "update"] == [
+        ("add", 1), ("add", 2), ("remove", 2), ("add", 2)]
+    assert 0 < merged_updates <= dispatcher.merged_updates # kept with the queue
+    assert len([e for e in listener.events if e[0] == "update"]) < 16
+
+
+def test_queued_dispatch_survives_failing_listeners(capsys):
+    dispatcher = TuioDispatcher()
+    metrics = dispatcher.enable_metrics()
+    failing = TuioListener()
+    failing.add_tuio_cursor = lambda cur: 1 / 0
+    listener = RecordingListener()
+    dispatcher.add_listener(failing)
+    dispatcher.add_listener(listener)
+    dispatcher.enable_queued_dispatch()
+
+    for alive in ([Cursor(1)], [Cursor(1), Cursor(2)], []):
+        dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: alive}), ("127.0.0.1", 0))
+    dispatcher.disable_queued_dispatch()
+
+    assert dispatcher._dispatch_worker is None and dispatcher.dispatch_queue_depth == 0
+    assert ("remove", 1) in listener.events and ("remove", 2) in listener.events
+    assert metrics.counters["handler_errors_total"] == 2
+    assert "ZeroDivisionError" in capsys.readouterr().err
+
+
+def test_profile_pool_recycles_removed_profiles():
+    dispatcher = TuioDispatcher()
+    dispatcher.enable_profile_pool(max_size=4)
+    listener = RecordingListener()
+    dispatcher.add_listener(listener)
+
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: [Cursor(1), Cursor(2)]}), ("127.0.0.1", 0))
+    removed = dispatcher.cursors[0]
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: [Cursor(2)]}), ("127.0.0.1", 0))
+    assert ("remove", 1) in listener.events
+
+    new = Cursor(3)
+    new.position = (0.5, 0.5)
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: [Cursor(2), new]}), ("127.0.0.1", 0))
+    assert dispatcher.cursors[1] is removed
+    assert removed.session_id == 3
+    assert removed.position == (0.5, 0.5)
+
+
+def test_held_frames_collapse_to_net_events():
+    dispatcher = TuioDispatcher()
+    listener = RecordingListener()
+    dispatcher.add_listener(listener)
+    address = ("127.0.0.1", 3333)
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: [Cursor(1), Cursor(2)]}, 1), address)
+    listener.events.clear()
+
+    dispatcher.hold_frames()
+    for fseq, session_ids in enumerate(([1, 2, 3], [2, 3, 4], [2, 4], [2, 4, 5]), 2):
+        bundle = _profile_bundle({TUIO_CURSOR: [Cursor(i) for i in session_ids]}, fseq)
+        dispatcher.call_handlers_for_packet(bundle, address)
+    assert listener.events == []
+    dispatcher.release_frames()
+    assert listener.events == [("add", 4), ("add", 5), ("update", 2), ("remove", 1)]
+    assert dispatcher.collapsed_frames == 3
+
+
+class BatchedListener(TuioFrameListener):
+    subscriptions = frozenset([(ADD, Cursor), (REMOVE, Blob)])
+    def __init__(self):
+        self.frames = []
+    def on_frame(self, frame):
+        self.frames.append(([c.session_id for c in frame.events(ADD, Cursor)],
+                            [b.session_id for b in frame.events(REMOVE, Blob)]))
+
+
+def test_batched_listener_and_adapter():
+    dispatcher = TuioDispatcher()
+    batched, first, second = BatchedListener(), RecordingListener(), RecordingListener()
+    adds_only = TuioListener()
+    added = []
+    adds_only.add_tuio_cursor = lambda cursor: added.append(cursor.session_id)
+    for listener in (batched, first, second, adds_only):
+        dispatcher.add_listener(listener)
+
+    address = ("127.0.0.1", 3333)
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: [Cursor(1)],
+                                                         TUIO_BLOB: [Blob(7)]}, 1), address)
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: [Cursor(1)],
+                                                         TUIO_BLOB: []}, 2), address)
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: [Cursor(1)]}, 3), address)
+    assert batched.frames == [([1], []), ([], [7])]    # the third frame only has updates
+    assert first.events == second.events == [("add", 1), ("update", 1), ("update", 1)]
+    assert added == [1]
+
+    dispatcher.remove_listener(first)
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: []}, 4), address)
+    assert first.events[-1] == ("update", 1) and second.events[-1] == ("remove", 1)
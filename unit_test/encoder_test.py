@@ -0,0 +1,105 @@
+"""
+tests of the TuioEncoder against bundles built with python-osc
+"""
+import pytest
+from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.osc_bundle_builder import OscBundleBuilder
+
+from pythontuio import Cursor
+from pythontuio import Blob
+from pythontuio import Object
+from pythontuio import TuioListener
+from pythontuio.const import TUIO_CURSOR, TUIO_OBJECT, TUIO_BLOB
+from pythontuio.encoder import TuioEncoder
+from pythontuio.decoder import TuioDecoder
+from pythontuio.dispatcher import TuioDispatcher
+
+
+def _reference_bundle(cursors, objects, blobs):
+    """bundle like TuioServer.send_bundle built it with python-osc"""
+    bundle_builder = OscBundleBuilder(0)
+    for address, profiles in ((TUIO_CURSOR, cursors), (TUIO_BLOB, blobs), (TUIO_OBJECT, objects)):
+        builder = OscMessageBuilder(address=address)
+        builder.add_arg("alive")
+        for profile in profiles:
+            builder.add_arg(profile.session_id)
+        bundle_builder.add_content(builder.build())
+    for profile in cursors + blobs + objects:
+        bundle_builder.add_content(profile.get_message())
+    builder = OscMessageBuilder(address=TUIO_CURSOR)
+    builder.add_arg("fseq")
+    builder.add_arg(-1)
+    bundle_builder.add_content(builder.build())
+    return bundle_builder.build().dgram
+
+
+def _profiles(count):
+    cursors, objects, blobs = [], [], []
+    for i in range(count):
+        cursor = Cursor(i)
+        cursor.position = (i / 7, 0.5)
+        cursor.velocity = (0.1, -0.2)
+        cursors.append(cursor)
+        obj = Object(100 + i)
+        obj.class_id = i
+        obj.angle = 0.3 * i
+        objects.append(obj)
+        blob = Blob(200 + i)
+        blob.dimension = (0.2, 0.1 * i)
+        blobs.append(blob)
+    return cursors, objects, blobs
+
+
+def test_encoder_is_byte_identical():
+    encoder = TuioEncoder(capacity=16)
+    for count in (0, 1, 5, 50):
+        cursors, objects, blobs = _profiles(count)
+        bundle = encoder.encode(cursors, objects, blobs)
+        assert bytes(bundle) == _reference_bundle(cursors, objects, blobs)
+
+
+class CountingListener(TuioListener):
+    def __init__(self):
+        self.added = []
+        self.updated = []
+        self.refreshs = 0
+    def add_tuio_blob(self, blob):
+        self.added.append(blob.session_id)
+    def update_tuio_blob(self, blob):
+        self.updated.append(blob.session_id)
+    def add_tuio_cursor(self, cur):
+        self.added.append(cur.session_id)
+    def update_tuio_cursor(self, cur):
+        self.updated.append(cur.session_id)
+    def refresh(self, time):
+        self.refreshs += 1
+
+
+def test_fragments_are_reassembled():
+    cursors, objects, blobs = _profiles(40)
+    encoder = TuioEncoder()
+    bundles = [bytes(b) for b in encoder.encode_fragments(cursors, objects, blobs, max_size=1472)]
+    assert len(bundles) > 1
+    assert all(len(bundle) <= 1472 for bundle in bundles)
+
+    for fast in (False, True):
+        dispatcher = TuioDispatcher()
+        if fast:
+            dispatcher._decoder = TuioDecoder(dispatcher)
+        listener = CountingListener()
+        dispatcher.add_listener(listener)
+        for index, bundle in enumerate(bundles):
+            dispatcher.call_handlers_for_packet(bundle, ("127.0.0.1", 0))
+            assert listener.refreshs == (1 if index == len(bundles) - 1 else 0)
+        assert sorted(listener.added) == sorted(p.session_id for p in cursors + blobs)
+        assert listener.updated == []
+        for received, sent in zip(dispatcher.blobs, blobs):
+            assert received.session_id == sent.session_id
+            assert received.dimension == pytest.approx(sent.dimension)
+        assert len(dispatcher.objects) == len(objects)
+
+
+def test_small_frames_are_not_fragmented():
+    cursors, objects, blobs = _profiles(3)
+    bundles = TuioEncoder().encode_fragments(cursors, objects, blobs, max_size=1472)
+    assert [bytes(b) for b in bundles] == [_reference_bundle(cursors, objects, blobs)]
@@ -0,0 +1,122 @@
+"""
+tests of the smoothing and prediction of the received positions
+"""
+import random
+
+import pytest
+
+from pythontuio import Cursor
+from pythontuio.const import TUIO_CURSOR
+from pythontuio.dispatcher import TuioDispatcher
+
+from pythontuio.spatial import Region
+
+from dispatcher_test import _profile_bundle
+from spatial_test import RegionListener
+
+np = pytest.importorskip("numpy")
+
+from pythontuio.filters import TuioFilter, OneEuroFilter, KalmanFilter # pylint: disable=wrong-import-position
+
+
+def _run(position_filter, positions, dt=0.01):
+    cursor = Cursor(1)
+    filtered = []
+    for frame, position in enumerate(positions):
+        cursor.position = position
+        position_filter.update([cursor], [], [], now=frame * dt)
+        filtered.append(cursor.position)
+    return cursor, filtered
+
+
+def test_one_euro_smooths_jitter():
+    rng = random.Random(1)
+    raw = [(0.5 + rng.gauss(0, 0.01), 0.5) for _ in range(200)]
+    _, filtered = _run(TuioFilter(OneEuroFilter(min_cutoff=1.0)), raw)
+    assert np.std([x for x, _ in filtered[50:]]) < np.std([x for x, _ in raw[50:]]) / 3
+
+
+def test_kalman_prediction():
+    position_filter = TuioFilter(KalmanFilter(), prediction=0.02)
+    raw = [(0.1 + 0.5 * frame * 0.01, 0.5) for frame in range(100)]
+    cursor, filtered = _run(position_filter, raw)
+    assert filtered[-1][0] == pytest.approx(raw[-1][0] + 0.5 * 0.02, abs=1e-3)
+    assert position_filter.raw([cursor])[0] == pytest.approx(raw[-1])
+    ahead = position_filter.predict([cursor], 0.1)[0]
+    assert ahead[0] == pytest.approx(raw[-1][0] + 0.5 * 0.1, abs=1e-3)
+
+
+def test_missing_set_measures_last_raw_position():
+    position_filter = TuioFilter(OneEuroFilter(min_cutoff=0.1))
+    cursor = Cursor(1)
+    cursor.position = (0.0, 0.0)
+    position_filter.update([cursor], [], [], now=0.0)
+    cursor.position = (1.0, 0.0)
+    position_filter.update([cursor], [], [], now=0.1)
+    first = cursor.position[0]
+    assert 0 < first < 1
+    position_filter.update([cursor], [], [], now=0.2)      # no set message
+    assert first < cursor.position[0] < 1
+    assert position_filter.raw([cursor])[0] == pytest.approx((1.0, 0.0))
+
+
+def test_dispatcher_filter():
+    dispatcher = TuioDispatcher()
+    position_filter = dispatcher.enable_filter(OneEuroFilter(min_cutoff=0.1))
+    ticks = iter(range(10))
+    position_filter.clock = lambda: next(ticks) * 0.1
+    cursor = Cursor(1)
+    cursor.position = (0.0, 0.0)
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR : [cursor]}, 1), None)
+    cursor.position = (1.0, 0.0)
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR : [cursor]}, 2), None)
+    received, = dispatcher.cursors
+    assert 0 < received.position[0] < 1
+    dispatcher.disable_filter()
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR : [cursor]}, 3), None)
+    assert received.position == pytest.approx((1.0, 0.0))
+
+
+def _filtered_position(with_second_source :bool):
+    dispatcher = TuioDispatcher()
+    position_filter = dispatcher.enable_filter(OneEuroFilter(min_cutoff=0.5, beta=0.1))
+    now = [0.0]
+    position_filter.clock = lambda: now[0]
+    cursor, other = Cursor(1), Cursor(2)
+    other.position = (0.5, 0.5)
+    for frame, x in enumerate((0.0, 0.1, 0.2, 0.2, 0.2)):
+        now[0] = frame * 0.1
+        cursor.position = (x, 0.0)
+        dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR : [cursor]}, frame + 1),
+                                            ("10.0.0.1", 3333))
+        if with_second_source:
+            now[0] += 0.03
+            dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR : [other]}, frame + 1),
+                                                ("10.0.0.2", 3333))
+    received = dispatcher.sources[("10.0.0.1", 3333)].cursors[0]
+    return received.position, position_filter.raw([received])[0]
+
+
+def test_sources_are_filtered_apart():
+    alone, raw = _filtered_position(False)
+    assert _filtered_position(True) == (pytest.approx(alone), pytest.approx(raw))
+    assert tuple(raw) == pytest.approx((0.2, 0.0))
+
+
+def test_spatial_index_sees_the_filtered_positions():
+    dispatcher = TuioDispatcher()
+    position_filter = dispatcher.enable_filter(OneEuroFilter(min_cutoff=0.1))
+    now = [0.0]
+    position_filter.clock = lambda: now[0]
+    listener = RegionListener()
+    dispatcher.add_listener(listener)
+    dispatcher.enable_spatial_index().add_region(Region("corner", 0.0, 0.0, 0.25, 0.25))
+    cursor = Cursor(1)
+    for frame, position in enumerate(((0.9, 0.9), (0.1, 0.1), (0.1, 0.1))):
+        now[0] = frame * 0.01
+        cursor.position = position     # raw inside the region, filtered still outside
+        dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR : [cursor]}, frame + 1),
+                                            None)
+    received, = dispatcher.cursors
+    assert received.position[0] > 0.25
+    assert listener.events == []
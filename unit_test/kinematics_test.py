@@ -0,0 +1,60 @@
+"""
+tests of the automatic motion fields of the TuioServer
+"""
+import math
+
+import pytest
+
+from pythontuio import Cursor, Object
+
+from server_test import _server, _set_ids
+
+np = pytest.importorskip("numpy")
+
+from pythontuio.kinematics import TuioKinematics # pylint: disable=wrong-import-position
+
+
+def test_motion_fields():
+    kinematics = TuioKinematics()
+    cursor, obj, resting = Cursor(1), Object(2), Object(3)
+    obj.angle = 0.1
+    kinematics.update([cursor], [obj, resting], [], now=0.0)
+    assert cursor.velocity == (0, 0)
+
+    cursor.position = (0.1, 0.0)
+    obj.angle = 2 * math.pi - 0.1       # turned backwards over 0
+    kinematics.update([cursor], [obj, resting], [], now=0.5)
+    assert cursor.velocity == pytest.approx((0.2, 0.0))
+    assert cursor.motion_acceleration == pytest.approx(0.4)
+    assert obj.velocity_rotation == pytest.approx(-0.2 / (2 * math.pi) / 0.5)
+    assert obj.rotation_acceleration == pytest.approx(obj.velocity_rotation / 0.5)
+    assert resting.velocity == (0, 0) and resting.velocity_rotation == 0
+
+    kinematics.update([cursor], [obj], [], now=1.0)
+    assert cursor.velocity == (0, 0)
+    assert cursor.motion_acceleration == pytest.approx(-0.4)
+    assert len(kinematics.objects) == 1
+
+
+def test_server_kinematics():
+    server = _server()
+    server.enable_kinematics()
+    cursor = Cursor(1)
+    server.cursors.append(cursor)
+    server.send_bundle()
+    cursor.position = (0.5, 0.5)
+    server.send_bundle()
+    vx, vy = cursor.velocity
+    assert vx > 0 and vx == pytest.approx(vy)
+
+
+def test_resting_profiles_stay_out_of_delta_frames():
+    server = _server()
+    server.is_full_update = False
+    server.enable_kinematics()
+    moving, resting = Cursor(1), Cursor(2)
+    server.cursors.extend([moving, resting])
+    server.send_bundle()
+    moving.position = (0.5, 0.5)
+    server.send_bundle()
+    assert _set_ids(server._sock.sent[-1][0]) == [1]
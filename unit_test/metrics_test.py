@@ -0,0 +1,62 @@
+"""
+tests of the runtime metrics
+"""
+from pythontuio import Cursor
+from pythontuio.const import TUIO_CURSOR
+from pythontuio.dispatcher import TuioDispatcher
+from pythontuio.metrics import TuioMetrics, Histogram
+
+from dispatcher_test import _profile_bundle, RecordingListener
+from server_test import _server
+
+
+def test_histogram_buckets():
+    histogram = Histogram((0.001, 0.01, 0.1))
+    for value in (0.0005, 0.005, 0.005, 0.5):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 4
+    assert list(snapshot["buckets"].values()) == [1, 3, 3, 4]
+    assert snapshot["p50"] == 0.01
+    assert snapshot["p99"] == float("inf")
+
+
+def test_client_metrics():
+    dispatcher = TuioDispatcher()
+    dispatcher.add_listener(RecordingListener())
+    metrics = dispatcher.enable_metrics()
+    timings = []
+    metrics.add_hook(lambda name, seconds, labels: timings.append(name))
+
+    for fseq in (1, 2, 1):
+        bundle = _profile_bundle({TUIO_CURSOR: [Cursor(1)]}, fseq)
+        dispatcher.call_handlers_for_packet(bundle, ("127.0.0.1", 3333))
+
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["packets_total"] == 3
+    assert snapshot["counters"]["frames_total"] == 2
+    assert snapshot["gauges"]["dropped_frames"] == 1
+    assert snapshot["histograms"][("listener_seconds", (("listener", "RecordingListener"),))]["count"] == 2
+    assert timings.count("decode_seconds") == 3 and timings.count("diff_seconds") == 2
+
+    text = metrics.to_prometheus()
+    assert "tuio_packets_total 3\n" in text
+    assert 'tuio_listener_seconds_bucket{listener="RecordingListener",le="+Inf"} 2\n' in text
+    assert "# TYPE tuio_decode_seconds histogram\n" in text
+
+    dispatcher.disable_metrics()
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR: []}, 3), ("127.0.0.1", 3333))
+    assert metrics.counters["packets_total"] == 3
+
+
+def test_server_metrics():
+    ticks = iter(range(1000))
+    server = _server()
+    metrics = server.enable_metrics(TuioMetrics(clock=lambda: next(ticks) / 1000))
+    server.cursors.append(Cursor(1))
+    server.send_bundle()
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"]["frames_total"] == 1
+    assert snapshot["counters"]["bytes_total"] == len(server._sock.sent[0][0])
+    assert snapshot["histograms"][("encode_seconds", ())]["sum"] == 0.001
+    assert snapshot["gauges"]["missed_deadlines"] == 0
@@ -0,0 +1,88 @@
+"""
+tests of the MultiProcessTuioClient over the loopback interface
+"""
+import socket
+import threading
+
+from pythonosc.osc_message_builder import OscMessageBuilder
+
+from pythontuio import TuioServer
+from pythontuio import TuioListener
+from pythontuio import Cursor
+from pythontuio.multiprocess import MultiProcessTuioClient
+
+
+def _free_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class EventListener(TuioListener):
+    def __init__(self):
+        self.events = []
+        self.received = threading.Event()
+    def add_tuio_cursor(self, cur):
+        self.events.append(("add", cur.session_id, cur.position))
+    def update_tuio_cursor(self, cur):
+        self.events.append(("update", cur.session_id, cur.position))
+    def remove_tuio_cursor(self, cur):
+        self.events.append(("remove", cur.session_id, cur.position))
+    def refresh(self, time):
+        self.received.set()
+
+
+def test_workers_merge_frames():
+    port = _free_port()
+    client = MultiProcessTuioClient(("127.0.0.1", port), workers=2)
+    listener = EventListener()
+    client.add_listener(listener)
+    client.start()
+    try:
+        server = TuioServer(port=port)
+        cursor = Cursor(3)
+        cursor.position = (0.5, 0.25)
+        server.cursors.append(cursor)
+        for position in (None, (0.75, 0.25)):
+            if position is not None:
+                cursor.position = position
+            listener.received.clear()
+            server.send_bundle()
+            assert listener.received.wait(5)
+        server.cursors.clear()
+        listener.received.clear()
+        server.send_bundle()
+        assert listener.received.wait(5)
+    finally:
+        client.stop(5)
+
+    assert listener.events == [("add", 3, (0.5, 0.25)), ("update", 3, (0.75, 0.25)),
+                               ("remove", 3, (0.75, 0.25))]
+    assert client.cursors == []
+    assert not client.running
+
+
+def test_worker_survives_broken_datagrams():
+    port = _free_port()
+    client = MultiProcessTuioClient(("127.0.0.1", port), workers=1)
+    metrics = client.enable_metrics()
+    listener = EventListener()
+    client.add_listener(listener)
+    client.start()
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        builder = OscMessageBuilder(address="/tuio/2Dcur")
+        builder.add_arg("bogus")
+        sock.sendto(builder.build().dgram, ("127.0.0.1", port))
+        sock.close()
+        server = TuioServer(port=port)
+        server.cursors.append(Cursor(4))
+        server.send_bundle()
+        assert listener.received.wait(5)
+    finally:
+        client.stop(5)
+
+    assert listener.events[0][:2] == ("add", 4)
+    assert metrics.counters["handler_errors_total"] == 1
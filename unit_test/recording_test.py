@@ -0,0 +1,64 @@
+"""
+tests of the recording and replay of TUIO datagrams
+"""
+from pythontuio import Cursor
+from pythontuio.const import TUIO_CURSOR
+from pythontuio.dispatcher import TuioDispatcher
+from pythontuio.recording import TuioRecorder, TuioReplay
+
+from dispatcher_test import _profile_bundle
+from server_test import _server
+
+
+def _record(path):
+    dispatcher = TuioDispatcher()
+    dispatcher.enable_recording(str(path))
+    bundles = [_profile_bundle({TUIO_CURSOR: [Cursor(i) for i in range(count)]}, count)
+               for count in (1, 3, 2)]
+    for bundle in bundles:
+        dispatcher.call_handlers_for_packet(bundle, ("10.0.0.1", 3333))
+    dispatcher.disable_recording()
+    return dispatcher, bundles
+
+
+def test_replay_into_dispatcher(tmp_path):
+    recorded, bundles = _record(tmp_path / "session.tuio")
+    with TuioReplay(str(tmp_path / "session.tuio")) as replay:
+        assert len(replay) == 3
+        assert [data for _, _, data in replay] == bundles
+        assert replay[1][1] == ("10.0.0.1", 3333)
+        dispatcher = TuioDispatcher()
+        assert replay.replay_into(dispatcher) == 3
+    assert [c.session_id for c in dispatcher.cursors] == [c.session_id for c in recorded.cursors]
+
+
+def test_replay_without_index(tmp_path):
+    path = str(tmp_path / "crashed.tuio")
+    recorder = TuioRecorder(path)
+    for timestamp in (1.0, 1.5):
+        recorder.record(b"#bundle\x00", ("127.0.0.1", 1), timestamp)
+    recorder._file.close() # no index written
+    with open(path, "ab") as file:
+        file.write(b"\x00" * 5) # cut off record
+    with TuioReplay(path) as replay:
+        assert [timestamp for timestamp, _, _ in replay] == [1.0, 1.5]
+
+
+def test_replay_to_server(tmp_path):
+    _, bundles = _record(tmp_path / "session.tuio")
+    server = _server()
+    with TuioReplay(str(tmp_path / "session.tuio")) as replay:
+        assert replay.replay_to(server, speed=None) == 3
+    assert [data for data, _ in server._sock.sent] == bundles
+
+
+def test_replay_to_all_destinations(tmp_path):
+    _, bundles = _record(tmp_path / "session.tuio")
+    server = _server()
+    server.add_destination("127.0.0.1", 3334)
+    metrics = server.enable_metrics()
+    with TuioReplay(str(tmp_path / "session.tuio")) as replay:
+        assert replay.replay_to(server, speed=None) == 3
+    assert [address[1] for _, address in server._sock.sent] == [3333, 3334] * 3
+    assert [data for data, _ in server._sock.sent[::2]] == bundles
+    assert metrics.counters["packets_total"] == 6
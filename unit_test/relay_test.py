@@ -0,0 +1,100 @@
+"""
+tests of the TuioRelay, the bundles are fed directly and the sent ones captured
+"""
+import pytest
+from pythonosc.osc_packet import OscPacket
+
+from pythontuio import Cursor, Blob, TuioServer
+from pythontuio.const import TUIO_CURSOR, TUIO_BLOB
+from pythontuio.dispatcher import TuioDispatcher
+from pythontuio.encoder import TuioEncoder
+
+from dispatcher_test import _profile_bundle
+from server_test import CapturingSocket
+
+np = pytest.importorskip("numpy")
+
+from pythontuio.relay import TuioRelay, RelayTransform # pylint: disable=wrong-import-position
+
+TRACKER = ("10.0.0.5", 3333)
+SOURCE = TRACKER                    # senders without source message are keyed by (ip, port)
+
+
+def _relay(**kwargs):
+    server = TuioServer()
+    server._sock = CapturingSocket()
+    return TuioRelay(("127.0.0.1", 0), server, **kwargs), server._sock.sent
+
+
+def _sets(dgram):
+    return {params[1] : params[2:] for params in
+            (m.message.params for m in OscPacket(dgram).messages) if params[0] == "set"}
+
+
+def _cursor(session_id, x, y):
+    cursor = Cursor(session_id)
+    cursor.position = (x, y)
+    cursor.velocity = (0.1, 0.0)
+    return cursor
+
+
+def test_sources_without_transform_are_forwarded_unchanged():
+    relay, sent = _relay()
+    bundle = bytes(TuioEncoder().encode([_cursor(1, 0.5, 0.5)], [], [], 1, source="table@10.0.0.5"))
+    relay.call_handlers_for_packet(bundle, TRACKER)
+    assert sent == [(bundle, ("127.0.0.1", 3333))]
+    assert relay.forwarded_packets == 1 and not relay.cursors
+
+
+def test_unnamed_trackers_are_forwarded_apart():
+    relay, sent = _relay()
+    trackers = [TuioServer(version=version) for version in (1, 1, 2, 2)]
+    for session_id, tracker in enumerate(trackers):
+        tracker._sock = CapturingSocket()
+        tracker.cursors.append(Cursor(session_id))
+    downstream = TuioDispatcher()
+    for _ in range(3):
+        for port, tracker in enumerate(trackers, 5000):
+            tracker.send_bundle()
+            relay.call_handlers_for_packet(tracker._sock.sent[-1][0], ("10.0.0.5", port))
+            downstream.call_handlers_for_packet(sent[-1][0], ("10.0.0.9", 3333))
+    assert relay.forwarded_packets == 12
+    assert sorted(c.session_id for c in downstream.cursors) == [0, 1, 2, 3]
+    assert downstream.frame_sequence.dropped == 0
+    assert list(downstream.sources)[1:] == ["tuio@10.0.0.5:5000", "tuio@10.0.0.5:5001",
+                                            "pythontuio@10.0.0.5:5002",
+                                            "pythontuio@10.0.0.5:5003"]
+
+
+def test_transform_calibrates_crops_and_remaps():
+    transform = RelayTransform([[0.5, 0, 0.5], [0, 2, 0]], roi=(0.5, 0, 1, 1), session_offset=100)
+    relay, sent = _relay(transforms={"10.0.0.5" : transform})    # looked up by ip as well
+    bundle = _profile_bundle({TUIO_CURSOR : [_cursor(1, 0.2, 0.25), _cursor(2, 0.4, 0.75)]}, 1)
+    relay.call_handlers_for_packet(bundle, TRACKER)
+    sets = _sets(sent[-1][0])
+    assert list(sets) == [101]                      # the second cursor is at y 1.5
+    assert sets[101][:4] == pytest.approx([0.6, 0.5, 0.05, 0.0])
+    assert relay.cursors[0].position == pytest.approx((0.2, 0.25))
+
+    relay.remove_source(SOURCE)
+    messages = [m.message.params for m in OscPacket(sent[-1][0]).messages]
+    assert ["alive"] in messages and not _sets(sent[-1][0])
+
+
+def test_homography_from_points():
+    corners = [(0.1, 0.1), (0.9, 0.2), (0.8, 0.9), (0.2, 0.8)]
+    square = [(0, 0), (1, 0), (1, 1), (0, 1)]
+    transform = RelayTransform.from_points(corners, square)
+    positions, _, inside = transform.apply(np.array(corners))
+    assert positions == pytest.approx(np.array(square, dtype=float))
+    assert inside.all()
+
+
+def test_blob_size_and_angle_follow_the_transform():
+    relay, sent = _relay(default=RelayTransform([[0, -1, 1], [1, 0, 0]]))   # rotated by 90 degrees
+    blob = Blob(3)
+    blob.position, blob.angle, blob.dimension = (0.5, 0.5), 0.0, (0.2, 0.1)
+    relay.call_handlers_for_packet(_profile_bundle({TUIO_BLOB : [blob]}, 1), TRACKER)
+    x, y, angle, width, height = _sets(sent[-1][0])[3][:5]
+    assert (x, y, width, height) == pytest.approx((0.5, 0.5, 0.2, 0.1))
+    assert angle == pytest.approx(np.pi / 2)
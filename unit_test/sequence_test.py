@@ -0,0 +1,119 @@
+"""
+tests of the fseq ordering of the received frames
+"""
+from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.osc_bundle_builder import OscBundleBuilder
+from pythonosc.osc_bundle import OscBundle
+
+from pythontuio import Cursor, Object
+from pythontuio.const import TUIO_CURSOR, TUIO_OBJECT
+from pythontuio.dispatcher import TuioDispatcher
+from pythontuio.decoder import TuioDecoder
+from pythontuio.encoder import TuioEncoder
+from pythontuio.sequence import FrameSequence, read_frame_header, replace_source
+
+from dispatcher_test import _profile_bundle, RecordingListener
+
+
+def test_read_frame_header():
+    encoder = TuioEncoder()
+    data = bytes(encoder.encode([Cursor(1)], [], [], frame_id=7, source="table@10.0.0.1"))
+    assert read_frame_header(data) == ("table@10.0.0.1", 7, 0, TUIO_CURSOR)
+
+    fragments = encoder.encode_fragments([Cursor(i) for i in range(40)], [], [],
+                                         frame_id=8, max_size=512)
+    assert [read_frame_header(bytes(f)) for f in fragments] == \
+           [(None, 8, len(fragments) - 1 - i, TUIO_CURSOR) for i in range(len(fragments))]
+    assert read_frame_header(b"/tuio/2Dcur\x00") is None
+
+
+def test_replace_source():
+    encoder = TuioEncoder()
+    data = bytes(encoder.encode([Cursor(1)], [Object(2)], [], frame_id=7, source="table"))
+    renamed = replace_source(data, "table@10.0.0.1")
+    messages = [m.params for m in OscBundle(renamed)]
+    assert [p for p in messages if p[0] == "source"] == [["source", "table@10.0.0.1"]] * 3
+    assert len(messages) == len(list(OscBundle(data)))     # one source per profile type
+    assert read_frame_header(renamed) == ("table@10.0.0.1", 7, 0, TUIO_CURSOR)
+
+    unnamed = bytes(encoder.encode([Cursor(1)], [], [], frame_id=8))
+    assert read_frame_header(replace_source(unnamed, "tuio@10.0.0.2:5000")) == \
+           ("tuio@10.0.0.2:5000", 8, 0, TUIO_CURSOR)
+    assert replace_source(b"/tuio/2Dcur", "tuio") == b"/tuio/2Dcur"
+
+
+def test_frame_sequence_counters():
+    sequence = FrameSequence()
+    assert sequence.accept("a", 1)
+    assert sequence.accept("a", 4)                      # 2 and 3 are lost
+    assert sequence.lost == 2
+    assert not sequence.accept("a", 4)                  # duplicate
+    assert not sequence.accept("a", 3)                  # late
+    assert (sequence.dropped, sequence.reordered, sequence.lost) == (2, 1, 1)
+    assert sequence.accept("b", 1)                      # sources are independent
+    assert sequence.accept("a", -1)
+    assert sequence.accept("a", 5, 1) and sequence.accept("a", 5, 0)
+    assert not sequence.accept("a", 5, 1)
+    assert sequence.accept("a", 500)
+    assert sequence.accept("a", 1)                      # sender restarted
+    assert sequence.lost == 1
+
+
+def test_dispatcher_drops_stale_bundles():
+    for fast in (False, True):
+        dispatcher = TuioDispatcher()
+        if fast:
+            dispatcher._decoder = TuioDecoder(dispatcher)
+        listener = RecordingListener()
+        dispatcher.add_listener(listener)
+        address = ("127.0.0.1", 3333)
+
+        dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR : [Cursor(1)]}, 2), address)
+        dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR : []}, 1), address)
+        dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR : [Cursor(1)]}, 2), address)
+        assert [c.session_id for c in dispatcher.cursors] == [1]
+        assert listener.events == [("add", 1)]
+        assert dispatcher.frame_sequence.dropped == 2
+
+        dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR : []}, 3), address)
+        assert listener.events == [("add", 1), ("remove", 1)]
+
+
+def _single_profile_bundle(address, profiles, fseq):
+    """
+    bundle of one profile type with its own fseq, like the TUIO 1.1 reference servers send
+    """
+    bundle_builder = OscBundleBuilder(0)
+    builder = OscMessageBuilder(address=address)
+    builder.add_arg("alive")
+    for profile in profiles:
+        builder.add_arg(profile.session_id)
+    bundle_builder.add_content(builder.build())
+    for profile in profiles:
+        bundle_builder.add_content(profile.get_message())
+    builder = OscMessageBuilder(address=address)
+    builder.add_arg("fseq")
+    builder.add_arg(fseq)
+    bundle_builder.add_content(builder.build())
+    return bundle_builder.build().dgram
+
+
+def test_profiles_share_frame_id():
+    for fast in (False, True):
+        dispatcher = TuioDispatcher()
+        if fast:
+            dispatcher._decoder = TuioDecoder(dispatcher)
+        address = ("127.0.0.1", 3333)
+        for fseq in (10, 11, 12):
+            dispatcher.call_handlers_for_packet(
+                _single_profile_bundle(TUIO_OBJECT, [Object(1)], fseq), address)
+            dispatcher.call_handlers_for_packet(
+                _single_profile_bundle(TUIO_CURSOR, [Cursor(2)], fseq), address)
+        assert [o.session_id for o in dispatcher.objects] == [1]
+        assert [c.session_id for c in dispatcher.cursors] == [2]
+        assert dispatcher.frame_sequence.dropped == 0
+
+        dispatcher.call_handlers_for_packet(
+            _single_profile_bundle(TUIO_CURSOR, [], 11), address)
+        assert [c.session_id for c in dispatcher.cursors] == [2]
+        assert dispatcher.frame_sequence.dropped == 1
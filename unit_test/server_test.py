@@ -0,0 +1,231 @@
+"""
+tests of the TuioServer which capture the sent bundles instead of using the network
+"""
+import socket
+import time
+
+import pytest
+from pythonosc.osc_packet import OscPacket
+
+from pythontuio import TuioServer
+from pythontuio import Cursor
+from pythontuio.const import TUIO_CURSOR
+from pythontuio.scheduler import FrameScheduler, SKIP
+
+from dispatcher_test import _profile_bundle
+
+
+class CapturingSocket:
+    def __init__(self):
+        self.sent = []
+    def sendto(self, data, address):
+        self.sent.append((bytes(data), address))
+
+
+def _messages(dgram):
+    return [(m.message.address, m.message.params) for m in OscPacket(dgram).messages]
+
+
+def _set_ids(dgram):
+    return [params[1] for _, params in _messages(dgram) if params[0] == "set"]
+
+
+def _server():
+    server = TuioServer()
+    server._sock = CapturingSocket()
+    return server
+
+
+def test_delta_frames_send_only_changed_profiles():
+    server = _server()
+    server.is_full_update = False
+    first, second = Cursor(1), Cursor(2)
+    server.cursors.extend([first, second])
+
+    server.send_bundle()
+    assert _set_ids(server._sock.sent[-1][0]) == [1, 2]
+
+    server.send_bundle()
+    assert _set_ids(server._sock.sent[-1][0]) == []
+
+    second.position = (0.5, 0.5)
+    server.send_bundle()
+    messages = _messages(server._sock.sent[-1][0])
+    assert _set_ids(server._sock.sent[-1][0]) == [2]
+    assert ("/tuio/2Dcur", ["alive", 1, 2]) in messages
+
+
+def test_periodic_full_update():
+    server = _server()
+    server.is_full_update = False
+    server.enable_periodic_messages(0)
+    server.cursors.append(Cursor(1))
+    server.send_bundle()
+    server.send_bundle()
+    assert _set_ids(server._sock.sent[-1][0]) == [1]
+
+    server.disable_periodic_messages()
+    server.send_bundle()
+    assert _set_ids(server._sock.sent[-1][0]) == []
+
+
+def test_source_name():
+    server = _server()
+    server.set_source_name("table")
+    server.send_bundle()
+    messages = _messages(server._sock.sent[-1][0])
+    assert messages[0] == ("/tuio/2Dcur", ["source", "table@127.0.0.1"])
+    assert ("/tuio/2Dblb", ["source", "table@127.0.0.1"]) in messages
+
+
+
+def test_source_name_is_the_local_address():
+    server = TuioServer("localhost")
+    server._sock = CapturingSocket()
+    server.set_source_name("table")
+    assert server._source_name == "table@127.0.0.1"
+    server.set_source_name("table", "10.0.0.7")
+    assert server._source_name == "table@10.0.0.7"
+
+
+def test_source_name_keeps_the_dispatcher_sources():
+    server = _server()
+    server.set_source_name("table")
+    server._cursor_handler(TUIO_CURSOR, "alive", 2)    # the handlers use the current source
+    assert [c.session_id for c in server.cursors] == [2]
+    server.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR : [Cursor(1)]}, 1),
+                                    ("10.0.0.1", 3333))
+    assert [c.session_id for c in server.sources[("10.0.0.1", 3333)].cursors] == [1]
+    server.remove_source(("10.0.0.1", 3333))
+    assert [c.session_id for c in server.cursors] == [2]
+
+
+def _wait_for(condition, timeout :float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_frame_scheduler_sends_frames():
+    server = _server()
+    server.cursors.append(Cursor(1))
+    start = time.monotonic()
+    server.enable_periodic_messages(1000, frame_intervall=5)
+    assert _wait_for(lambda: len(server._sock.sent) >= 10)
+    server.disable_periodic_messages()
+    elapsed = time.monotonic() - start
+    sent = len(server._sock.sent)
+    assert sent <= elapsed / 0.005 + 2      # skipped deadlines are never sent
+    time.sleep(0.05)
+    assert len(server._sock.sent) == sent
+
+
+def test_frame_scheduler_survives_failing_frames():
+    calls = []
+    def failing_frame():
+        calls.append(None)
+        if len(calls) % 2:
+            raise OSError("network is unreachable")
+    scheduler = FrameScheduler(failing_frame, 1)
+    scheduler.start()
+    try:
+        assert _wait_for(lambda: len(calls) >= 6)
+        assert scheduler.running
+    finally:
+        scheduler.stop()
+    assert scheduler.failed_frames >= 3 and scheduler.frames_sent >= 2
+    assert isinstance(scheduler.last_error, OSError)
+
+
+def test_frame_scheduler_skips_missed_deadlines():
+    frames = []
+    def slow_frame():
+        frames.append(time.monotonic())
+        time.sleep(0.025)
+    scheduler = FrameScheduler(slow_frame, 10, policy=SKIP)
+    scheduler.start()
+    time.sleep(0.2)
+    scheduler.stop()
+    assert scheduler.frames_sent == len(frames)
+    assert scheduler.missed_deadlines >= scheduler.frames_sent
+
+
+def test_frame_ids_increase():
+    server = _server()
+    server.send_bundle()
+    server.send_bundle()
+    fseqs = [_messages(dgram)[-1][1] for dgram, _ in server._sock.sent]
+    assert fseqs == [["fseq", 1], ["fseq", 2]]
+
+
+def test_frames_are_encoded_once_for_all_destinations():
+    server = _server()
+    server.add_destination("127.0.0.1", 4444)
+    server.add_destination("localhost", 5555)
+    server.cursors.append(Cursor(1))
+    encodes = []
+    encode_fragments = server._encoder.encode_fragments
+    server._encoder.encode_fragments = lambda *args, **kwargs: encodes.append(1) or encode_fragments(*args, **kwargs)
+
+    server.send_bundle()
+    assert len(encodes) == 1
+    assert [address[1] for _, address in server._sock.sent] == [3333, 4444, 5555]
+    assert len({data for data, _ in server._sock.sent}) == 1
+
+    server.remove_destination("127.0.0.1", 4444)
+    server.send_bundle()
+    assert [address[1] for _, address in server._sock.sent[3:]] == [3333, 5555]
+    assert server.destinations == [("127.0.0.1", 3333), ("localhost", 5555)]
+
+
+def test_failing_destination_does_not_block_the_others():
+    class FailingSocket(CapturingSocket):
+        def sendto(self, data, address):
+            if address[1] == 4444:
+                raise ConnectionRefusedError()
+            super().sendto(data, address)
+    server = _server()
+    server.add_destination("127.0.0.1", 4444)
+    server.add_destination("127.0.0.1", 5555)
+    server._sock = FailingSocket()
+    with pytest.raises(ConnectionRefusedError):
+        server.send_bundle()
+    assert [address[1] for _, address in server._sock.sent] == [3333, 5555]
+
+
+class OptionSocket(CapturingSocket):
+    def __init__(self):
+        super().__init__()
+        self.options = []
+    def setsockopt(self, level, option, value):
+        self.options.append((level, option, value))
+
+
+@pytest.mark.skipif(not socket.has_ipv6, reason="no IPv6 support")
+def test_multicast_options_follow_the_address_family():
+    for host, group, level in (("127.0.0.1", "239.0.0.42", socket.IPPROTO_IP),
+                               ("::1", "ff05::42", socket.IPPROTO_IPV6)):
+        server = TuioServer(host)
+        server._sock = OptionSocket()
+        server.add_multicast_group(group, ttl=4)
+        assert [option[0] for option in server._sock.options] == [level, level]
+        assert server._sock.options[0][2] == 4
+        assert server.destinations[-1] == (group, 3333)
+
+
+def test_delta_frames_compare_the_sent_values():
+    server = _server()
+    server.is_full_update = False
+    cursor = Cursor(1)
+    server.cursors.append(cursor)
+    server.send_bundle()
+    cursor.position = (0, 0)                # assigned, but unchanged
+    server.send_bundle()
+    assert _set_ids(server._sock.sent[-1][0]) == []
+
+    server.cursors.remove(cursor)
+    server.send_bundle()
+    server.cursors.append(cursor)           # sent again after it was gone
+    server.send_bundle()
+    assert _set_ids(server._sock.sent[-1][0]) == [1]
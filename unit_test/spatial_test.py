@@ -0,0 +1,83 @@
+"""
+tests of the spatial index and its region events
+"""
+import random
+
+from pythontuio import Cursor, Object
+from pythontuio import TuioListener
+from pythontuio.const import TUIO_CURSOR
+from pythontuio.dispatcher import TuioDispatcher
+from pythontuio.spatial import GridIndex, Region, SpatialIndex, ENTER, LEAVE
+
+from dispatcher_test import _profile_bundle
+
+
+def _cursor(session_id, x, y):
+    cursor = Cursor(session_id)
+    cursor.position = (x, y)
+    return cursor
+
+
+def test_grid_queries_match_scan():
+    rng = random.Random(3)
+    index = GridIndex(cells=8)
+    cursors = [_cursor(i, rng.random(), rng.random()) for i in range(300)]
+    for cursor in cursors:
+        index.move(cursor)
+    for cursor in cursors[:100]:
+        cursor.position = (rng.random(), rng.random())
+        index.move(cursor)
+    for cursor in cursors[200:]:
+        index.remove(cursor)
+    cursors = cursors[:200]
+    assert len(index) == 200
+
+    def distance(cursor):
+        return (cursor.position[0] - 0.3) ** 2 + (cursor.position[1] - 0.6) ** 2
+    assert set(index.region(0.2, 0.1, 0.5, 0.4)) == {
+        c for c in cursors if 0.2 <= c.position[0] <= 0.5 and 0.1 <= c.position[1] <= 0.4}
+    assert set(index.radius(0.3, 0.6, 0.15)) == {c for c in cursors if distance(c) <= 0.15 ** 2}
+    assert index.nearest(0.3, 0.6, 5) == sorted(cursors, key=distance)[:5]
+    assert len(index.nearest(0.3, 0.6, 500)) == 200
+
+
+def test_region_events():
+    spatial_index = SpatialIndex(cells=4)
+    button = spatial_index.add_region(Region("button", 0.1, 0.1, 0.3, 0.3))
+    spatial_index.add_region(Region("objects only", 0.0, 0.0, 1.0, 1.0, profile_types=(Object,)))
+    cursor = _cursor(1, 0.8, 0.8)
+    spatial_index.move(cursor)
+    assert not spatial_index.pop_events()
+    cursor.position = (0.2, 0.2)
+    spatial_index.move(cursor)
+    assert spatial_index.pop_events() == [(ENTER, cursor, button)]
+    assert spatial_index.inside(cursor) == [button]
+    spatial_index.remove(cursor)
+    assert spatial_index.pop_events() == [(LEAVE, cursor, button)]
+
+
+class RegionListener(TuioListener):
+    def __init__(self):
+        self.events = []
+    def enter_tuio_region(self, profile, region):
+        self.events.append(("enter", profile.session_id, region.name))
+    def leave_tuio_region(self, profile, region):
+        self.events.append(("leave", profile.session_id, region.name))
+
+
+def test_dispatcher_spatial_index():
+    dispatcher = TuioDispatcher()
+    listener = RegionListener()
+    dispatcher.add_listener(listener)
+    spatial_index = dispatcher.enable_spatial_index(cells=16)
+    spatial_index.add_region(Region("corner", 0.0, 0.0, 0.25, 0.25))
+
+    first, second = _cursor(1, 0.1, 0.1), _cursor(2, 0.9, 0.9)
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR : [first, second]}, 1), None)
+    assert listener.events == [("enter", 1, "corner")]
+    assert [c.session_id for c in spatial_index.cursors.nearest(0.8, 0.8)] == [2]
+
+    second.position = (0.2, 0.2)
+    dispatcher.call_handlers_for_packet(_profile_bundle({TUIO_CURSOR : [second]}, 2), None)
+    assert listener.events[1:] == [("leave", 1, "corner"), ("enter", 2, "corner")]
+    assert len(spatial_index.cursors) == 1
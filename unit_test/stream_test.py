@@ -0,0 +1,55 @@
+"""
+tests of the TCP stream transport
+"""
+import time
+
+import pytest
+
+from pythontuio import Cursor, TuioServer
+from pythontuio.stream import StreamDecoder, TuioStreamClient, frame_packets, SIZE_PREFIX, SLIP
+
+
+@pytest.mark.parametrize("framing", [SIZE_PREFIX, SLIP])
+def test_decoder_reassembles_split_chunks(framing):
+    packets = [b"#bundle\x00\xc0\xdb\xdc", b"", b"/tuio\x00\x00\x00" * 3, bytes(range(256))]
+    packets = [p for p in packets if p] # an empty SLIP packet is not sent
+    stream = frame_packets(packets, framing)
+    decoder = StreamDecoder(framing)
+    received = []
+    for start in range(0, len(stream), 7):
+        received.extend(decoder.feed(stream[start:start + 7]))
+    assert received == packets
+    assert len(decoder) == 0
+
+
+def test_decoder_rejects_broken_size():
+    with pytest.raises(ValueError):
+        StreamDecoder(SIZE_PREFIX, max_packet_size=16).feed(b"\x00\x00\x01\x00")
+
+
+def _wait(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.mark.parametrize("framing", [SIZE_PREFIX, SLIP])
+def test_server_streams_frames_to_client(framing):
+    client = TuioStreamClient(("127.0.0.1", 0), framing, fast_decoder=True)
+    client.start()
+    try:
+        host, port = client.server_address
+        server = TuioServer(host, port, max_datagram_size=256, stream=framing)
+        cursors = [Cursor(session_id) for session_id in range(50)]
+        for cursor in cursors:
+            cursor.position = (cursor.session_id / 50, 0.5)
+        server.cursors.extend(cursors)
+        server.send_bundle()
+        assert _wait(lambda: len(client.cursors) == 50)
+        assert client.cursors[7].position == pytest.approx((7 / 50, 0.5))
+
+        server.remove_stream(host, port)     # sessions of a closed connection are removed
+        assert _wait(lambda: not client.cursors)
+    finally:
+        client.stop()
@@ -0,0 +1,116 @@
+"""
+tests of the TUIO 2.0 encoding and decoding
+"""
+from datetime import datetime, timedelta
+import time
+
+import pytest
+
+from pythontuio import Cursor, Object, Blob
+from pythontuio.dispatcher import TuioDispatcher
+from pythontuio.decoder import TuioDecoder
+from pythontuio.encoder import cursor_payload, object_payload, blob_payload
+from pythontuio.tuio import TuioServer
+from pythontuio.sequence import read_frame_header
+from pythontuio.tuio2 import ntp_timetag, unix_time
+
+from dispatcher_test import RecordingListener
+from server_test import CapturingSocket, _messages
+
+
+def _server():
+    server = TuioServer(version=2)
+    server._sock = CapturingSocket()
+    server.set_source_name("table")
+    return server
+
+
+def _profiles():
+    cursor, obj, blob = Cursor(1), Object(2), Blob(3)
+    cursor.position = (0.25, 0.5)
+    cursor.velocity = (0.125, -0.5)
+    obj.class_id = 7
+    obj.angle = 1.5
+    blob.dimension = (0.5, 0.25)
+    return cursor, obj, blob
+
+
+def test_tuio2_bundle_layout():
+    server = _server()
+    cursor, obj, blob = _profiles()
+    server.cursors.append(cursor)
+    server.objects.append(obj)
+    server.blobs.append(blob)
+    server.send_bundle()
+    data = server._sock.sent[0][0]
+
+    messages = _messages(data)
+    assert [address for address, _ in messages] == \
+           ["/tuio2/frm", "/tuio2/ptr", "/tuio2/tok", "/tuio2/bnd", "/tuio2/alv"]
+    assert messages[0][1][0] == 1 and messages[0][1][3] == "table@127.0.0.1"
+    assert messages[-1][1] == [1, 2, 3]
+    assert read_frame_header(data) == ("table@127.0.0.1", 1, 0, "/tuio2/frm")
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_tuio2_client(fast):
+    server = _server()
+    cursor, obj, blob = _profiles()
+    server.cursors.append(cursor)
+    server.objects.append(obj)
+    server.blobs.append(blob)
+    server.send_bundle()
+    server.cursors.clear()
+    blob.position = (0.75, 0.75)
+    server.is_full_update = False
+    server.send_bundle()
+
+    dispatcher = TuioDispatcher()
+    if fast:
+        dispatcher._decoder = TuioDecoder(dispatcher)
+    listener = RecordingListener()
+    frames = []
+    listener.refresh = frames.append
+    dispatcher.add_listener(listener)
+
+    dispatcher.call_handlers_for_packet(server._sock.sent[0][0], ("127.0.0.1", 3333))
+    assert listener.events == [("add", 1)]
+    assert [cursor_payload(c) for c in dispatcher.cursors] == [pytest.approx(cursor_payload(cursor))]
+    assert [object_payload(o) for o in dispatcher.objects] == [pytest.approx(object_payload(obj))]
+    assert frames[0] == pytest.approx(time.time(), abs=5)
+
+    dispatcher.call_handlers_for_packet(server._sock.sent[1][0], ("127.0.0.1", 3333))
+    assert listener.events == [("add", 1), ("remove", 1)]
+    assert dispatcher.cursors == []
+    assert [blob_payload(b) for b in dispatcher.blobs] == [pytest.approx(blob_payload(blob))]
+    assert list(dispatcher.sources) == [None, "table@127.0.0.1"]
+
+
+def test_timetag_round_trip():
+    seconds = 1700000000.25
+    timetag = ntp_timetag(seconds)
+    utc = datetime(1900, 1, 1) + timedelta(seconds=timetag >> 32)
+    assert unix_time((utc, timetag & 0xFFFFFFFF)) == pytest.approx(seconds)
+
+
+def test_unnamed_servers_are_kept_apart():
+    dispatcher = TuioDispatcher()
+    listener = RecordingListener()
+    dispatcher.add_listener(listener)
+    servers = []
+    for session_id in (1, 2):
+        server = TuioServer(version=2)
+        server._sock = CapturingSocket()
+        server.cursors.append(Cursor(session_id))
+        servers.append(server)
+    for _ in range(3):
+        for port, server in zip((5000, 5001), servers):
+            server.send_bundle()
+            dispatcher.call_handlers_for_packet(server._sock.sent[-1][0], ("127.0.0.1", port))
+
+    assert sorted(c.session_id for c in dispatcher.cursors) == [1, 2]
+    assert listener.events[:2] == [("add", 1), ("add", 2)]
+    assert ("remove", 1) not in listener.events and ("remove", 2) not in listener.events
+    assert dispatcher.frame_sequence.dropped == 0
+    assert list(dispatcher.sources)[1:] == ["pythontuio@127.0.0.1:5000",
+                                            "pythontuio@127.0.0.1:5001"]